@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.ai_integration.tasks import rebuild_usage_rollups
+from apps.ai_integration.usage import usage_buffer
+
+
+class Command(BaseCommand):
+    help = "Rebuild hourly and daily usage rollups from recorded usage."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Only rebuild rollups for the last N days (default: all history).",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        since = None
+        if options["days"] is not None:
+            since = timezone.now() - timedelta(days=options["days"])
+
+        usage_buffer.flush()
+        written = rebuild_usage_rollups(since=since, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} rollup row(s)"))
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:24
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai_integration", "0002_delete_conversationmemory"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="usagetracking",
+            name="created_at",
+            field=models.DateTimeField(
+                db_index=True, default=django.utils.timezone.now
+            ),
+        ),
+    ]
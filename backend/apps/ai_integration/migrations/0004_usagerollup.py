@@ -0,0 +1,91 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:25
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("ai_integration", "0003_usagetracking_created_at_default"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UsageRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("model_used", models.CharField(max_length=100)),
+                (
+                    "operation_type",
+                    models.CharField(
+                        choices=[
+                            ("chat", "Chat"),
+                            ("embedding", "Embedding"),
+                            ("memory", "Memory"),
+                        ],
+                        max_length=50,
+                    ),
+                ),
+                (
+                    "granularity",
+                    models.CharField(
+                        choices=[("hour", "Hour"), ("day", "Day")], max_length=10
+                    ),
+                ),
+                ("bucket_start", models.DateTimeField()),
+                ("request_count", models.PositiveIntegerField(default=0)),
+                ("cached_count", models.PositiveIntegerField(default=0)),
+                ("input_tokens", models.PositiveBigIntegerField(default=0)),
+                ("output_tokens", models.PositiveBigIntegerField(default=0)),
+                ("total_tokens", models.PositiveBigIntegerField(default=0)),
+                (
+                    "estimated_cost",
+                    models.DecimalField(
+                        decimal_places=6, default=Decimal("0"), max_digits=14
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="usage_rollups",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["user", "granularity", "bucket_start"],
+                        name="ai_usagerollup_user_bucket",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="usagerollup",
+            constraint=models.UniqueConstraint(
+                fields=(
+                    "user",
+                    "model_used",
+                    "operation_type",
+                    "granularity",
+                    "bucket_start",
+                ),
+                name="ai_usagerollup_bucket_uniq",
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:33
+
+from django.db import migrations, models
+
+from shared.db import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("ai_integration", "0004_usagerollup"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="usagetracking",
+            index=models.Index(
+                fields=["user", "-created_at"], name="ai_usage_user_created_idx"
+            ),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from decimal import Decimal
 
 from django.db import models
+from django.utils import timezone
 
 from apps.authentication.models import User
 from apps.chats.models import Chat, Message
@@ -73,7 +74,69 @@ class UsageTracking(models.Model):
     response_time_ms = models.PositiveIntegerField(default=0)
     was_cached = models.BooleanField(default=False)
 
-    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Set explicitly by the buffered writer so rows keep the time of the event
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Per-user usage history, newest first
+            models.Index(
+                fields=["user", "-created_at"], name="ai_usage_user_created_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"Usage {self.model_used} for user {self.user_id}"
+
+
+class UsageRollup(models.Model):
+    """Usage totals per user, model and operation for one hour or one day (UTC)."""
+
+    GRANULARITY_CHOICES = [
+        ("hour", "Hour"),
+        ("day", "Day"),
+    ]
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="usage_rollups"
+    )
+    model_used = models.CharField(max_length=100)
+    operation_type = models.CharField(
+        max_length=50, choices=UsageTracking.OPERATION_CHOICES
+    )
+    granularity = models.CharField(max_length=10, choices=GRANULARITY_CHOICES)
+    bucket_start = models.DateTimeField()
+
+    request_count = models.PositiveIntegerField(default=0)
+    cached_count = models.PositiveIntegerField(default=0)
+    input_tokens = models.PositiveBigIntegerField(default=0)
+    output_tokens = models.PositiveBigIntegerField(default=0)
+    total_tokens = models.PositiveBigIntegerField(default=0)
+    estimated_cost = models.DecimalField(
+        max_digits=14, decimal_places=6, default=Decimal("0")
+    )
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    "user",
+                    "model_used",
+                    "operation_type",
+                    "granularity",
+                    "bucket_start",
+                ],
+                name="ai_usagerollup_bucket_uniq",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "granularity", "bucket_start"],
+                name="ai_usagerollup_user_bucket",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.granularity} usage {self.bucket_start} for user {self.user_id}"
@@ -1,8 +1,10 @@
 from datetime import datetime
+from decimal import Decimal
+from typing import List
 
 from ninja import ModelSchema, Schema
 
-from .models import AIModel, UsageTracking
+from .models import AIModel, UsageRollup, UsageTracking
 
 
 class AIModelSchema(ModelSchema):
@@ -54,3 +56,35 @@ class CostEstimateResponse(Schema):
     input_tokens: int
     output_tokens: int
     calculated_at: datetime
+
+
+class UsageRollupSchema(ModelSchema):
+    class Meta:
+        model = UsageRollup
+        fields = [
+            "model_used",
+            "operation_type",
+            "granularity",
+            "bucket_start",
+            "request_count",
+            "cached_count",
+            "input_tokens",
+            "output_tokens",
+            "total_tokens",
+            "estimated_cost",
+        ]
+
+
+class ModelCostSchema(Schema):
+    model_used: str
+    request_count: int
+    total_tokens: int
+    estimated_cost: Decimal
+
+
+class UsageCostSummary(Schema):
+    since: datetime
+    request_count: int
+    total_tokens: int
+    estimated_cost: Decimal
+    by_model: List[ModelCostSchema]
@@ -1,13 +1,16 @@
 import asyncio
 import json
 import logging
+from decimal import Decimal
 from typing import Any, AsyncGenerator, Dict, List, Optional
 
 import httpx
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.db.models import Q
 
 from apps.chats.models import Message
+from shared.cache import CacheService
 
 from .models import AIModel, UsageTracking
 
@@ -21,6 +24,11 @@ class OpenRouterAPIError(Exception):
 class OpenRouterService:
     BASE_URL = "https://openrouter.ai/api/v1"
     DEFAULT_MODEL = "google/gemini-2.5-flash"
+    DEFAULT_SYSTEM_PROMPT = "You are a helpful AI assistant."
+    # Providers that only cache prompts at explicit cache_control breakpoints;
+    # OpenAI-style providers cache matching prefixes automatically.
+    CACHE_CONTROL_PREFIXES = ("anthropic/", "google/gemini")
+    PRICING_CACHE_TIMEOUT = 60 * 10
 
     @classmethod
     def get_headers(cls) -> Dict[str, str]:
@@ -36,21 +44,19 @@ class OpenRouterService:
         cls,
         *,
         model: str,
-        messages: List[Dict[str, str]],
+        messages: List[Dict[str, Any]],
         temperature: float = 0.7,
         max_tokens: int = 1000,
         **kwargs,
     ) -> AsyncGenerator[Dict[str, Any], None]:
-        system_message = {
-            "role": "system",
-            "content": "You are a helpful AI assistant.",
-        }
+        """Stream a chat completion; ``messages`` already include the system prompt."""
         payload = {
             "model": model,
-            "messages": [system_message] + messages,
+            "messages": messages,
             "temperature": temperature,
             "max_tokens": max_tokens,
             "stream": True,
+            "usage": {"include": True},
         }
         payload.update(kwargs)
 
@@ -85,6 +91,47 @@ class OpenRouterService:
         except httpx.RequestError as exc:  # pragma: no cover
             raise OpenRouterAPIError(f"Request error: {exc}") from exc
 
+    @classmethod
+    async def create_completion(
+        cls,
+        *,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.3,
+        max_tokens: int = 800,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """Run a non-streaming completion, used for background housekeeping calls."""
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        payload.update(kwargs)
+
+        try:
+            async with httpx.AsyncClient(timeout=60.0) as client:
+                response = await client.post(
+                    f"{cls.BASE_URL}/chat/completions",
+                    headers=cls.get_headers(),
+                    json=payload,
+                )
+        except httpx.TimeoutException as exc:  # pragma: no cover
+            raise OpenRouterAPIError("Request timeout") from exc
+        except httpx.RequestError as exc:  # pragma: no cover
+            raise OpenRouterAPIError(f"Request error: {exc}") from exc
+
+        if response.status_code != 200:
+            raise OpenRouterAPIError(
+                f"API request failed: {response.status_code} - {response.text}"
+            )
+        return response.json()
+
+    @classmethod
+    def supports_cache_control(cls, model: str) -> bool:
+        return model.startswith(cls.CACHE_CONTROL_PREFIXES)
+
     @classmethod
     def resolve_model_id(cls, raw_model: str | None) -> str:
         """Map friendly names to OpenRouter-compatible identifiers."""
@@ -126,22 +173,45 @@ class OpenRouterService:
             logger.error("Error fetching models: %s", exc)
             return []
 
+    @classmethod
+    def get_model_pricing(cls, model: str) -> tuple[Decimal, Decimal] | None:
+        """Input/output USD price per million tokens, cached per model."""
+        cache = CacheService.get_cache()
+        cache_key = CacheService.generate_cache_key("model_pricing", model)
+        pricing = cache.get(cache_key)
+        if pricing is None:
+            record = (
+                AIModel.objects.filter(Q(openrouter_model_id=model) | Q(name=model))
+                .values_list("input_price_per_million", "output_price_per_million")
+                .first()
+            )
+            # Unknown models are cached as an empty list so misses stay cheap too
+            pricing = [str(price) for price in record] if record else []
+            cache.set(cache_key, pricing, cls.PRICING_CACHE_TIMEOUT)
+        if not pricing:
+            return None
+        return Decimal(pricing[0]), Decimal(pricing[1])
+
+    @classmethod
+    def calculate_cost(
+        cls, *, model: str, input_tokens: int, output_tokens: int = 0
+    ) -> Decimal:
+        pricing = cls.get_model_pricing(model)
+        if pricing is None:
+            logger.warning("Model %s not found in database", model)
+            return Decimal("0")
+        input_price, output_price = pricing
+        cost = (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+        return cost.quantize(Decimal("0.000001"))
+
     @classmethod
     async def estimate_cost(
         cls, *, model: str, input_tokens: int, output_tokens: int = 0
     ) -> float:
-        try:
-            ai_model = await AIModel.objects.aget(openrouter_model_id=model)
-            input_cost = (input_tokens / 1_000_000) * float(
-                ai_model.input_price_per_million
-            )
-            output_cost = (output_tokens / 1_000_000) * float(
-                ai_model.output_price_per_million
-            )
-            return input_cost + output_cost
-        except AIModel.DoesNotExist:
-            logger.warning("Model %s not found in database", model)
-            return 0.0
+        cost = await sync_to_async(cls.calculate_cost)(
+            model=model, input_tokens=input_tokens, output_tokens=output_tokens
+        )
+        return float(cost)
 
 
 async def record_usage(
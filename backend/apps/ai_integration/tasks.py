@@ -3,26 +3,108 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-def track_usage(user_id: str, model: str, tokens_used: int):
-    from django.db.models import F
-    from apps.authentication.models import User
-    from .models import AIModel, UsageTracking
-
-    try:
-        ai_model = AIModel.objects.get(name=model)
-        estimated_cost = (tokens_used / 1_000_000) * float(ai_model.input_price_per_million)
-    except AIModel.DoesNotExist:
-        estimated_cost = 0.0
-
-    UsageTracking.objects.create(
-        user_id=user_id,
-        model_used=model,
-        operation_type="chat",
-        total_tokens=tokens_used,
-        estimated_cost=estimated_cost,
-    )
+def track_usage(
+    user_id: str,
+    model: str,
+    tokens_used: int,
+    *,
+    chat_id: str | None = None,
+    message_id: str | None = None,
+    input_tokens: int = 0,
+    output_tokens: int = 0,
+    estimated_cost=None,
+    was_cached: bool = False,
+):
+    """Queue a usage record; the buffered writer persists it off the request path."""
+    from .services import OpenRouterService
+    from .usage import UsageEvent, usage_buffer
+
+    if estimated_cost is None:
+        estimated_cost = OpenRouterService.calculate_cost(
+            model=model,
+            input_tokens=input_tokens or tokens_used,
+            output_tokens=output_tokens,
+        )
 
-    User.objects.filter(id=user_id).update(
-        monthly_message_count=F("monthly_message_count") + 1
+    usage_buffer.record(
+        UsageEvent(
+            user_id=user_id,
+            model=model,
+            chat_id=chat_id,
+            message_id=message_id,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            total_tokens=tokens_used,
+            estimated_cost=estimated_cost,
+            was_cached=was_cached,
+        )
     )
 
+
+def rebuild_usage_rollups(*, since=None, batch_size: int = 1000) -> int:
+    """
+    Recompute hour and day rollups from ``UsageTracking`` rows.
+
+    Rollups from the start of the UTC day containing ``since`` onwards (or all of
+    them) are replaced in one transaction. Returns the number of rollup rows written.
+    """
+    from django.db import transaction
+    from django.db.models import Count, Q, Sum
+    from django.db.models.functions import TruncDay, TruncHour
+    from datetime import timezone as dt_timezone
+    from .models import UsageRollup, UsageTracking
+    from .usage import ROLLUP_GRANULARITIES, bucket_start
+
+    truncators = {"hour": TruncHour, "day": TruncDay}
+    records = UsageTracking.objects.all()
+    rollups = UsageRollup.objects.all()
+    if since is not None:
+        since = bucket_start(since, "day")
+        records = records.filter(created_at__gte=since)
+        rollups = rollups.filter(bucket_start__gte=since)
+
+    written = 0
+    with transaction.atomic():
+        rollups.delete()
+        for granularity in ROLLUP_GRANULARITIES:
+            buckets = (
+                records.annotate(
+                    bucket=truncators[granularity]("created_at", tzinfo=dt_timezone.utc)
+                )
+                .values("user_id", "model_used", "operation_type", "bucket")
+                .annotate(
+                    request_count=Count("id"),
+                    cached_count=Count("id", filter=Q(was_cached=True)),
+                    input_sum=Sum("input_tokens"),
+                    output_sum=Sum("output_tokens"),
+                    total_sum=Sum("total_tokens"),
+                    cost_sum=Sum("estimated_cost"),
+                )
+                .order_by()
+            )
+            pending = []
+            for row in buckets.iterator():
+                pending.append(
+                    UsageRollup(
+                        user_id=row["user_id"],
+                        model_used=row["model_used"],
+                        operation_type=row["operation_type"],
+                        granularity=granularity,
+                        bucket_start=row["bucket"],
+                        request_count=row["request_count"],
+                        cached_count=row["cached_count"],
+                        input_tokens=row["input_sum"] or 0,
+                        output_tokens=row["output_sum"] or 0,
+                        total_tokens=row["total_sum"] or 0,
+                        estimated_cost=row["cost_sum"] or 0,
+                    )
+                )
+                if len(pending) >= batch_size:
+                    UsageRollup.objects.bulk_create(pending)
+                    written += len(pending)
+                    pending = []
+            UsageRollup.objects.bulk_create(pending)
+            written += len(pending)
+
+    logger.info("Rebuilt %d usage rollup rows", written)
+    return written
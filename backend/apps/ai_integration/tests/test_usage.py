@@ -0,0 +1,106 @@
+import threading
+from decimal import Decimal
+
+import pytest
+
+from apps.ai_integration.models import UsageRollup, UsageTracking
+from apps.ai_integration.usage import UsageBuffer, UsageEvent
+from apps.authentication.models import User
+
+TIMEOUT = 5
+
+
+class RecordingBuffer(UsageBuffer):
+    """A buffer whose flushes are captured instead of written."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.batches: list[list[UsageEvent]] = []
+        self.written = threading.Event()
+
+    def _write(self, events):
+        self.batches.append(events)
+        self.written.set()
+
+
+def event(user_id="user-1", **fields) -> UsageEvent:
+    return UsageEvent(user_id=user_id, model="openai/gpt-4o-mini", **fields)
+
+
+def test_flushes_when_batch_size_is_reached():
+    buffer = RecordingBuffer(interval_ms=60_000, batch_size=3)
+    try:
+        buffer.record(event())
+        buffer.record(event())
+        assert not buffer.written.wait(0.2)
+
+        buffer.record(event())
+
+        assert buffer.written.wait(TIMEOUT)
+        assert [len(batch) for batch in buffer.batches] == [3]
+    finally:
+        buffer.shutdown()
+
+
+def test_flushes_every_interval():
+    buffer = RecordingBuffer(interval_ms=50, batch_size=100)
+    try:
+        buffer.record(event())
+
+        assert buffer.written.wait(TIMEOUT)
+        assert [len(batch) for batch in buffer.batches] == [1]
+    finally:
+        buffer.shutdown()
+
+
+def test_flushes_pending_events_at_exit():
+    buffer = RecordingBuffer(interval_ms=60_000, batch_size=100)
+    buffer.record(event())
+    buffer.record(event())
+
+    buffer.shutdown()
+
+    assert sum(len(batch) for batch in buffer.batches) == 2
+    assert not buffer._thread.is_alive()
+    assert buffer.flush() == 0
+
+
+def test_disabled_buffer_writes_each_event_immediately():
+    buffer = RecordingBuffer(interval_ms=60_000, batch_size=100, enabled=False)
+
+    buffer.record(event())
+
+    assert [len(batch) for batch in buffer.batches] == [1]
+    assert buffer._thread is None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_flush_writes_records_rollups_and_message_counts():
+    user = User.objects.create_user(
+        email="counter@example.com", first_name="Ada", last_name="Lovelace"
+    )
+    buffer = UsageBuffer(interval_ms=60_000, batch_size=100)
+    for cost in ("0.001", "0.002"):
+        buffer.record(
+            event(
+                str(user.id),
+                input_tokens=100,
+                output_tokens=50,
+                total_tokens=150,
+                estimated_cost=Decimal(cost),
+            )
+        )
+    buffer.record(event(str(user.id), operation_type="memory", counts_as_message=False))
+
+    assert buffer.flush() == 3
+    buffer.shutdown()
+
+    assert UsageTracking.objects.filter(user=user).count() == 3
+    hourly = UsageRollup.objects.get(
+        user=user, granularity="hour", operation_type="chat"
+    )
+    assert hourly.request_count == 2
+    assert hourly.total_tokens == 300
+    assert hourly.estimated_cost == Decimal("0.003")
+    user.refresh_from_db()
+    assert user.monthly_message_count == 2
@@ -0,0 +1,252 @@
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from typing import Any
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_GRANULARITIES = ("hour", "day")
+ROLLUP_COUNTERS = (
+    "request_count",
+    "cached_count",
+    "input_tokens",
+    "output_tokens",
+    "total_tokens",
+    "estimated_cost",
+)
+
+
+@dataclass
+class UsageEvent:
+    user_id: str
+    model: str
+    operation_type: str = "chat"
+    chat_id: str | None = None
+    message_id: str | None = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    total_tokens: int = 0
+    estimated_cost: Decimal = Decimal("0")
+    response_time_ms: int = 0
+    was_cached: bool = False
+    counts_as_message: bool = True
+    recorded_at: datetime = field(default_factory=timezone.now)
+
+
+class UsageBuffer:
+    """
+    In-process buffer for usage events, drained by a background writer thread.
+
+    Events are written with one ``bulk_create``, one counter UPDATE and the
+    matching rollup increments per flush,
+    either every ``USAGE_FLUSH_INTERVAL_MS`` or as soon as ``USAGE_FLUSH_BATCH_SIZE``
+    events are pending, and once more when the process exits.
+    """
+
+    def __init__(self, *, interval_ms: int, batch_size: int, enabled: bool = True):
+        self.interval = interval_ms / 1000
+        self.batch_size = batch_size
+        self.enabled = enabled
+        self._pending: list[UsageEvent] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def record(self, event: UsageEvent) -> None:
+        if not self.enabled:
+            self._write([event])
+            return
+
+        with self._lock:
+            self._pending.append(event)
+            pending = len(self._pending)
+            self._ensure_writer()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """Write every pending event now; returns how many were written."""
+        with self._flush_lock:
+            with self._lock:
+                events, self._pending = self._pending, []
+            if events:
+                self._write(events)
+            return len(events)
+
+    def shutdown(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=max(self.interval * 2, 1))
+        self.flush()
+
+    def _ensure_writer(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="usage-writer", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        from django.db import close_old_connections
+
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception as exc:  # pragma: no cover - keep the writer alive
+                logger.error("Usage flush failed: %s", exc)
+        close_old_connections()
+
+    def _write(self, events: list[UsageEvent]) -> None:
+        from django.db import transaction
+        from .models import UsageTracking
+
+        records = [
+            UsageTracking(
+                user_id=event.user_id,
+                chat_id=event.chat_id,
+                message_id=event.message_id,
+                model_used=event.model,
+                operation_type=event.operation_type,
+                input_tokens=event.input_tokens,
+                output_tokens=event.output_tokens,
+                total_tokens=event.total_tokens,
+                estimated_cost=event.estimated_cost,
+                response_time_ms=event.response_time_ms,
+                was_cached=event.was_cached,
+                created_at=event.recorded_at,
+            )
+            for event in events
+        ]
+        message_counts = Counter(
+            event.user_id for event in events if event.counts_as_message
+        )
+
+        with transaction.atomic():
+            UsageTracking.objects.bulk_create(records)
+            if message_counts:
+                self._sync_message_counts(message_counts)
+            apply_rollups(rollup_totals(events))
+        logger.debug("Flushed %d usage events", len(events))
+
+    @staticmethod
+    def _sync_message_counts(message_counts: Counter) -> None:
+        """
+        Copy the cached quota counters onto ``User.monthly_message_count``.
+
+        Users whose counter has left the cache fall back to adding this batch,
+        or to starting over when their stored count is from an earlier month.
+        """
+        from django.db.models import Case, F, IntegerField, Value, When
+        from apps.authentication.models import User
+        from shared.cache import MessageQuota
+
+        period = MessageQuota.current_period()
+        try:
+            cached = MessageQuota.counts_for(message_counts, period)
+        except Exception as exc:
+            logger.warning("Could not read quota counters: %s", exc)
+            cached = {}
+
+        whens = []
+        for user_id, count in message_counts.items():
+            if user_id in cached:
+                whens.append(When(id=user_id, then=Value(cached[user_id])))
+            else:
+                whens.append(
+                    When(
+                        id=user_id,
+                        quota_period=period,
+                        then=F("monthly_message_count") + count,
+                    )
+                )
+                whens.append(When(id=user_id, then=Value(count)))
+        User.objects.filter(id__in=list(message_counts)).update(
+            monthly_message_count=Case(
+                *whens,
+                default=F("monthly_message_count"),
+                output_field=IntegerField(),
+            ),
+            quota_period=period,
+        )
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    """Start of the UTC hour or day containing ``moment``."""
+    moment = moment.astimezone(dt_timezone.utc).replace(
+        minute=0, second=0, microsecond=0
+    )
+    if granularity == "day":
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def rollup_totals(events: list[UsageEvent]) -> dict[tuple, dict[str, Any]]:
+    """Sum events per (user, model, operation, granularity, bucket)."""
+    totals: dict[tuple, dict[str, Any]] = defaultdict(
+        lambda: dict.fromkeys(ROLLUP_COUNTERS, 0)
+    )
+    for event in events:
+        for granularity in ROLLUP_GRANULARITIES:
+            key = (
+                event.user_id,
+                event.model,
+                event.operation_type,
+                granularity,
+                bucket_start(event.recorded_at, granularity),
+            )
+            bucket = totals[key]
+            bucket["request_count"] += 1
+            bucket["cached_count"] += int(event.was_cached)
+            bucket["input_tokens"] += event.input_tokens
+            bucket["output_tokens"] += event.output_tokens
+            bucket["total_tokens"] += event.total_tokens
+            bucket["estimated_cost"] += event.estimated_cost
+    return totals
+
+
+def apply_rollups(totals: dict[tuple, dict[str, Any]]) -> None:
+    """Add ``totals`` onto the rollup rows, creating missing buckets first."""
+    from django.db.models import F
+    from .models import UsageRollup
+
+    def _bucket_filter(key: tuple) -> dict[str, Any]:
+        user_id, model, operation_type, granularity, start = key
+        return {
+            "user_id": user_id,
+            "model_used": model,
+            "operation_type": operation_type,
+            "granularity": granularity,
+            "bucket_start": start,
+        }
+
+    UsageRollup.objects.bulk_create(
+        [UsageRollup(**_bucket_filter(key)) for key in totals],
+        ignore_conflicts=True,
+    )
+    for key, counters in totals.items():
+        UsageRollup.objects.filter(**_bucket_filter(key)).update(
+            **{name: F(name) + value for name, value in counters.items()},
+            updated_at=timezone.now(),
+        )
+
+
+usage_buffer = UsageBuffer(
+    interval_ms=getattr(settings, "USAGE_FLUSH_INTERVAL_MS", 500),
+    batch_size=getattr(settings, "USAGE_FLUSH_BATCH_SIZE", 100),
+    enabled=getattr(settings, "USAGE_BUFFER_ENABLED", True),
+)
+atexit.register(usage_buffer.shutdown)
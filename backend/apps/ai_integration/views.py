@@ -0,0 +1,102 @@
+from datetime import timedelta
+from decimal import Decimal
+from typing import List, Literal
+
+from asgiref.sync import sync_to_async
+from django.db.models import Sum
+from django.utils import timezone
+from ninja import Router
+from ninja.pagination import PageNumberPagination, paginate
+
+from apps.authentication.views import auth_bearer_instance
+
+from .models import UsageRollup, UsageTracking
+from .schemas import (
+    ModelCostSchema,
+    UsageCostSummary,
+    UsageRecordSchema,
+    UsageRollupSchema,
+)
+from .usage import bucket_start
+
+usage_router = Router(tags=["Usage"])
+
+MAX_HISTORY_DAYS = 366
+COST_QUANTUM = Decimal("0.000001")
+
+
+def _window_start(days: int, granularity: str = "day"):
+    days = max(1, min(days, MAX_HISTORY_DAYS))
+    return bucket_start(timezone.now() - timedelta(days=days - 1), granularity)
+
+
+@usage_router.get(
+    "/history", response=List[UsageRecordSchema], auth=auth_bearer_instance
+)
+@paginate(PageNumberPagination, page_size=50)
+async def usage_history(request, model: str | None = None, days: int = 30):
+    """Individual usage records for the current user, newest first."""
+    records = UsageTracking.objects.filter(
+        user=request.auth, created_at__gte=_window_start(days)
+    ).order_by("-created_at")
+    if model:
+        records = records.filter(model_used=model)
+    return records
+
+
+@usage_router.get(
+    "/rollups", response=List[UsageRollupSchema], auth=auth_bearer_instance
+)
+async def usage_rollups(
+    request,
+    granularity: Literal["hour", "day"] = "day",
+    days: int = 30,
+    model: str | None = None,
+):
+    """Pre-aggregated usage buckets for charts, oldest first."""
+    rollups = UsageRollup.objects.filter(
+        user=request.auth,
+        granularity=granularity,
+        bucket_start__gte=_window_start(days, granularity),
+    ).order_by("bucket_start", "model_used", "operation_type")
+    if model:
+        rollups = rollups.filter(model_used=model)
+    return [rollup async for rollup in rollups]
+
+
+@usage_router.get("/cost", response=UsageCostSummary, auth=auth_bearer_instance)
+async def usage_cost(request, days: int = 30):
+    """Spend and token totals per model over the last ``days`` days."""
+    since = _window_start(days)
+
+    def _summarize():
+        per_model = list(
+            UsageRollup.objects.filter(
+                user=request.auth, granularity="day", bucket_start__gte=since
+            )
+            .values("model_used")
+            .annotate(
+                requests=Sum("request_count"),
+                tokens=Sum("total_tokens"),
+                cost=Sum("estimated_cost"),
+            )
+            .order_by("-cost")
+        )
+        return [
+            ModelCostSchema(
+                model_used=row["model_used"],
+                request_count=row["requests"] or 0,
+                total_tokens=row["tokens"] or 0,
+                estimated_cost=(row["cost"] or Decimal("0")).quantize(COST_QUANTUM),
+            )
+            for row in per_model
+        ]
+
+    by_model = await sync_to_async(_summarize, thread_sensitive=True)()
+    return UsageCostSummary(
+        since=since,
+        request_count=sum(item.request_count for item in by_model),
+        total_tokens=sum(item.total_tokens for item in by_model),
+        estimated_cost=sum((item.estimated_cost for item in by_model), Decimal("0")),
+        by_model=by_model,
+    )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from apps.authentication.models import User
+from shared.cache import MessageQuota
+from shared.utils import chunked
+
+
+class Command(BaseCommand):
+    help = (
+        "Zero monthly message counters left over from earlier billing months. "
+        "Quota checks already treat them as zero, so this only tidies stored data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        period = MessageQuota.current_period()
+        stale = User.objects.filter(monthly_message_count__gt=0).exclude(
+            quota_period=period
+        )
+        user_ids = list(stale.values_list("id", flat=True))
+
+        reset = 0
+        for batch in chunked(user_ids, options["batch_size"]):
+            # Re-check the period so users who sent meanwhile keep their count
+            reset += (
+                User.objects.filter(id__in=batch)
+                .exclude(quota_period=period)
+                .update(monthly_message_count=0, quota_period=period)
+            )
+        self.stdout.write(self.style.SUCCESS(f"Reset {reset} stale counter(s)"))
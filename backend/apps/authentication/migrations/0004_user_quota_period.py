@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:27
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def stamp_current_period(apps, schema_editor):
+    # Existing counters were accumulated this month; keep them instead of resetting
+    User = apps.get_model("authentication", "User")
+    User.objects.filter(monthly_message_count__gt=0).update(
+        quota_period=timezone.now().strftime("%Y%m")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0003_remove_user_shared_memory_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="quota_period",
+            field=models.CharField(blank=True, default="", max_length=6),
+        ),
+        migrations.RunPython(stamp_current_period, migrations.RunPython.noop),
+    ]
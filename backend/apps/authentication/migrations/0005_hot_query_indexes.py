@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:33
+
+from django.db import migrations, models
+
+from shared.db import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("authentication", "0004_user_quota_period"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="usersession",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["user", "expires_at"],
+                name="auth_session_user_active_idx",
+            ),
+        ),
+    ]
@@ -3,9 +3,13 @@ from typing import Any
 
 from django.contrib.auth.base_user import AbstractBaseUser, BaseUserManager
 from django.contrib.auth.models import PermissionsMixin
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 
+from shared.cache import AuthUserCache
+
 
 class UserManager(BaseUserManager):
     use_in_migrations = True
@@ -74,6 +78,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     )
     monthly_message_count = models.PositiveIntegerField(default=0)
     monthly_message_limit = models.PositiveIntegerField(default=50)
+    # Billing month (YYYYMM) monthly_message_count belongs to; older means zero
+    quota_period = models.CharField(max_length=6, blank=True, default="")
 
     preferred_language = models.CharField(max_length=10, default="en")
     preferred_model = models.CharField(max_length=50, default="gpt-4o-mini")
@@ -103,6 +109,14 @@ class User(AbstractBaseUser, PermissionsMixin):
         self.save(update_fields=["last_login_at"])
 
 
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def _invalidate_auth_user(sender, instance, **kwargs):
+    # After commit, so the next cache fill reads the new row
+    user_id = instance.id
+    transaction.on_commit(lambda: AuthUserCache.invalidate(user_id))
+
+
 class UserSession(models.Model):
     """Track user sessions for security."""
 
@@ -119,6 +133,14 @@ class UserSession(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Refresh and revocation only ever look at a user's live sessions
+            models.Index(
+                fields=["user", "expires_at"],
+                name="auth_session_user_active_idx",
+                condition=models.Q(is_active=True),
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"Session {self.session_id} for {self.user_id}"
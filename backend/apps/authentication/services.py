@@ -12,6 +12,8 @@ from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 from google_auth_oauthlib.flow import Flow
 
+from shared.cache import AuthUserCache
+
 from .models import User, UserSession
 
 logger = logging.getLogger(__name__)
@@ -235,3 +237,46 @@ class UserSessionService:
             UserSession.objects.filter(session_id=session_id).update(is_active=False)
 
         await sync_to_async(_invalidate, thread_sensitive=True)()
+
+
+class AuthUserService:
+    """Loads the user behind an access token through ``AuthUserCache``.
+
+    The password hash is never cached; instances built from a cached row leave
+    it deferred, and saving such an instance only writes the loaded fields.
+    """
+
+    FIELDS = [
+        field for field in User._meta.concrete_fields if field.attname != "password"
+    ]
+
+    @staticmethod
+    def _cacheable(value: Any) -> Any:
+        # The cache's JSON encoder would cut datetimes to milliseconds
+        return value.isoformat() if isinstance(value, datetime) else value
+
+    @classmethod
+    def _row(cls, user: User) -> dict:
+        return {
+            field.attname: cls._cacheable(getattr(user, field.attname))
+            for field in cls.FIELDS
+        }
+
+    @classmethod
+    def _instance(cls, row: dict) -> User:
+        # The default cache stores JSON, so ids and timestamps come back as strings
+        return User.from_db(
+            "default",
+            [field.attname for field in cls.FIELDS],
+            [field.to_python(row[field.attname]) for field in cls.FIELDS],
+        )
+
+    @classmethod
+    async def get_user(cls, user_id) -> User:
+        """The user with ``user_id``; raises ``User.DoesNotExist``."""
+        row = AuthUserCache.get(user_id)
+        if row is not None:
+            return cls._instance(row)
+        user = await User.objects.aget(id=user_id)
+        AuthUserCache.store(user_id, cls._row(user))
+        return user
@@ -0,0 +1,109 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.authentication.models import User
+from apps.authentication.services import AuthUserService, JWTService
+from shared.cache import AuthUserCache
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    AuthUserCache._local.clear()
+    for alias in ("default", "rate_limiting"):
+        caches[alias].clear()
+    yield
+    AuthUserCache._local.clear()
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(
+        email="reader@example.com", first_name="Ada", last_name="Lovelace"
+    )
+
+
+def get_user(user_id) -> User:
+    return async_to_sync(AuthUserService.get_user)(user_id)
+
+
+def me(client, user):
+    token = JWTService.generate_tokens(user)["access"]
+    return client.get("/api/v1/auth/me", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+
+def test_warm_cache_authenticates_without_queries(client, user):
+    assert me(client, user).status_code == 200
+
+    with CaptureQueriesContext(connection) as context:
+        response = me(client, user)
+
+    assert response.status_code == 200
+    assert response.json()["email"] == "reader@example.com"
+    assert context.captured_queries == []
+
+
+def test_shared_cache_fills_new_processes_without_queries(user):
+    get_user(user.id)
+    # Another worker: nothing in its local tier, the shared cache is warm
+    AuthUserCache._local.clear()
+
+    with CaptureQueriesContext(connection) as context:
+        cached = get_user(user.id)
+
+    assert context.captured_queries == []
+    assert cached.pk == user.pk
+    assert cached.email == user.email
+
+
+def test_saving_the_user_forces_a_reread(user):
+    get_user(user.id)
+
+    user.first_name = "Grace"
+    user.save()
+
+    with CaptureQueriesContext(connection) as context:
+        reread = get_user(user.id)
+    assert len(context.captured_queries) == 1
+    assert reread.first_name == "Grace"
+
+
+def test_deactivated_user_is_rejected_after_invalidation(client, user):
+    assert me(client, user).status_code == 200
+
+    user.is_active = False
+    user.save(update_fields=["is_active"])
+
+    assert me(client, user).status_code == 401
+
+
+def test_deleted_user_is_rejected_after_invalidation(client, user):
+    assert me(client, user).status_code == 200
+
+    User.objects.filter(pk=user.pk).delete()
+
+    assert me(client, user).status_code == 401
+
+
+def test_cached_row_leaves_out_the_password_and_survives_json(user):
+    user.set_password("correct horse battery staple")
+    user.save()
+    get_user(user.id)
+
+    row = AuthUserCache.get(user.id)
+    assert "password" not in row
+
+    # The production cache serializes to JSON
+    row = json.loads(json.dumps(row, cls=DjangoJSONEncoder))
+    cached = AuthUserService._instance(row)
+
+    assert "password" in cached.get_deferred_fields()
+    for field in AuthUserService.FIELDS:
+        assert getattr(cached, field.attname) == getattr(user, field.attname)
@@ -1,6 +1,5 @@
 import json
 import logging
-from datetime import datetime
 from uuid import UUID
 
 from django.conf import settings
@@ -10,6 +9,8 @@ from ninja import Router
 from ninja.errors import HttpError
 from ninja.security import HttpBearer
 
+from shared.renderers import dumps
+
 from .models import User, UserSession
 from .schemas import (
     AuthResponse,
@@ -19,6 +20,7 @@ from .schemas import (
     UserProfileResponse,
 )
 from .services import (
+    AuthUserService,
     GoogleOAuthError,
     GoogleOAuthService,
     InvalidTokenError,
@@ -30,15 +32,6 @@ from .utils import get_client_ip, get_user_agent
 
 logger = logging.getLogger(__name__)
 
-# Custom JSON encoder to handle datetime and UUID objects
-class DateTimeEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        elif isinstance(obj, UUID):
-            return str(obj)
-        return super().default(obj)
-
 auth_router = Router(tags=["Authentication"])
 
 
@@ -71,9 +64,13 @@ class AuthBearer(HttpBearer):
             payload = JWTService.decode_token(token)
             user_id = payload["user_id"]
 
-            user = await User.objects.aget(id=user_id)
+            user = await AuthUserService.get_user(user_id)
+            if not user.is_active:
+                raise HttpError(401, "User account is disabled")
             return user
 
+        except HttpError:
+            raise
         except InvalidTokenError as exc:
             logger.warning("Invalid token provided")
             raise HttpError(401, "Invalid token")
@@ -115,8 +112,8 @@ async def google_oauth(request, data: GoogleOAuthRequest):
             "expires_in": settings.JWT_ACCESS_TOKEN_LIFETIME.total_seconds(),
         }
 
-        # Create JSON response with cookies using custom encoder for UUID handling
-        response_obj = HttpResponse(json.dumps(auth_data, cls=DateTimeEncoder), content_type='application/json')
+        # Create JSON response with cookies
+        response_obj = HttpResponse(dumps(auth_data), content_type='application/json')
         response_obj.set_cookie(
             'chatgpt_auth',
             tokens["access"],
@@ -182,7 +179,7 @@ async def refresh_token(request, data: TokenRefreshRequest = None):
         }
 
         # Create JSON response with cookies for refresh endpoint too
-        response_obj = HttpResponse(json.dumps(auth_data, cls=DateTimeEncoder), content_type='application/json')
+        response_obj = HttpResponse(dumps(auth_data), content_type='application/json')
         response_obj.set_cookie(
             'chatgpt_auth',
             tokens["access"],
@@ -261,7 +258,7 @@ def _success_response(tokens: dict, user: User) -> HttpResponse:
 
     target_origin = json.dumps(_get_frontend_origin())
 
-    payload_json = json.dumps(payload, cls=DateTimeEncoder)
+    payload_json = dumps(payload).decode()
 
     html = f"""<!DOCTYPE html>
 <html>
@@ -0,0 +1,181 @@
+"""Cold storage for the messages of inactive chats.
+
+``archive_chat`` moves every message and attachment row of a chat into one
+compressed ``ChatArchive`` blob and deletes them from the hot tables, so
+``chats_message`` and its indexes only hold conversations that are in use.
+The chat row itself stays, with its counters, and ``Chat.cold_archived_at``
+marks it as cold.
+
+``rehydrate_chat`` reverses this on first access. The rows come back with
+their original ids and timestamps, so cursors, ETags and share links made
+before archival keep working.
+"""
+
+import gzip
+from typing import Iterator, Optional
+
+import orjson
+from django.db import transaction
+from django.db.models import Case, UUIDField, Value, When
+from django.utils import timezone
+
+from apps.ai_integration.models import UsageTracking
+from shared.cache import ConversationContextCache
+from shared.utils import chunked
+
+from .importer import insert_rows
+from .models import Chat, ChatArchive, Message, MessageAttachment
+
+ARCHIVE_FORMAT_VERSION = 1
+# Replies still being generated would lose their chunk log
+UNFINISHED_STATUSES = ("pending", "processing")
+
+_MESSAGE_FIELDS = [
+    field for field in Message._meta.concrete_fields if field.name != "chat"
+]
+_ATTACHMENT_FIELDS = list(MessageAttachment._meta.concrete_fields)
+
+
+def _row(instance, fields) -> dict:
+    return {field.attname: getattr(instance, field.attname) for field in fields}
+
+
+def _instance(model, fields, row: dict, **extra):
+    values = {field.attname: field.to_python(row[field.attname]) for field in fields}
+    return model(**values, **extra)
+
+
+def load_archive(archive: ChatArchive) -> dict:
+    return orjson.loads(gzip.decompress(bytes(archive.body)))
+
+
+def archived_messages(archive: ChatArchive) -> Iterator[Message]:
+    """Unsaved ``Message`` instances from ``archive``, oldest first.
+
+    Attachments are attached as a prefetch, so the bulk serializers can render
+    them without touching the database.
+    """
+    payload = load_archive(archive)
+    attachments: dict = {}
+    for row in payload["attachments"]:
+        attachment = _instance(MessageAttachment, _ATTACHMENT_FIELDS, row)
+        attachments.setdefault(str(attachment.message_id), []).append(attachment)
+    for row in payload["messages"]:
+        message = _instance(Message, _MESSAGE_FIELDS, row, chat_id=archive.chat_id)
+        message._prefetched_objects_cache = {
+            "attachments": attachments.get(str(message.id), [])
+        }
+        yield message
+
+
+def archive_chat(chat_id) -> Optional[int]:
+    """Move a chat's messages into cold storage; returns the count, or None if skipped.
+
+    Chats that are already cold or still have a reply in flight are skipped.
+    """
+    with transaction.atomic():
+        chat = (
+            Chat.objects.select_for_update()
+            .filter(id=chat_id, cold_archived_at__isnull=True)
+            .first()
+        )
+        if chat is None:
+            return None
+        messages = Message.objects.filter(chat_id=chat_id)
+        if messages.filter(status__in=UNFINISHED_STATUSES).exists():
+            return None
+
+        message_rows = [
+            _row(message, _MESSAGE_FIELDS)
+            for message in messages.order_by("created_at", "id").iterator()
+        ]
+        attachment_rows = [
+            _row(attachment, _ATTACHMENT_FIELDS)
+            for attachment in MessageAttachment.objects.filter(
+                message__chat_id=chat_id
+            ).iterator()
+        ]
+        usage = UsageTracking.objects.filter(message__chat_id=chat_id)
+        usage_links = list(usage.values_list("id", "message_id"))
+        payload = {
+            "version": ARCHIVE_FORMAT_VERSION,
+            "active_leaf": chat.active_leaf_id,
+            "messages": message_rows,
+            "attachments": attachment_rows,
+            "usage": usage_links,
+        }
+        ChatArchive.objects.create(
+            chat=chat,
+            body=gzip.compress(orjson.dumps(payload, option=orjson.OPT_UTC_Z)),
+            message_count=len(message_rows),
+        )
+
+        # Usage records outlive the rows they point at and are relinked later
+        usage.update(message=None)
+        Chat.objects.filter(id=chat_id).update(
+            active_leaf=None, cold_archived_at=timezone.now()
+        )
+        MessageAttachment.objects.filter(message__chat_id=chat_id).delete()
+        messages.delete()
+
+    ConversationContextCache.invalidate(chat_id)
+    return len(message_rows)
+
+
+def rehydrate_chat(chat_id, *, batch_size: int = 1000) -> bool:
+    """Restore a cold chat's messages into the hot tables; False if it was not cold."""
+    with transaction.atomic():
+        chat = (
+            Chat.objects.select_for_update()
+            .filter(id=chat_id, cold_archived_at__isnull=False)
+            .first()
+        )
+        if chat is None:
+            return False
+        archive = ChatArchive.objects.get(chat_id=chat_id)
+        payload = load_archive(archive)
+
+        insert_rows(
+            Message,
+            [
+                _instance(Message, _MESSAGE_FIELDS, row, chat_id=chat_id)
+                for row in payload["messages"]
+            ],
+            batch_size=batch_size,
+        )
+        insert_rows(
+            MessageAttachment,
+            [
+                _instance(MessageAttachment, _ATTACHMENT_FIELDS, row)
+                for row in payload["attachments"]
+            ],
+            batch_size=batch_size,
+        )
+        for links in chunked(payload["usage"], batch_size):
+            usage_ids = [usage_id for usage_id, _message_id in links]
+            UsageTracking.objects.filter(id__in=usage_ids).update(
+                message_id=Case(
+                    *[
+                        When(
+                            id=usage_id,
+                            then=Value(message_id, output_field=UUIDField()),
+                        )
+                        for usage_id, message_id in links
+                    ]
+                )
+            )
+        Chat.objects.filter(id=chat_id).update(
+            active_leaf_id=payload["active_leaf"], cold_archived_at=None
+        )
+        archive.delete()
+    return True
+
+
+def inactive_chat_ids(*, inactive_since, limit: Optional[int] = None) -> list:
+    chats = (
+        Chat.objects.filter(cold_archived_at__isnull=True, message_count__gt=0)
+        .filter(last_message_at__lt=inactive_since)
+        .order_by("last_message_at")
+        .values_list("id", flat=True)
+    )
+    return list(chats[:limit] if limit else chats)
@@ -0,0 +1,78 @@
+"""NDJSON export of a user's chats.
+
+The output is one JSON object per line. Each chat appears as a ``chat`` record
+followed by its ``message`` records, oldest first. A final ``summary`` record
+carries the counts, so a truncated download can be detected.
+
+Chats and messages are read through two server-side cursors
+(``iterator(chunk_size=...)``) that are walked in step, both ordered by chat
+id. Memory stays at one chunk of each, however long the history is. Chats in
+cold storage are read from their archive blob instead.
+"""
+
+from typing import Iterator, Optional
+
+import orjson
+from django.utils import timezone
+
+from shared.renderers import dumps
+
+from .archive import archived_messages
+from .models import Chat, ChatArchive, Message
+from .serializers import chat_payload, message_payload
+
+EXPORT_CONTENT_TYPE = "application/x-ndjson"
+EXPORT_CHUNK_SIZE = 500
+
+
+def _line(record_type: str, payload: dict) -> bytes:
+    return dumps({"type": record_type, **payload}, option=orjson.OPT_APPEND_NEWLINE)
+
+
+def export_chats(
+    user_id,
+    *,
+    chat_id: Optional[str] = None,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Yield NDJSON lines for every chat of ``user_id``, or only ``chat_id``."""
+    chats = Chat.objects.filter(user_id=user_id)
+    messages = Message.objects.filter(chat__user_id=user_id)
+    if chat_id is not None:
+        chats = chats.filter(id=chat_id)
+        messages = messages.filter(chat_id=chat_id)
+
+    message_rows = (
+        messages.order_by("chat_id", "created_at", "id")
+        .prefetch_related("attachments")
+        .iterator(chunk_size=chunk_size)
+    )
+    pending = next(message_rows, None)
+    chat_count = message_count = 0
+
+    for chat in chats.order_by("id").iterator(chunk_size=chunk_size):
+        # Messages of a chat created after the chat cursor opened have no header
+        while pending is not None and pending.chat_id < chat.id:
+            pending = next(message_rows, None)
+
+        yield _line("chat", chat_payload(chat))
+        chat_count += 1
+        if chat.cold_archived_at is not None:
+            # Exported straight from the blob; an export must not rehydrate
+            archive = ChatArchive.objects.filter(chat_id=chat.id).first()
+            for message in archived_messages(archive) if archive else ():
+                yield _line("message", message_payload(message))
+                message_count += 1
+        while pending is not None and pending.chat_id == chat.id:
+            yield _line("message", message_payload(pending))
+            message_count += 1
+            pending = next(message_rows, None)
+
+    yield _line(
+        "summary",
+        {
+            "chats": chat_count,
+            "messages": message_count,
+            "exported_at": timezone.now(),
+        },
+    )
@@ -0,0 +1,315 @@
+"""Bulk import of chat histories in the NDJSON export format.
+
+Input is the stream written by ``apps.chats.export``. It is one JSON object per
+line: a ``chat`` record followed by its ``message`` records, oldest first.
+Exports from other assistants can be converted to these lines; message records
+without ``id``/``parent_message`` are chained linearly in the order they appear.
+
+Lines are parsed one at a time and rows are written in batches (COPY on
+PostgreSQL, ``bulk_create`` elsewhere). Chat counters and the active leaf are
+tallied in memory and written once per chat at the end, and the user's caches
+are invalidated once when the import commits.
+"""
+
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from typing import Iterable, NamedTuple, Optional
+
+import orjson
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from shared.cache import CacheService
+from shared.exceptions import ChatImportError
+
+from .models import Chat, Message, MessageAttachment
+from .services import _attachment_fields
+
+IMPORT_BATCH_SIZE = 2000
+
+CHAT_IMPORT_FIELDS = (
+    "title",
+    "is_title_generated",
+    "model_used",
+    "system_prompt",
+    "temperature",
+    "max_tokens",
+    "is_archived",
+    "is_pinned",
+)
+MESSAGE_IMPORT_FIELDS = (
+    "raw_content",
+    "model_used",
+    "prompt_tokens",
+    "completion_tokens",
+    "total_tokens",
+    "cached_tokens",
+    "error_message",
+    "user_rating",
+    "is_regenerated",
+    "regeneration_count",
+)
+ROLES = {value for value, _label in Message.ROLE_CHOICES}
+STATUSES = {value for value, _label in Message.STATUS_CHOICES}
+# Nothing will ever finish a reply that was in flight when it was exported
+IN_FLIGHT_STATUSES = {"pending", "processing"}
+
+
+@dataclass
+class ImportResult:
+    chats: int = 0
+    messages: int = 0
+    attachments: int = 0
+
+
+class _Node(NamedTuple):
+    id: uuid.UUID
+    thread_id: uuid.UUID
+    depth: int
+    branch_path: str
+
+
+@dataclass
+class _ChatState:
+    chat: Chat
+    # Exported ids -> nodes of the rows created for them
+    nodes: dict = field(default_factory=dict)
+    threads: dict = field(default_factory=dict)
+    taken: set = field(default_factory=set)
+    previous: Optional[_Node] = None
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ChatImportError(f"invalid timestamp {value!r}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+class ChatImporter:
+    """Import chat histories for ``user``; call ``run`` with an iterable of lines."""
+
+    def __init__(self, user, *, batch_size: int = IMPORT_BATCH_SIZE) -> None:
+        self.user = user
+        self.batch_size = batch_size
+        self.result = ImportResult()
+        self._chats: list[Chat] = []
+        self._messages: list[Message] = []
+        self._attachments: list[MessageAttachment] = []
+        self._imported: list[Chat] = []
+        self._current: Optional[_ChatState] = None
+
+    def run(self, lines: Iterable) -> ImportResult:
+        with transaction.atomic():
+            for number, line in enumerate(lines, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    self._add_record(orjson.loads(line))
+                except orjson.JSONDecodeError as exc:
+                    raise ChatImportError(f"Line {number}: invalid JSON ({exc})")
+                except KeyError as exc:
+                    raise ChatImportError(f"Line {number}: missing field {exc}")
+                except (ChatImportError, TypeError, ValueError, ArithmeticError) as exc:
+                    raise ChatImportError(f"Line {number}: {exc}")
+                if len(self._messages) >= self.batch_size:
+                    self._flush()
+            self._flush()
+            self._fix_up_chats()
+
+            user_id = str(self.user.id)
+            transaction.on_commit(lambda: CacheService.invalidate_user_cache(user_id))
+        return self.result
+
+    def _add_record(self, record) -> None:
+        if not isinstance(record, dict):
+            raise ChatImportError("expected a JSON object")
+        record_type = record.get("type")
+        if record_type == "chat":
+            self._add_chat(record)
+        elif record_type == "message":
+            self._add_message(record)
+        elif record_type != "summary":
+            raise ChatImportError(f"unknown record type {record_type!r}")
+
+    def _add_chat(self, record: dict) -> None:
+        created_at = _parse_timestamp(record.get("created_at")) or timezone.now()
+        chat = Chat(
+            id=uuid.uuid4(),
+            user=self.user,
+            estimated_cost=Decimal(str(record.get("estimated_cost") or 0)),
+            created_at=created_at,
+            updated_at=_parse_timestamp(record.get("updated_at")) or created_at,
+            **{name: record[name] for name in CHAT_IMPORT_FIELDS if name in record},
+        )
+        chat.title = (chat.title or "")[:255]
+        self._chats.append(chat)
+        self._imported.append(chat)
+        self._current = _ChatState(chat=chat)
+        self.result.chats += 1
+
+    @staticmethod
+    def _place(
+        state: _ChatState, record: dict
+    ) -> tuple[Optional[_Node], uuid.UUID, int]:
+        """Parent node, thread and depth for a message, following the exported tree."""
+        if "parent_message" not in record:
+            parent = state.previous
+        elif record["parent_message"] is None:
+            parent = None
+        else:
+            parent = state.nodes.get(record["parent_message"])
+            if parent is None:
+                raise ChatImportError(
+                    f"parent message {record['parent_message']} is not in this chat"
+                )
+
+        exported_thread = record.get("thread_id")
+        if exported_thread:
+            thread_id = state.threads.setdefault(exported_thread, uuid.uuid4())
+        else:
+            thread_id = parent.thread_id if parent else uuid.uuid4()
+        depth = parent.depth + 1 if parent else 0
+        if (thread_id, depth) in state.taken:
+            # Inconsistent source tree; fork instead of violating the unique key
+            thread_id = uuid.uuid4()
+        return parent, thread_id, depth
+
+    def _add_message(self, record: dict) -> None:
+        state = self._current
+        if state is None:
+            raise ChatImportError("message record before any chat record")
+        role = record["role"]
+        if role not in ROLES:
+            raise ChatImportError(f"unknown role {role!r}")
+        status = record.get("status") or "completed"
+        if status not in STATUSES:
+            raise ChatImportError(f"unknown status {status!r}")
+        if status in IN_FLIGHT_STATUSES:
+            status = "cancelled"
+
+        parent, thread_id, depth = self._place(state, record)
+        branch_path = ""
+        if parent is not None:
+            branch_path = parent.branch_path
+            if thread_id != parent.thread_id:
+                branch_path += f"{parent.thread_id.hex}:{parent.depth}/"
+
+        created_at = _parse_timestamp(record.get("created_at")) or timezone.now()
+        message = Message(
+            id=uuid.uuid4(),
+            chat_id=state.chat.id,
+            role=role,
+            content=record.get("content") or "",
+            status=status,
+            parent_message_id=parent.id if parent else None,
+            thread_id=thread_id,
+            depth=depth,
+            branch_path=branch_path,
+            created_at=created_at,
+            updated_at=_parse_timestamp(record.get("updated_at")) or created_at,
+            completed_at=_parse_timestamp(record.get("completed_at")),
+            **{name: record[name] for name in MESSAGE_IMPORT_FIELDS if name in record},
+        )
+        self._messages.append(message)
+        for item in record.get("attachments") or []:
+            self._attachments.append(
+                MessageAttachment(message_id=message.id, **_attachment_fields(item))
+            )
+            self.result.attachments += 1
+
+        node = _Node(message.id, thread_id, depth, branch_path)
+        if record.get("id"):
+            state.nodes[record["id"]] = node
+        state.taken.add((thread_id, depth))
+        state.previous = node
+
+        chat = state.chat
+        chat.message_count += 1
+        chat.total_tokens_used += message.total_tokens
+        chat.last_message_at = max(chat.last_message_at or created_at, created_at)
+        chat.active_leaf_id = message.id
+        self.result.messages += 1
+
+    def _flush(self) -> None:
+        for model, rows in (
+            (Chat, self._chats),
+            (Message, self._messages),
+            (MessageAttachment, self._attachments),
+        ):
+            if rows:
+                insert_rows(model, rows, batch_size=self.batch_size)
+                rows.clear()
+
+    def _fix_up_chats(self) -> None:
+        Chat.objects.bulk_update(
+            self._imported,
+            ["message_count", "total_tokens_used", "last_message_at", "active_leaf"],
+            batch_size=self.batch_size,
+        )
+
+
+def insert_rows(model, rows: list, *, batch_size: int) -> None:
+    """Insert ``rows`` in bulk, keeping the ids and timestamps set on them."""
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            # COPY needs psycopg 3; psycopg2 installs fall back to bulk_create
+            if hasattr(cursor.cursor, "copy"):
+                _copy_rows(model, rows, cursor.cursor)
+                return
+    _bulk_create_rows(model, rows, batch_size=batch_size)
+
+
+def _is_timestamp(model_field) -> bool:
+    return getattr(model_field, "auto_now", False) or getattr(
+        model_field, "auto_now_add", False
+    )
+
+
+def _copy_rows(model, rows: list, raw_cursor) -> None:
+    """Stream ``rows`` into ``model``'s table with psycopg 3's COPY FROM STDIN."""
+    fields = model._meta.concrete_fields
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(model_field.column) for model_field in fields)
+    now = timezone.now()
+    with raw_cursor.copy(
+        f"COPY {quote(model._meta.db_table)} ({columns}) FROM STDIN"
+    ) as copy:
+        for row in rows:
+            values = []
+            for model_field in fields:
+                value = getattr(row, model_field.attname)
+                if value is None and _is_timestamp(model_field):
+                    value = now
+                values.append(model_field.get_db_prep_save(value, connection))
+            copy.write_row(values)
+
+
+def _bulk_create_rows(model, rows: list, *, batch_size: int) -> None:
+    # bulk_create stamps auto_now/auto_now_add fields with the current time, so
+    # imported timestamps are put back with one bulk_update
+    stamped = [
+        model_field
+        for model_field in model._meta.concrete_fields
+        if _is_timestamp(model_field)
+        and any(getattr(row, model_field.attname) is not None for row in rows)
+    ]
+    kept = [
+        [getattr(row, model_field.attname) for model_field in stamped] for row in rows
+    ]
+    model.objects.bulk_create(rows, batch_size=batch_size)
+    if not stamped:
+        return
+    for row, values in zip(rows, kept):
+        for model_field, value in zip(stamped, values):
+            setattr(row, model_field.attname, value)
+    model.objects.bulk_update(
+        rows, [model_field.name for model_field in stamped], batch_size=batch_size
+    )
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.chats.tasks import archive_inactive_chats
+
+
+class Command(BaseCommand):
+    help = "Move the messages of inactive chats into compressed cold storage."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.CHAT_ARCHIVE_AFTER_DAYS,
+            help="Archive chats with no messages for this many days.",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=None, help="Archive at most this many chats."
+        )
+
+    def handle(self, *args, **options):
+        archived = archive_inactive_chats(
+            inactive_days=options["days"], limit=options["limit"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} chat(s)"))
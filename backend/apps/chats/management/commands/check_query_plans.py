@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.chats.query_plans import hot_queries, plan_uses_index
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the hot queries and fail if any of them stops using its index. "
+        "Sequential scans are disabled on PostgreSQL so small tables still "
+        "show which index the planner can use."
+    )
+
+    def handle(self, *args, **options):
+        failures = []
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+
+            for label, queryset, index_name in hot_queries():
+                plan = queryset.explain()
+                uses_index = plan_uses_index(plan, index_name)
+                if not uses_index and connection.vendor != "postgresql":
+                    # SQLite only matches a partial index against literal values,
+                    # and Django always binds parameters
+                    self.stdout.write(f"{label}: not checked on {connection.vendor}")
+                    continue
+                status = "ok" if uses_index else "MISSING INDEX"
+                self.stdout.write(f"{label}: {status}")
+                if options["verbosity"] > 1 or not uses_index:
+                    self.stdout.write(plan)
+                if not uses_index:
+                    failures.append(label)
+
+        if failures:
+            raise CommandError(f"Queries not using their index: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS("All hot queries use their indexes"))
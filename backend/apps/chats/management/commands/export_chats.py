@@ -0,0 +1,34 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.authentication.models import User
+from apps.chats.export import export_chats
+
+
+class Command(BaseCommand):
+    help = "Write a user's chats and messages as NDJSON (to stdout by default)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("email", help="Email of the user to export.")
+        parser.add_argument("--chat", default=None, help="Only export this chat id.")
+        parser.add_argument(
+            "--output", default=None, help="Write to this file instead of stdout."
+        )
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options["email"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+
+        lines = export_chats(
+            user.id, chat_id=options["chat"], chunk_size=options["chunk_size"]
+        )
+        if options["output"] is None:
+            sys.stdout.buffer.writelines(lines)
+            return
+        with open(options["output"], "wb") as handle:
+            handle.writelines(lines)
+        self.stderr.write(self.style.SUCCESS(f"Wrote {options['output']}"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.chats.tasks import fail_stalled_messages
+
+
+class Command(BaseCommand):
+    help = "Mark assistant messages stuck in processing as failed."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--minutes",
+            type=int,
+            default=15,
+            help="Only fail messages not updated for this many minutes.",
+        )
+
+    def handle(self, *args, **options):
+        failed = fail_stalled_messages(older_than_minutes=options["minutes"])
+        self.stdout.write(self.style.SUCCESS(f"Failed {failed} stalled message(s)"))
@@ -0,0 +1,39 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.authentication.models import User
+from apps.chats.importer import IMPORT_BATCH_SIZE, ChatImporter
+from shared.exceptions import ChatImportError
+
+
+class Command(BaseCommand):
+    help = "Bulk import an NDJSON chat export into a user's account."
+
+    def add_arguments(self, parser):
+        parser.add_argument("email", help="Email of the user to import into.")
+        parser.add_argument("path", help="NDJSON file to import, or - for stdin.")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options["email"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+
+        importer = ChatImporter(user, batch_size=options["batch_size"])
+        try:
+            if options["path"] == "-":
+                result = importer.run(sys.stdin.buffer)
+            else:
+                with open(options["path"], "rb") as handle:
+                    result = importer.run(handle)
+        except ChatImportError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result.chats} chat(s), {result.messages} message(s) "
+                f"and {result.attachments} attachment(s)"
+            )
+        )
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.chats.tasks import reconcile_chat_metrics
+
+
+class Command(BaseCommand):
+    help = "Recompute chat message, token and cost counters from stored messages."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Only reconcile chats active within the last N days.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        active_since = None
+        if options["days"] is not None:
+            active_since = timezone.now() - timedelta(days=options["days"])
+
+        repaired = reconcile_chat_metrics(
+            active_since=active_since, batch_size=options["batch_size"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {repaired} chat(s)"))
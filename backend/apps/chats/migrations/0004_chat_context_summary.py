@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chats", "0003_remove_chat_mem0_memory_id_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chat",
+            name="context_summary",
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name="chat",
+            name="summarized_until",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chats", "0004_chat_context_summary"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="message",
+            name="cached_tokens",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:18
+
+import uuid
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_message_tree(apps, schema_editor):
+    """Chain existing messages into one thread per chat, in creation order.
+
+    Replies cancelled by the old in-place edit flow become single-message forks
+    of the message they were answering.
+    """
+    Chat = apps.get_model("chats", "Chat")
+    Message = apps.get_model("chats", "Message")
+
+    for chat in Chat.objects.only("id").iterator():
+        main_thread = uuid.uuid4()
+        tip = None
+        updates = []
+        for message in Message.objects.filter(chat_id=chat.id).order_by("created_at"):
+            if message.status == "cancelled" and tip is not None:
+                message.parent_message_id = tip.id
+                message.thread_id = uuid.uuid4()
+                message.depth = tip.depth + 1
+                message.branch_path = f"{main_thread.hex}:{tip.depth}/"
+            else:
+                message.parent_message_id = tip.id if tip else None
+                message.thread_id = main_thread
+                message.depth = tip.depth + 1 if tip else 0
+                message.branch_path = ""
+                tip = message
+            updates.append(message)
+
+        Message.objects.bulk_update(
+            updates,
+            ["parent_message", "thread_id", "depth", "branch_path"],
+            batch_size=500,
+        )
+        if tip is not None:
+            Chat.objects.filter(id=chat.id).update(active_leaf_id=tip.id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chats", "0005_message_cached_tokens"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chat",
+            name="active_leaf",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="chats.message",
+            ),
+        ),
+        migrations.AddField(
+            model_name="message",
+            name="branch_path",
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name="message",
+            name="depth",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_message_tree, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="message",
+            constraint=models.UniqueConstraint(
+                fields=("thread_id", "depth"), name="chats_message_thread_depth_uniq"
+            ),
+        ),
+    ]
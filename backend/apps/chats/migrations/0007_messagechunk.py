@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chats", "0006_message_branch_tree"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MessageChunk",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("offset", models.PositiveIntegerField()),
+                ("content", models.TextField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "message",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="chunks",
+                        to="chats.message",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["offset"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="messagechunk",
+            constraint=models.UniqueConstraint(
+                fields=("message", "offset"), name="chats_messagechunk_offset_uniq"
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:28
+
+from django.db import migrations, models
+
+from shared.db import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("chats", "0007_messagechunk"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="chat",
+            index=models.Index(
+                fields=["user", "-updated_at", "-id"],
+                name="chats_chat_user_updated_idx",
+            ),
+        ),
+    ]
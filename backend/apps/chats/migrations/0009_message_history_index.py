@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:29
+
+from django.db import migrations, models
+
+from shared.db import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("chats", "0008_chat_keyset_index"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="message",
+            index=models.Index(
+                fields=["chat", "created_at", "id"], name="chats_msg_chat_created_idx"
+            ),
+        ),
+    ]
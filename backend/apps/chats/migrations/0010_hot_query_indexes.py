@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:33
+
+from django.db import migrations, models
+
+from shared.db import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("chats", "0009_message_history_index"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="message",
+            index=models.Index(
+                condition=models.Q(("status", "processing")),
+                fields=["updated_at"],
+                name="chats_msg_processing_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,101 @@
+from django.db import migrations
+
+from shared.db import RunSQLOnPostgres
+
+# Keep in sync with apps.chats.search.SEARCH_CONFIG
+SEARCH_CONFIG = "english"
+BACKFILL_BATCH_SIZE = 5000
+
+
+def search_vector_sql(table: str, source: str, vector: str) -> list[tuple[str, str]]:
+    """Column and trigger that maintain ``table.search_vector``.
+
+    The trigger only re-parses ``source`` on insert or when it actually changes,
+    so counter and status updates leave the vector alone.
+    """
+    function = f"{table}_search_vector_update"
+    return [
+        (
+            f"ALTER TABLE {table} ADD COLUMN search_vector tsvector",
+            f"ALTER TABLE {table} DROP COLUMN search_vector",
+        ),
+        (
+            f"""
+            CREATE FUNCTION {function}() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'INSERT' OR NEW.{source} IS DISTINCT FROM OLD.{source} THEN
+                    NEW.search_vector := {vector.format(row="NEW")};
+                END IF;
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+            """,
+            f"DROP FUNCTION {function}()",
+        ),
+        (
+            f"""
+            CREATE TRIGGER {table}_search_vector_trigger
+            BEFORE INSERT OR UPDATE OF {source} ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {function}()
+            """,
+            f"DROP TRIGGER {table}_search_vector_trigger ON {table}",
+        ),
+    ]
+
+
+MESSAGE_VECTOR = f"to_tsvector('{SEARCH_CONFIG}', coalesce({{row}}.content, ''))"
+CHAT_VECTOR = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({{row}}.title, '')), 'A')"
+)
+
+
+def backfill_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    tables = {"chats_message": MESSAGE_VECTOR, "chats_chat": CHAT_VECTOR}
+    with schema_editor.connection.cursor() as cursor:
+        for table, vector in tables.items():
+            # Small autocommitted batches keep row locks short on large tables
+            while True:
+                cursor.execute(
+                    f"""
+                    UPDATE {table} SET search_vector = {vector.format(row=table)}
+                    WHERE id IN (
+                        SELECT id FROM {table} WHERE search_vector IS NULL LIMIT %s
+                    )
+                    """,
+                    [BACKFILL_BATCH_SIZE],
+                )
+                if cursor.rowcount < BACKFILL_BATCH_SIZE:
+                    break
+
+
+class Migration(migrations.Migration):
+    # The backfill commits per batch and CREATE INDEX CONCURRENTLY cannot run
+    # inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("chats", "0010_hot_query_indexes"),
+    ]
+
+    operations = [
+        *[
+            RunSQLOnPostgres(sql, reverse_sql)
+            for sql, reverse_sql in [
+                *search_vector_sql("chats_message", "content", MESSAGE_VECTOR),
+                *search_vector_sql("chats_chat", "title", CHAT_VECTOR),
+            ]
+        ],
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+        RunSQLOnPostgres(
+            "CREATE INDEX CONCURRENTLY chats_msg_search_idx "
+            "ON chats_message USING gin (search_vector)",
+            "DROP INDEX CONCURRENTLY IF EXISTS chats_msg_search_idx",
+        ),
+        RunSQLOnPostgres(
+            "CREATE INDEX CONCURRENTLY chats_chat_search_idx "
+            "ON chats_chat USING gin (search_vector)",
+            "DROP INDEX CONCURRENTLY IF EXISTS chats_chat_search_idx",
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chats", "0011_search_vectors"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SharedChatSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("token", models.UUIDField(unique=True)),
+                ("body", models.BinaryField()),
+                ("etag", models.CharField(max_length=64)),
+                ("message_count", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "chat",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="shared_snapshot",
+                        to="chats.chat",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chats", "0012_sharedchatsnapshot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chat",
+            name="cold_archived_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="ChatArchive",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("body", models.BinaryField()),
+                ("message_count", models.PositiveIntegerField(default=0)),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "chat",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="cold_archive",
+                        to="chats.chat",
+                    ),
+                ),
+            ],
+        ),
+    ]
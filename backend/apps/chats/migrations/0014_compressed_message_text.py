@@ -0,0 +1,100 @@
+from django.db import migrations
+from django.db.models import Q, Value
+from django.db.models.functions import Length
+
+import shared.fields
+from shared.db import RunSQLOnPostgres
+from shared.fields import COMPRESSION_MARKER
+
+BATCH_SIZE = 500
+
+# Compressed bodies are opaque to to_tsvector, and tsvector values are capped at
+# 1MB anyway, so they are left out of the search index
+SEARCH_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION chats_message_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' OR NEW.content IS DISTINCT FROM OLD.content THEN
+        IF starts_with(NEW.content, chr(1) || 'zlib:') THEN
+            NEW.search_vector := ''::tsvector;
+        ELSE
+            NEW.search_vector := to_tsvector('english', coalesce(NEW.content, ''));
+        END IF;
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+"""
+PREVIOUS_SEARCH_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION chats_message_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' OR NEW.content IS DISTINCT FROM OLD.content THEN
+        NEW.search_vector := to_tsvector('english', coalesce(NEW.content, ''));
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def compress_large_messages(apps, schema_editor):
+    Message = apps.get_model("chats", "Message")
+    threshold = Message._meta.get_field("content").threshold
+    candidates = (
+        Message.objects.alias(
+            content_size=Length("content"), raw_content_size=Length("raw_content")
+        )
+        .filter(
+            Q(content_size__gte=threshold)
+            | Q(raw_content_size__gte=threshold)
+            # Plain values that merely look compressed must be re-saved too
+            | Q(content__startswith=COMPRESSION_MARKER)
+            | Q(raw_content__startswith=COMPRESSION_MARKER)
+        )
+        .order_by("id")
+    )
+    ids = list(candidates.values_list("id", flat=True))
+    for start in range(0, len(ids), BATCH_SIZE):
+        messages = list(
+            Message.objects.filter(id__in=ids[start : start + BATCH_SIZE]).only(
+                "id", "content", "raw_content"
+            )
+        )
+        # Saving through the field compresses whatever crosses the threshold
+        Message.objects.bulk_update(messages, ["content", "raw_content"])
+
+
+def decompress_messages(apps, schema_editor):
+    Message = apps.get_model("chats", "Message")
+    compressed = Message.objects.filter(
+        Q(content__startswith=COMPRESSION_MARKER)
+        | Q(raw_content__startswith=COMPRESSION_MARKER)
+    ).only("id", "content", "raw_content")
+    for message in compressed.iterator(chunk_size=BATCH_SIZE):
+        # Value() skips the field's compression and writes the plain text
+        Message.objects.filter(id=message.id).update(
+            content=Value(message.content), raw_content=Value(message.raw_content)
+        )
+
+
+class Migration(migrations.Migration):
+    # Existing rows are compressed in batches that commit as they go
+    atomic = False
+
+    dependencies = [
+        ("chats", "0013_chat_cold_archive"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="message",
+            name="content",
+            field=shared.fields.CompressedTextField(),
+        ),
+        migrations.AlterField(
+            model_name="message",
+            name="raw_content",
+            field=shared.fields.CompressedTextField(blank=True),
+        ),
+        RunSQLOnPostgres(SEARCH_FUNCTION_SQL, PREVIOUS_SEARCH_FUNCTION_SQL),
+        migrations.RunPython(compress_large_messages, decompress_messages),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:12
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chats", "0014_compressed_message_text"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="messageattachment",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,104 @@
+from django.db import migrations
+from django.db.models import Q, Value
+
+from shared.db import RunSQLOnPostgres
+from shared.fields import COMPRESSION_MARKER, compress_text
+
+BATCH_SIZE = 500
+
+# Compressed bodies carry a plain-text prefix after the first newline (base64
+# never contains one); that prefix is what gets indexed and highlighted
+SEARCH_TEXT_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION chats_message_search_text(content text) RETURNS text AS $$
+    SELECT CASE
+        WHEN NOT starts_with(content, chr(1) || 'zlib:') THEN content
+        WHEN strpos(content, chr(10)) = 0 THEN ''
+        ELSE substr(content, strpos(content, chr(10)) + 1)
+    END
+$$ LANGUAGE sql IMMUTABLE
+"""
+SEARCH_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION chats_message_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' OR NEW.content IS DISTINCT FROM OLD.content THEN
+        NEW.search_vector := to_tsvector(
+            'english', coalesce(chats_message_search_text(NEW.content), '')
+        );
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+"""
+PREVIOUS_SEARCH_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION chats_message_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' OR NEW.content IS DISTINCT FROM OLD.content THEN
+        IF starts_with(NEW.content, chr(1) || 'zlib:') THEN
+            NEW.search_vector := ''::tsvector;
+        ELSE
+            NEW.search_vector := to_tsvector('english', coalesce(NEW.content, ''));
+        END IF;
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def _compressed_messages(Message):
+    return Message.objects.filter(
+        Q(content__startswith=COMPRESSION_MARKER)
+        | Q(raw_content__startswith=COMPRESSION_MARKER)
+    ).order_by("id")
+
+
+def add_search_prefixes(apps, schema_editor):
+    Message = apps.get_model("chats", "Message")
+    ids = list(_compressed_messages(Message).values_list("id", flat=True))
+    for start in range(0, len(ids), BATCH_SIZE):
+        messages = list(
+            Message.objects.filter(id__in=ids[start : start + BATCH_SIZE]).only(
+                "id", "content", "raw_content"
+            )
+        )
+        # Re-saving through the field appends the prefix; the trigger reindexes
+        Message.objects.bulk_update(messages, ["content", "raw_content"])
+
+
+def remove_search_prefixes(apps, schema_editor):
+    Message = apps.get_model("chats", "Message")
+    messages = _compressed_messages(Message).only("id", "content", "raw_content")
+    threshold = Message._meta.get_field("content").threshold
+
+    def previous_format(value: str) -> Value:
+        # Value() skips the field, so this is 0014's encoding, without prefixes
+        if value.startswith(COMPRESSION_MARKER):
+            return Value(compress_text(value))
+        if len(value) < threshold:
+            return Value(value)
+        packed = compress_text(value)
+        return Value(packed if len(packed) < len(value) else value)
+
+    for message in messages.iterator(chunk_size=BATCH_SIZE):
+        Message.objects.filter(id=message.id).update(
+            content=previous_format(message.content),
+            raw_content=previous_format(message.raw_content),
+        )
+
+
+class Migration(migrations.Migration):
+    # Existing rows are rewritten in batches that commit as they go
+    atomic = False
+
+    dependencies = [
+        ("chats", "0015_messageattachment_updated_at"),
+    ]
+
+    operations = [
+        RunSQLOnPostgres(
+            SEARCH_TEXT_FUNCTION_SQL,
+            "DROP FUNCTION IF EXISTS chats_message_search_text(text)",
+        ),
+        RunSQLOnPostgres(SEARCH_FUNCTION_SQL, PREVIOUS_SEARCH_FUNCTION_SQL),
+        migrations.RunPython(add_search_prefixes, remove_search_prefixes),
+    ]
@@ -4,6 +4,7 @@ from django.db import models
 from django.utils import timezone
 
 from apps.authentication.models import User
+from shared.fields import CompressedTextField
 
 
 class Chat(models.Model):
@@ -12,11 +13,22 @@ class Chat(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="chats")
 
+    # On PostgreSQL, title and Message.content also feed a trigger-maintained
+    # search_vector column that is not a model field (see apps/chats/search.py)
     title = models.CharField(max_length=255, blank=True)
     is_title_generated = models.BooleanField(default=False)
 
     model_used = models.CharField(max_length=100, default="gpt-4o-mini")
     system_prompt = models.TextField(blank=True)
+    context_summary = models.TextField(blank=True)
+    summarized_until = models.DateTimeField(null=True, blank=True)
+    active_leaf = models.ForeignKey(
+        "Message",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
     temperature = models.FloatField(default=0.7)
     max_tokens = models.PositiveIntegerField(default=1000)
 
@@ -32,9 +44,18 @@ class Chat(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
     last_message_at = models.DateTimeField(null=True, blank=True)
+    # Set while the messages live in a ChatArchive blob instead of Message rows
+    cold_archived_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ["-last_message_at", "-created_at"]
+        indexes = [
+            # Keyset pagination of a user's chat list
+            models.Index(
+                fields=["user", "-updated_at", "-id"],
+                name="chats_chat_user_updated_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.title or f"Chat {self.id}"  # pragma: no cover simple repr
@@ -61,13 +82,15 @@ class Message(models.Model):
     chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name="messages")
 
     role = models.CharField(max_length=10, choices=ROLE_CHOICES)
-    content = models.TextField()
-    raw_content = models.TextField(blank=True)
+    # Pasted logs can run to megabytes; large bodies are stored compressed
+    content = CompressedTextField()
+    raw_content = CompressedTextField(blank=True)
 
     model_used = models.CharField(max_length=100, blank=True)
     prompt_tokens = models.PositiveIntegerField(default=0)
     completion_tokens = models.PositiveIntegerField(default=0)
     total_tokens = models.PositiveIntegerField(default=0)
+    cached_tokens = models.PositiveIntegerField(default=0)
     processing_time_ms = models.PositiveIntegerField(default=0)
 
     status = models.CharField(max_length=15, choices=STATUS_CHOICES, default="pending")
@@ -80,7 +103,12 @@ class Message(models.Model):
         on_delete=models.SET_NULL,
         related_name="children",
     )
+    # Branch ancestry: thread_id groups a linear run of messages, depth is the
+    # distance from the root and branch_path lists the forks ("<thread>:<depth>/")
+    # this message's thread descends from. See Message.lineage().
     thread_id = models.UUIDField(null=True, blank=True)
+    depth = models.PositiveIntegerField(default=0)
+    branch_path = models.TextField(blank=True)
 
     user_rating = models.IntegerField(null=True, blank=True)
     is_regenerated = models.BooleanField(default=False)
@@ -92,6 +120,56 @@ class Message(models.Model):
 
     class Meta:
         ordering = ["created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["thread_id", "depth"], name="chats_message_thread_depth_uniq"
+            ),
+        ]
+        indexes = [
+            # Cursor-paginated history windows
+            models.Index(
+                fields=["chat", "created_at", "id"], name="chats_msg_chat_created_idx"
+            ),
+            # Sweeps for generations that never finished
+            models.Index(
+                fields=["updated_at"],
+                name="chats_msg_processing_idx",
+                condition=models.Q(status="processing"),
+            ),
+        ]
+
+    def attach_to(self, parent: "Message | None", *, fork: bool = False) -> None:
+        """Place this unsaved message in the tree under ``parent``.
+
+        Replies continue their parent's thread; forks (edits, regenerations) open a
+        new thread and record the fork point in ``branch_path``.
+        """
+        self.parent_message = parent
+        if parent is None:
+            self.thread_id = uuid.uuid4()
+            self.depth = 0
+            self.branch_path = ""
+            return
+        self.depth = parent.depth + 1
+        if fork:
+            self.thread_id = uuid.uuid4()
+            self.branch_path = (
+                f"{parent.branch_path}{parent.thread_id.hex}:{parent.depth}/"
+            )
+        else:
+            self.thread_id = parent.thread_id
+            self.branch_path = parent.branch_path
+
+    def lineage(self) -> list[tuple[uuid.UUID, int, int]]:
+        """Return (thread_id, first depth, last depth) segments from the root."""
+        segments = []
+        first_depth = 0
+        for segment in filter(None, self.branch_path.split("/")):
+            thread_hex, fork_depth = segment.split(":")
+            segments.append((uuid.UUID(thread_hex), first_depth, int(fork_depth)))
+            first_depth = int(fork_depth) + 1
+        segments.append((self.thread_id, first_depth, self.depth))
+        return segments
 
     def mark_completed(self, tokens: int, error: str | None = None) -> None:
         self.total_tokens = tokens
@@ -102,6 +180,30 @@ class Message(models.Model):
         self.save()
 
 
+class MessageChunk(models.Model):
+    """Append-only slice of an in-flight assistant reply.
+
+    Streaming writes one row per flushed delta instead of rewriting
+    ``Message.content``; the log is compacted into the message when it finishes.
+    """
+
+    message = models.ForeignKey(
+        Message, on_delete=models.CASCADE, related_name="chunks"
+    )
+    offset = models.PositiveIntegerField()
+    content = models.TextField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["offset"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["message", "offset"], name="chats_messagechunk_offset_uniq"
+            ),
+        ]
+
+
 class MessageAttachment(models.Model):
     ATTACHMENT_TYPES = [
         ("image", "Image"),
@@ -125,6 +227,48 @@ class MessageAttachment(models.Model):
     processing_error = models.TextField(blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self) -> str:
         return self.file_name
+
+
+class SharedChatSnapshot(models.Model):
+    """Frozen public copy of a shared chat, rendered when it was shared.
+
+    ``body`` is the gzip-compressed JSON response, served as is to clients that
+    accept gzip. Re-sharing replaces it; unsharing deletes it.
+    """
+
+    chat = models.OneToOneField(
+        Chat, on_delete=models.CASCADE, related_name="shared_snapshot"
+    )
+    token = models.UUIDField(unique=True)
+    body = models.BinaryField()
+    etag = models.CharField(max_length=64)
+    message_count = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"Snapshot of {self.chat_id}"  # pragma: no cover simple repr
+
+
+class ChatArchive(models.Model):
+    """Messages of an inactive chat, moved out of the hot tables.
+
+    ``body`` is gzip-compressed JSON holding every message and attachment row
+    (all branches) plus the ids needed to restore ``Chat.active_leaf`` and the
+    usage records' message links. See ``apps.chats.archive``.
+    """
+
+    chat = models.OneToOneField(
+        Chat, on_delete=models.CASCADE, related_name="cold_archive"
+    )
+    body = models.BinaryField()
+    message_count = models.PositiveIntegerField(default=0)
+
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"Archive of {self.chat_id}"  # pragma: no cover simple repr
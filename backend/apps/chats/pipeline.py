@@ -6,9 +6,13 @@ from typing import Iterable
 
 from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.db import transaction
+from django.db.models import F
 from django.utils import timezone
 
-from .models import Chat, Message
+from shared.cache import CacheService, ConversationContextCache
+
+from .models import Chat, Message, MessageAttachment
 from .services import ChatService, MessageService
 
 logger = logging.getLogger(__name__)
@@ -18,6 +22,7 @@ logger = logging.getLogger(__name__)
 class DispatchOutcome:
     """Encapsulates the result of queuing background work after saving a message."""
 
+    chat: Chat
     message: Message
     assistant_message: Message | None
     queued_ai: bool
@@ -49,24 +54,23 @@ class ChatPipeline:
     async def send_user_message(
         self,
         *,
-        chat: Chat,
+        user,
+        chat_id: str,
         content: str,
         model: str | None,
         attachments: Iterable[dict[str, object]] | None,
     ) -> DispatchOutcome:
-        resolved_model = model or chat.model_used
-        message = await MessageService.create_message(
-            chat=chat,
+        chat, message, assistant_placeholder = await sync_to_async(
+            MessageService.create_exchange, thread_sensitive=True
+        )(
+            user=user,
+            chat_id=chat_id,
             content=content,
-            role="user",
+            model=model,
             attachments=attachments,
         )
-
-        assistant_placeholder = await MessageService.create_assistant_placeholder(
-            chat=chat,
-            parent_message=message,
-            model=resolved_model,
-        )
+        MessageService.append_to_context_cache(message)
+        CacheService.invalidate_user_cache(str(user.id))
 
         has_attachments = bool(attachments)
         queued_attachments = self._enqueue_attachment_processing(
@@ -75,43 +79,80 @@ class ChatPipeline:
         queued_ai = self.enqueue_ai_response(
             chat_id=str(chat.id),
             user_message_id=str(message.id),
-            model=resolved_model,
+            model=assistant_placeholder.model_used,
             assistant_message_id=str(assistant_placeholder.id),
         )
         return DispatchOutcome(
+            chat=chat,
             message=message,
             assistant_message=assistant_placeholder,
             queued_ai=queued_ai,
             queued_attachments=queued_attachments,
         )
 
-    async def mark_user_message_edit(
-        self, message: Message, new_content: str
-    ) -> Message:
-        def _apply_edit() -> Message:
-            message.content = new_content
-            message.status = "completed"
-            message.error_message = ""
-            message.save(
-                update_fields=["content", "status", "error_message", "updated_at"]
-            )
-            Message.objects.filter(parent_message=message).update(
-                status="cancelled",
-                error_message="Superseded after user edit",
-                updated_at=timezone.now(),
-            )
-            return message
-
-        return await sync_to_async(_apply_edit, thread_sensitive=True)()
-
-    async def mark_assistant_regeneration(self, message: Message) -> Message:
-        def _mark_processing() -> Message:
-            message.status = "processing"
-            message.error_message = ""
-            message.save(update_fields=["status", "error_message", "updated_at"])
-            return message
-
-        return await sync_to_async(_mark_processing, thread_sensitive=True)()
+    async def edit_user_message(self, message: Message, new_content: str) -> Message:
+        """Fork the conversation at ``message`` with edited content.
+
+        The original message and its replies stay on their own branch; the edited
+        copy becomes the active leaf and is answered afresh.
+        """
+
+        def _branch_edit() -> Message:
+            chat = message.chat
+            parent = message.parent_message
+            with transaction.atomic():
+                edited = Message(
+                    chat=chat,
+                    role="user",
+                    content=new_content,
+                    status="completed",
+                    regeneration_count=message.regeneration_count + 1,
+                )
+                edited.attach_to(parent, fork=True)
+                edited.save(force_insert=True)
+                MessageAttachment.objects.bulk_create(
+                    [
+                        MessageAttachment(
+                            message=edited,
+                            file_name=attachment.file_name,
+                            file_type=attachment.file_type,
+                            file_size=attachment.file_size,
+                            file_url=attachment.file_url,
+                            mime_type=attachment.mime_type,
+                            is_processed=attachment.is_processed,
+                            extracted_text=attachment.extracted_text,
+                        )
+                        for attachment in message.attachments.all()
+                    ]
+                )
+                ChatService.reset_summary_if_diverged(chat, parent)
+                Chat.objects.filter(id=chat.id).update(
+                    message_count=F("message_count") + 1,
+                    last_message_at=timezone.now(),
+                    active_leaf=edited,
+                )
+                chat.active_leaf = edited
+            return edited
+
+        edited = await sync_to_async(_branch_edit, thread_sensitive=True)()
+        ConversationContextCache.invalidate(edited.chat_id)
+        return edited
+
+    async def regenerate_assistant_message(self, message: Message) -> Message:
+        """Create a sibling of ``message`` to receive a regenerated answer."""
+
+        chat = message.chat
+        placeholder = await sync_to_async(
+            MessageService.create_reply_placeholder, thread_sensitive=True
+        )(
+            chat=chat,
+            parent_message=message.parent_message,
+            model=message.model_used or chat.model_used,
+            is_regenerated=True,
+            regeneration_count=message.regeneration_count + 1,
+        )
+        ConversationContextCache.invalidate(placeholder.chat_id)
+        return placeholder
 
     def enqueue_ai_response(
         self,
@@ -0,0 +1,66 @@
+"""The hot queries and the index each one must use, checked with EXPLAIN.
+
+Used by ``tests/test_query_plans.py`` and the ``check_query_plans`` command.
+"""
+
+import uuid
+from typing import Optional
+
+from django.utils import timezone
+
+from apps.ai_integration.models import UsageTracking
+from apps.authentication.models import UserSession
+
+from .models import Chat, Message
+
+
+def hot_queries():
+    """(label, queryset, index) per hot query; ``None`` accepts any index."""
+    user_id = uuid.uuid4()
+    chat_id = uuid.uuid4()
+    now = timezone.now()
+    return [
+        (
+            "chat list page",
+            Chat.objects.filter(user_id=user_id).order_by("-updated_at", "-id")[:21],
+            "chats_chat_user_updated_idx",
+        ),
+        (
+            "message history window",
+            Message.objects.filter(chat_id=chat_id).order_by("-created_at", "-id")[:51],
+            "chats_msg_chat_created_idx",
+        ),
+        (
+            "stalled generation sweep",
+            Message.objects.filter(status="processing", updated_at__lt=now),
+            "chats_msg_processing_idx",
+        ),
+        (
+            "usage history",
+            UsageTracking.objects.filter(user_id=user_id, created_at__gte=now).order_by(
+                "-created_at"
+            )[:50],
+            "ai_usage_user_created_idx",
+        ),
+        (
+            "active sessions",
+            UserSession.objects.filter(
+                user_id=user_id, is_active=True, expires_at__gt=now
+            ),
+            "auth_session_user_active_idx",
+        ),
+        (
+            "refresh session lookup",
+            UserSession.objects.filter(
+                user_id=user_id,
+                session_id=uuid.uuid4(),
+                is_active=True,
+                expires_at__gt=now,
+            ),
+            None,
+        ),
+    ]
+
+
+def plan_uses_index(plan: str, index_name: Optional[str]) -> bool:
+    return index_name in plan if index_name else "index" in plan.lower()
@@ -36,10 +36,12 @@ class MessageResponse(ModelSchema):
             "prompt_tokens",
             "completion_tokens",
             "total_tokens",
+            "cached_tokens",
             "status",
             "error_message",
             "parent_message",
             "thread_id",
+            "depth",
             "user_rating",
             "is_regenerated",
             "regeneration_count",
@@ -90,6 +92,11 @@ class ChatListResponse(ModelSchema):
         ]
 
 
+class ChatListPage(Schema):
+    items: List[ChatListResponse]
+    next_cursor: Optional[str] = None
+
+
 class ChatCreateRequest(Schema):
     id: Optional[UUID] = None  # Allow frontend to specify UUID
     title: Optional[str] = None
@@ -136,3 +143,30 @@ class MessageRegenerateRequest(Schema):
 class ChatSearchQuery(Schema):
     archived: bool = False
     search: Optional[str] = None
+
+
+class SearchHitSchema(Schema):
+    chat_id: UUID
+    chat_title: str
+    message_id: Optional[UUID] = None
+    role: Optional[str] = None
+    snippet: str
+    rank: float
+    sort_at: datetime
+
+
+class SearchPage(Schema):
+    items: List[SearchHitSchema]
+    next_cursor: Optional[str] = None
+
+
+class ChatImportResponse(Schema):
+    chats: int
+    messages: int
+    attachments: int
+
+
+class ChatShareResponse(Schema):
+    share_token: UUID
+    shared_at: datetime
+    message_count: int
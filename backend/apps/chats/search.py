@@ -0,0 +1,280 @@
+"""Full-text search over a user's chat titles and message contents.
+
+On PostgreSQL, ``chats_chat`` and ``chats_message`` carry a trigger-maintained
+``search_vector`` column with a GIN index (migration 0011). It is not a model
+field, so the ORM never reads or writes it. Compressed message bodies are
+indexed and highlighted by their plain-text prefix (see
+``shared.fields.CompressedTextField`` and migration 0016). Other databases use
+``FallbackSearchEngine``, a substring matcher that is good enough for SQLite
+test and development runs.
+
+Both engines return ``SearchHit`` rows ordered by ``(rank, sort_at, hit_id)``
+descending. That ordering is unique, so it is used as the keyset for cursor
+pagination.
+"""
+
+import html
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Sequence
+from uuid import UUID
+
+from django.db import connection
+from django.db.models import Q
+from ninja.errors import HttpError
+
+from shared.pagination import decode_cursor, encode_cursor
+
+from .models import Chat, Message
+
+# Must match the text search configuration baked into migration 0011
+SEARCH_CONFIG = "english"
+SEARCH_ORDERING = ("-rank", "-sort_at", "-hit_id")
+
+# Private-use delimiters survive ts_headline untouched and are swapped for
+# <mark> only after the snippet text has been HTML-escaped
+_START_SEL = "\ue000"
+_STOP_SEL = "\ue001"
+_SNIPPET_WORDS = 24
+
+
+@dataclass
+class SearchHit:
+    hit_id: UUID
+    chat_id: UUID
+    chat_title: str
+    message_id: Optional[UUID]
+    role: Optional[str]
+    snippet: str
+    rank: float
+    sort_at: datetime
+
+
+def _render_snippet(text: str) -> str:
+    return html.escape(text).replace(_START_SEL, "<mark>").replace(_STOP_SEL, "</mark>")
+
+
+def _decode_position(cursor: Optional[str]) -> Optional[tuple]:
+    if not cursor:
+        return None
+    rank, sort_at, hit_id = decode_cursor(cursor, len(SEARCH_ORDERING))
+    try:
+        return float(rank), datetime.fromisoformat(sort_at), UUID(hit_id)
+    except (TypeError, ValueError):
+        raise HttpError(400, "Invalid cursor")
+
+
+class PostgresSearchEngine:
+    """Ranked ``websearch_to_tsquery`` matches with ``ts_headline`` snippets.
+
+    Title hits carry weight A and outrank body hits. Snippets are only built
+    for the rows of the requested page.
+    """
+
+    HEADLINE_OPTIONS = (
+        f"StartSel={_START_SEL}, StopSel={_STOP_SEL}, "
+        f"MaxWords={_SNIPPET_WORDS}, MinWords=8, MaxFragments=2"
+    )
+
+    SQL = """
+        WITH search AS (SELECT websearch_to_tsquery(%(config)s, %(query)s) AS q),
+        hits AS (
+            SELECT c.id AS hit_id, c.id AS chat_id, NULL::uuid AS message_id,
+                   NULL AS role, c.title AS body,
+                   ts_rank_cd(c.search_vector, search.q) AS rank,
+                   c.updated_at AS sort_at
+            FROM chats_chat c, search
+            WHERE c.user_id = %(user_id)s AND c.is_archived = %(archived)s
+              AND c.search_vector @@ search.q
+            UNION ALL
+            SELECT m.id, m.chat_id, m.id, m.role,
+                   chats_message_search_text(m.content),
+                   ts_rank_cd(m.search_vector, search.q), m.created_at
+            FROM chats_message m
+            JOIN chats_chat c ON c.id = m.chat_id, search
+            WHERE c.user_id = %(user_id)s AND c.is_archived = %(archived)s
+              AND m.role IN ('user', 'assistant')
+              AND m.search_vector @@ search.q
+        ),
+        page AS (
+            SELECT * FROM hits
+            {keyset}
+            ORDER BY rank DESC, sort_at DESC, hit_id DESC
+            LIMIT %(limit)s
+        )
+        SELECT page.hit_id, page.chat_id, c.title, page.message_id, page.role,
+               ts_headline(%(config)s, page.body, search.q, %(options)s),
+               page.rank, page.sort_at
+        FROM page JOIN chats_chat c ON c.id = page.chat_id, search
+        ORDER BY page.rank DESC, page.sort_at DESC, page.hit_id DESC
+    """
+    KEYSET = "WHERE (rank, sort_at, hit_id) < (%(rank)s, %(sort_at)s, %(hit_id)s)"
+
+    def search(
+        self,
+        user_id,
+        query: str,
+        *,
+        archived: bool = False,
+        limit: int,
+        after: Optional[tuple] = None,
+    ) -> list[SearchHit]:
+        params = {
+            "config": SEARCH_CONFIG,
+            "query": query,
+            "user_id": user_id,
+            "archived": archived,
+            "limit": limit,
+            "options": self.HEADLINE_OPTIONS,
+        }
+        if after is not None:
+            params.update(zip(("rank", "sort_at", "hit_id"), after))
+        sql = self.SQL.format(keyset=self.KEYSET if after is not None else "")
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        return [
+            SearchHit(
+                hit_id=hit_id,
+                chat_id=chat_id,
+                chat_title=title,
+                message_id=message_id,
+                role=role,
+                snippet=_render_snippet(snippet),
+                rank=rank,
+                sort_at=sort_at,
+            )
+            for hit_id, chat_id, title, message_id, role, snippet, rank, sort_at in rows
+        ]
+
+
+class FallbackSearchEngine:
+    """Case-insensitive substring search for databases without ``tsvector``.
+
+    Matches every row containing any query term and ranks in Python by term
+    frequency, so its cost grows with the number of matches. Use it for tests
+    and local development only.
+    """
+
+    TITLE_WEIGHT = 10.0
+
+    @staticmethod
+    def terms(query: str) -> list[str]:
+        return list(dict.fromkeys(re.findall(r"\w+", query.lower())))
+
+    @staticmethod
+    def _rank(text: str, terms: Sequence[str]) -> float:
+        lowered = text.lower()
+        return float(sum(lowered.count(term) for term in terms))
+
+    @staticmethod
+    def _snippet(text: str, terms: Sequence[str]) -> str:
+        pattern = re.compile("|".join(map(re.escape, terms)), re.IGNORECASE)
+        words = text.split()
+        first = next(
+            (index for index, word in enumerate(words) if pattern.search(word)), 0
+        )
+        start = max(first - _SNIPPET_WORDS // 3, 0)
+        excerpt = " ".join(words[start : start + _SNIPPET_WORDS])
+        marked = pattern.sub(lambda match: _START_SEL + match[0] + _STOP_SEL, excerpt)
+        return _render_snippet(marked)
+
+    def search(
+        self,
+        user_id,
+        query: str,
+        *,
+        archived: bool = False,
+        limit: int,
+        after: Optional[tuple] = None,
+    ) -> list[SearchHit]:
+        terms = self.terms(query)
+        if not terms:
+            return []
+
+        def matching(field: str) -> Q:
+            condition = Q()
+            for term in terms:
+                condition |= Q(**{f"{field}__icontains": term})
+            return condition
+
+        chats = Chat.objects.filter(
+            matching("title"), user_id=user_id, is_archived=archived
+        ).only("id", "title", "updated_at")
+        messages = (
+            Message.objects.filter(
+                matching("content"),
+                chat__user_id=user_id,
+                chat__is_archived=archived,
+                role__in=("user", "assistant"),
+            )
+            .select_related("chat")
+            .only("id", "chat_id", "role", "content", "created_at", "chat__title")
+        )
+
+        hits = [
+            SearchHit(
+                hit_id=chat.id,
+                chat_id=chat.id,
+                chat_title=chat.title,
+                message_id=None,
+                role=None,
+                snippet=self._snippet(chat.title, terms),
+                rank=self._rank(chat.title, terms) * self.TITLE_WEIGHT,
+                sort_at=chat.updated_at,
+            )
+            for chat in chats
+        ]
+        hits.extend(
+            SearchHit(
+                hit_id=message.id,
+                chat_id=message.chat_id,
+                chat_title=message.chat.title,
+                message_id=message.id,
+                role=message.role,
+                snippet=self._snippet(message.content, terms),
+                rank=self._rank(message.content, terms),
+                sort_at=message.created_at,
+            )
+            for message in messages
+            # Substring matches inside a compressed payload are not real hits
+            if self._rank(message.content, terms)
+        )
+
+        def key(hit: SearchHit) -> tuple:
+            return hit.rank, hit.sort_at, hit.hit_id
+
+        hits.sort(key=key, reverse=True)
+        if after is not None:
+            hits = [hit for hit in hits if key(hit) < after]
+        return hits[:limit]
+
+
+def get_search_engine():
+    if connection.vendor == "postgresql":
+        return PostgresSearchEngine()
+    return FallbackSearchEngine()
+
+
+def search_chats(
+    user_id,
+    query: str,
+    *,
+    archived: bool = False,
+    cursor: Optional[str] = None,
+    page_size: int,
+) -> dict:
+    """One page of hits for ``query`` as ``{"items": [...], "next_cursor": ...}``."""
+    rows = get_search_engine().search(
+        user_id,
+        query,
+        archived=archived,
+        limit=page_size + 1,
+        after=_decode_position(cursor),
+    )
+    items = rows[:page_size]
+    next_cursor = None
+    if len(rows) > page_size:
+        next_cursor = encode_cursor(items[-1], SEARCH_ORDERING)
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,93 @@
+"""Bulk JSON rendering of message lists and chat list pages.
+
+``MessageResponse`` validation costs a pydantic model per message and per
+attachment. These helpers read the same fields straight off the model instances
+and encode the whole list in one ``shared.renderers.dumps`` call. The field lists come from the
+schemas, so both paths produce the same keys.
+"""
+
+import gzip
+from typing import Any, Iterable
+
+from shared.renderers import dumps
+
+from .models import Chat, Message
+from .schemas import (
+    ChatListResponse,
+    ChatResponse,
+    MessageAttachmentSchema,
+    MessageResponse,
+)
+
+MESSAGE_FIELDS = tuple(MessageResponse.Meta.fields)
+ATTACHMENT_FIELDS = tuple(MessageAttachmentSchema.Meta.fields)
+CHAT_LIST_FIELDS = tuple(ChatListResponse.Meta.fields)
+CHAT_FIELDS = tuple(ChatResponse.Meta.fields)
+# What a public share link reveals; tokens, costs and errors stay private
+SHARED_CHAT_FIELDS = ("title", "model_used", "created_at")
+SHARED_MESSAGE_FIELDS = ("id", "role", "content", "model_used", "created_at")
+
+# Foreign keys are emitted as their raw ids to avoid loading the related row
+_ATTRIBUTE_OVERRIDES = {"parent_message": "parent_message_id"}
+_MESSAGE_ATTRIBUTES = tuple(
+    (field, _ATTRIBUTE_OVERRIDES.get(field, field)) for field in MESSAGE_FIELDS
+)
+
+
+def _attachment_payload(message: Message) -> list[dict[str, Any]] | None:
+    prefetched = getattr(message, "_prefetched_objects_cache", {})
+    if "attachments" in prefetched:
+        attachments = prefetched["attachments"]
+    else:
+        attachments = message.attachments.all()
+    payload = [
+        {field: getattr(attachment, field) for field in ATTACHMENT_FIELDS}
+        for attachment in attachments
+    ]
+    return payload or None
+
+
+def message_payload(message: Message) -> dict[str, Any]:
+    payload = {field: getattr(message, attr) for field, attr in _MESSAGE_ATTRIBUTES}
+    payload["attachments"] = _attachment_payload(message)
+    return payload
+
+
+def chat_payload(chat: Chat) -> dict[str, Any]:
+    # Decimal fields (estimated_cost) are encoded by ``shared.renderers.json_default``
+    return {field: getattr(chat, field) for field in CHAT_FIELDS}
+
+
+def render_messages(messages: Iterable[Message]) -> bytes:
+    """Encode ``messages`` (attachments prefetched) as a JSON array.
+
+    Call this from sync code; it queries the database for any message that is
+    missing an attachment prefetch.
+    """
+    return dumps([message_payload(message) for message in messages])
+
+
+def render_chat_page(chats: Iterable[Chat], next_cursor: str | None) -> bytes:
+    """Encode one chat list page in the ``{items, next_cursor}`` shape."""
+    items = [
+        {field: getattr(chat, field) for field in CHAT_LIST_FIELDS} for chat in chats
+    ]
+    return dumps({"items": items, "next_cursor": next_cursor})
+
+
+def render_snapshot(chat: Chat, messages: Iterable[Message], shared_at) -> bytes:
+    """Gzip-compressed public JSON for a shared chat.
+
+    ``mtime=0`` keeps the output byte-identical for identical content, so the
+    ETag only changes when the snapshot does.
+    """
+    payload = {field: getattr(chat, field) for field in SHARED_CHAT_FIELDS}
+    payload["shared_at"] = shared_at
+    payload["messages"] = [
+        {
+            **{field: getattr(message, field) for field in SHARED_MESSAGE_FIELDS},
+            "attachments": _attachment_payload(message),
+        }
+        for message in messages
+    ]
+    return gzip.compress(dumps(payload), compresslevel=9, mtime=0)
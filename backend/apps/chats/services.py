@@ -1,18 +1,35 @@
+import hashlib
 import logging
+import uuid
+from collections import defaultdict
 from typing import Iterable
 
 from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.db import transaction
-from django.db.models import F
+from django.db.models import F, Q
 from django.utils import timezone
 
 from django.core.exceptions import ObjectDoesNotExist
 
 from apps.authentication.models import User
-from shared.cache import CacheService, RateLimiter
+from shared.cache import (
+    CacheService,
+    ConversationContextCache,
+    MessageQuota,
+    RateLimiter,
+    SharedSnapshotCache,
+)
 from shared.exceptions import RateLimitExceededError
 
-from .models import Chat, Message, MessageAttachment
+from .models import (
+    Chat,
+    Message,
+    MessageAttachment,
+    MessageChunk,
+    SharedChatSnapshot,
+)
+from .serializers import render_snapshot
 
 logger = logging.getLogger(__name__)
 
@@ -83,7 +100,7 @@ class ChatService:
 
     @staticmethod
     async def update_chat(chat_id: str, *, user: User, updates: dict) -> Chat:
-        async def _update() -> Chat:
+        def _update() -> Chat:
             chat = Chat.objects.get(id=chat_id, user=user)
             for field, value in updates.items():
                 setattr(chat, field, value)
@@ -94,17 +111,109 @@ class ChatService:
         CacheService.invalidate_user_cache(str(user.id))
         return chat
 
+    @staticmethod
+    async def rehydrate(chat_id: str, *, user: User) -> bool:
+        """Bring the user's chat back from cold storage; False if it was not cold."""
+        from .archive import rehydrate_chat
+
+        def _rehydrate() -> bool:
+            cold = Chat.objects.filter(
+                id=chat_id, user=user, cold_archived_at__isnull=False
+            )
+            return cold.exists() and rehydrate_chat(chat_id)
+
+        return await sync_to_async(_rehydrate, thread_sensitive=True)()
+
+    @staticmethod
+    def reset_summary_if_diverged(chat: Chat, fork_point: Message | None) -> None:
+        """Drop the rolling summary when a branch leaves the summarized prefix.
+
+        Summaries cover the active branch up to ``summarized_until``; they stay valid
+        for a new branch only if it shares every message up to that point.
+        """
+        if chat.summarized_until is None:
+            return
+        if fork_point is not None and fork_point.created_at >= chat.summarized_until:
+            return
+        Chat.objects.filter(id=chat.id).update(
+            context_summary="", summarized_until=None
+        )
+        chat.context_summary = ""
+        chat.summarized_until = None
+
+    @staticmethod
+    async def activate_branch(chat: Chat, message: Message) -> Message:
+        """Make the branch through ``message`` active and return its leaf."""
+
+        def _activate() -> Message:
+            with transaction.atomic():
+                leaf = (
+                    Message.objects.filter(
+                        thread_id=message.thread_id, depth__gte=message.depth
+                    )
+                    .order_by("-depth")
+                    .first()
+                )
+                previous_leaf = chat.active_leaf
+                if previous_leaf is not None and previous_leaf.id != leaf.id:
+                    shared_depth = _shared_depth(previous_leaf, leaf)
+                    fork_point = (
+                        MessageService.branch_queryset(leaf)
+                        .filter(depth=shared_depth)
+                        .first()
+                        if shared_depth >= 0
+                        else None
+                    )
+                    ChatService.reset_summary_if_diverged(chat, fork_point)
+                Chat.objects.filter(id=chat.id).update(active_leaf=leaf)
+                chat.active_leaf = leaf
+                return leaf
+
+        leaf = await sync_to_async(_activate, thread_sensitive=True)()
+        ConversationContextCache.invalidate(chat.id)
+        return leaf
+
     @staticmethod
     async def delete_chat(chat_id: str, *, user: User) -> None:
         # Note: We don't delete mem0 memory anymore since it's shared across all user chats
-        async def _delete():
+        def _delete():
             chat = Chat.objects.get(id=chat_id, user=user)
             chat.delete()
+            return chat.share_token
 
-        await sync_to_async(_delete, thread_sensitive=True)()
+        share_token = await sync_to_async(_delete, thread_sensitive=True)()
+        ConversationContextCache.invalidate(chat_id)
+        if share_token:
+            SharedSnapshotCache.invalidate(share_token)
         CacheService.invalidate_user_cache(str(user.id))
 
 
+def _attachment_fields(item) -> dict:
+    if not isinstance(item, dict):
+        item = item.model_dump() if hasattr(item, "model_dump") else item.dict()
+    return {
+        "file_name": item["file_name"],
+        "file_type": item["file_type"],
+        "file_size": item["file_size"],
+        "file_url": item["file_url"],
+        "mime_type": item["mime_type"],
+    }
+
+
+def _shared_depth(first: Message, second: Message) -> int:
+    """Depth of the deepest common ancestor of two messages, -1 if none."""
+    shared = -1
+    for (thread_a, start_a, end_a), (thread_b, start_b, end_b) in zip(
+        first.lineage(), second.lineage()
+    ):
+        if thread_a != thread_b or start_a != start_b:
+            break
+        shared = min(end_a, end_b)
+        if end_a != end_b:
+            break
+    return shared
+
+
 class MessageService:
     RATE_LIMIT_PREFIX = "message:user"
 
@@ -118,35 +227,114 @@ class MessageService:
     ) -> Message:
         def _create() -> Message:
             with transaction.atomic():
-                message = Message.objects.create(
+                message = Message(
                     chat=chat,
                     content=content,
                     role=role,
                     status="completed" if role != "assistant" else "pending",
                 )
+                # The active leaf is always the tip of its thread, so new messages
+                # continue it rather than forking.
+                message.attach_to(chat.active_leaf)
+                message.save(force_insert=True)
                 if attachments:
                     attachment_objs = [
-                        MessageAttachment(
-                            message=message,
-                            file_name=item["file_name"],
-                            file_type=item["file_type"],
-                            file_size=item["file_size"],
-                            file_url=item["file_url"],
-                            mime_type=item["mime_type"],
-                        )
+                        MessageAttachment(message=message, **_attachment_fields(item))
                         for item in attachments
                     ]
                     MessageAttachment.objects.bulk_create(attachment_objs)
                 Chat.objects.filter(id=chat.id).update(
                     message_count=F("message_count") + 1,
                     last_message_at=timezone.now(),
+                    active_leaf=message,
                 )
+                chat.active_leaf = message
                 return message
 
         message = await sync_to_async(_create, thread_sensitive=True)()
+        if message.status == "completed" and message.content:
+            MessageService.append_to_context_cache(message)
         CacheService.invalidate_user_cache(str(chat.user_id))
         return message
 
+    @staticmethod
+    def create_exchange(
+        *,
+        user: User,
+        chat_id: str,
+        content: str,
+        model: str | None,
+        attachments: Iterable[dict] | None,
+    ) -> tuple[Chat, Message, Message]:
+        """Store a user message and its reply placeholder in one transaction.
+
+        Creates the chat on first use (instant chat flow). Costs three statements:
+        the chat lookup, one multi-row message INSERT and either the chat INSERT or
+        the counter UPDATE, plus one INSERT when attachments are present.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            chat = (
+                Chat.objects.select_related("active_leaf")
+                .filter(id=chat_id, user=user)
+                .first()
+            )
+            if chat is not None and chat.cold_archived_at is not None:
+                from .archive import rehydrate_chat
+
+                rehydrate_chat(chat.id)
+                chat = Chat.objects.select_related("active_leaf").get(id=chat.id)
+            created = chat is None
+            if created:
+                chat = Chat(
+                    id=chat_id,
+                    user=user,
+                    title=content[:50] + ("..." if len(content) > 50 else ""),
+                    model_used=model or user.preferred_model or "gpt-4o-mini",
+                )
+
+            user_message = Message(
+                chat=chat, role="user", content=content, status="completed"
+            )
+            user_message.attach_to(chat.active_leaf)
+            placeholder = Message(
+                chat=chat,
+                role="assistant",
+                content="",
+                status="processing",
+                model_used=model or chat.model_used,
+            )
+            placeholder.attach_to(user_message)
+
+            # FK checks are deferred to commit, so the chat row may point at the
+            # placeholder before the messages are inserted.
+            if created:
+                chat.message_count = 2
+                chat.last_message_at = now
+                chat.active_leaf = placeholder
+                chat.save(force_insert=True)
+            Message.objects.bulk_create([user_message, placeholder])
+
+            attachment_objs = [
+                MessageAttachment(message=user_message, **_attachment_fields(item))
+                for item in attachments or ()
+            ]
+            if attachment_objs:
+                MessageAttachment.objects.bulk_create(attachment_objs)
+
+            if not created:
+                Chat.objects.filter(id=chat.id).update(
+                    message_count=F("message_count") + 2,
+                    last_message_at=now,
+                    active_leaf=placeholder,
+                )
+                chat.active_leaf = placeholder
+
+        # Let serializers use the rows we already hold instead of re-querying
+        user_message._prefetched_objects_cache = {"attachments": attachment_objs}
+        placeholder._prefetched_objects_cache = {"attachments": []}
+        return chat, user_message, placeholder
+
     @staticmethod
     async def create_assistant_placeholder(
         *,
@@ -157,26 +345,180 @@ class MessageService:
         """Create an assistant message skeleton ready for streaming updates."""
 
         def _create() -> Message:
-            return Message.objects.create(
+            return MessageService.create_reply_placeholder(
+                chat=chat, parent_message=parent_message, model=model
+            )
+
+        return await sync_to_async(_create, thread_sensitive=True)()
+
+    @staticmethod
+    def create_reply_placeholder(
+        *,
+        chat: Chat,
+        parent_message: Message,
+        model: str,
+        **fields,
+    ) -> Message:
+        """Insert a processing assistant message under ``parent_message``.
+
+        Answers to the active leaf extend the active branch; answers to any other
+        message fork a new branch and make it active. The chat's message counter
+        is bumped in the same transaction.
+        """
+        with transaction.atomic():
+            placeholder = Message(
                 chat=chat,
                 role="assistant",
                 content="",
                 status="processing",
                 model_used=model,
-                parent_message=parent_message,
+                **fields,
+            )
+            placeholder.attach_to(
+                parent_message, fork=chat.active_leaf_id != parent_message.id
             )
+            placeholder.save(force_insert=True)
+            if placeholder.thread_id != parent_message.thread_id:
+                ChatService.reset_summary_if_diverged(chat, parent_message)
+            Chat.objects.filter(id=chat.id).update(
+                active_leaf=placeholder, message_count=F("message_count") + 1
+            )
+            chat.active_leaf = placeholder
+        return placeholder
 
-        return await sync_to_async(_create, thread_sensitive=True)()
+    @staticmethod
+    def append_stream_chunk(message_id, *, offset: int, content: str) -> None:
+        MessageChunk.objects.create(
+            message_id=message_id, offset=offset, content=content
+        )
+
+    @staticmethod
+    def read_stream_log(message_id, *, offset: int = 0) -> str:
+        """Contiguous in-flight content of ``message_id`` starting at ``offset``."""
+        parts = []
+        position = offset
+        chunks = (
+            MessageChunk.objects.filter(message_id=message_id, offset__gte=offset)
+            .order_by("offset")
+            .values_list("offset", "content")
+        )
+        for chunk_offset, content in chunks:
+            if chunk_offset != position:
+                break
+            parts.append(content)
+            position += len(content)
+        return "".join(parts)
 
     @staticmethod
-    def get_conversation_context(chat: Chat, limit: int = 20) -> list[dict[str, str]]:
-        messages = list(
-            chat.messages.order_by("-created_at")[:limit].values("role", "content")
+    def hydrate_streaming_content(messages: Iterable[Message]) -> None:
+        """Fill ``content`` of processing messages from their chunk logs."""
+        in_flight = {
+            message.id: message
+            for message in messages
+            if message.status == "processing"
+        }
+        if not in_flight:
+            return
+        logs = defaultdict(list)
+        chunks = (
+            MessageChunk.objects.filter(message_id__in=list(in_flight))
+            .order_by("message_id", "offset")
+            .values_list("message_id", "content")
         )
-        return [
+        for message_id, content in chunks:
+            logs[message_id].append(content)
+        for message_id, parts in logs.items():
+            in_flight[message_id].content = "".join(parts)
+
+    @staticmethod
+    def branch_queryset(leaf: Message):
+        """All messages on the path from the root to ``leaf``, via (thread, depth)."""
+        condition = Q()
+        for thread_id, first_depth, last_depth in leaf.lineage():
+            condition |= Q(
+                thread_id=thread_id, depth__gte=first_depth, depth__lte=last_depth
+            )
+        return Message.objects.filter(condition, chat_id=leaf.chat_id)
+
+    @staticmethod
+    def _context_queryset(leaf: Message, since=None):
+        queryset = (
+            MessageService.branch_queryset(leaf)
+            .filter(status="completed")
+            .exclude(content="")
+        )
+        if since is not None:
+            queryset = queryset.filter(created_at__gt=since)
+        return queryset
+
+    @staticmethod
+    def context_limit() -> int:
+        """Upper bound on verbatim history messages sent with a prompt."""
+        return settings.CHAT_CONTEXT_WINDOW + settings.CHAT_SUMMARY_BATCH_SIZE
+
+    @staticmethod
+    def get_cached_context(
+        chat: Chat, *, user_message: Message
+    ) -> list[dict[str, str]]:
+        """Context for answering ``user_message``, served from the per-chat cache.
+
+        The cache is only trusted when its newest entry is ``user_message``; any
+        other tail (cold cache, edit of an older message) reloads it from the DB.
+        """
+        limit = MessageService.context_limit()
+        user_message_id = str(user_message.id)
+        entries = ConversationContextCache.get(chat.id)
+        if not entries or entries[-1]["id"] != user_message_id:
+            recent = list(
+                MessageService._context_queryset(user_message)
+                .order_by("-depth")[: limit + 1]
+                .only("id", "role", "content", "created_at")
+            )
+            entries = [
+                ConversationContextCache.entry_for(message)
+                for message in reversed(recent)
+            ]
+            ConversationContextCache.store(chat.id, entries)
+
+        since = chat.summarized_until.timestamp() if chat.summarized_until else None
+        history = [
             {"role": entry["role"], "content": entry["content"]}
-            for entry in reversed(messages)
+            for entry in entries
+            if entry["id"] != user_message_id
+            and (since is None or entry["created_at"] > since)
         ]
+        return history[-limit:]
+
+    @staticmethod
+    def append_to_context_cache(message: Message) -> None:
+        ConversationContextCache.append(
+            message.chat_id,
+            ConversationContextCache.entry_for(message),
+            max_entries=MessageService.context_limit() + 1,
+        )
+
+    @staticmethod
+    def get_summary_backlog(
+        chat: Chat, *, window: int, limit: int = 100
+    ) -> list[dict]:
+        """Return unsummarized messages of the active branch outside the window."""
+        if chat.active_leaf is None:
+            return []
+        queryset = MessageService._context_queryset(
+            chat.active_leaf, chat.summarized_until
+        )
+        boundary = list(
+            queryset.order_by("-depth").values_list("depth", flat=True)[
+                window - 1 : window
+            ]
+        )
+        if not boundary:
+            return []
+        return list(
+            queryset.filter(depth__lt=boundary[0])
+            .order_by("depth")[:limit]
+            .values("role", "content", "created_at")
+        )
 
     @staticmethod
     async def edit_message(
@@ -197,7 +539,9 @@ class MessageService:
             message.save()
             return message
 
-        return await sync_to_async(_edit, thread_sensitive=True)()
+        message = await sync_to_async(_edit, thread_sensitive=True)()
+        ConversationContextCache.invalidate(chat_id)
+        return message
 
     @staticmethod
     def generate_chat_title(content: str) -> str:
@@ -205,9 +549,25 @@ class MessageService:
 
     @staticmethod
     async def check_user_message_limit(user: User) -> bool:
-        # Disable message limit for development
-        return True
-        # return user.monthly_message_count < user.monthly_message_limit
+        """Count a message against the user's monthly quota; False past the limit.
+
+        Sends are always counted; the limit is only enforced when
+        ``MESSAGE_QUOTA_ENABLED`` is set.
+        """
+        limit = user.monthly_message_limit if settings.MESSAGE_QUOTA_ENABLED else None
+        try:
+            return MessageQuota.consume(user, limit=limit)
+        except Exception as exc:
+            # Fail open: an unavailable cache must not block sending
+            logger.warning("Quota check failed for user %s: %s", user.id, exc)
+            return True
+
+    @staticmethod
+    def release_user_message(user: User) -> None:
+        try:
+            MessageQuota.release(user)
+        except Exception as exc:
+            logger.warning("Quota release failed for user %s: %s", user.id, exc)
 
     @staticmethod
     def check_ai_rate_limit(user: User) -> bool:
@@ -225,3 +585,91 @@ class MessageService:
             ),
             thread_sensitive=True,
         )()
+
+
+class ShareService:
+    """Public read-only links to a chat, served from a frozen snapshot."""
+
+    @staticmethod
+    async def share_chat(chat_id: str, *, user: User) -> SharedChatSnapshot:
+        """Snapshot the active branch and publish it under the chat's share token.
+
+        Sharing an already shared chat refreshes the snapshot and keeps the link.
+        """
+
+        def _share() -> SharedChatSnapshot:
+            with transaction.atomic():
+                chat = Chat.objects.select_related("active_leaf").get(
+                    id=chat_id, user=user
+                )
+                if chat.cold_archived_at is not None:
+                    from .archive import rehydrate_chat
+
+                    rehydrate_chat(chat.id)
+                    chat = Chat.objects.select_related("active_leaf").get(id=chat.id)
+                messages = []
+                if chat.active_leaf is not None:
+                    messages = list(
+                        MessageService.branch_queryset(chat.active_leaf)
+                        .filter(status="completed")
+                        .order_by("depth")
+                        .prefetch_related("attachments")
+                    )
+                shared_at = timezone.now()
+                body = render_snapshot(chat, messages, shared_at)
+                token = chat.share_token or uuid.uuid4()
+
+                SharedChatSnapshot.objects.filter(chat=chat).delete()
+                snapshot = SharedChatSnapshot.objects.create(
+                    chat=chat,
+                    token=token,
+                    body=body,
+                    etag=hashlib.blake2b(body, digest_size=16).hexdigest(),
+                    message_count=len(messages),
+                )
+                Chat.objects.filter(id=chat.id).update(
+                    is_shared=True, share_token=token
+                )
+                return snapshot
+
+        snapshot = await sync_to_async(_share, thread_sensitive=True)()
+        SharedSnapshotCache.store(
+            snapshot.token, etag=snapshot.etag, body=bytes(snapshot.body)
+        )
+        return snapshot
+
+    @staticmethod
+    async def unshare_chat(chat_id: str, *, user: User) -> None:
+        def _unshare():
+            with transaction.atomic():
+                chat = Chat.objects.only("id", "share_token").get(
+                    id=chat_id, user=user
+                )
+                SharedChatSnapshot.objects.filter(chat=chat).delete()
+                Chat.objects.filter(id=chat.id).update(
+                    is_shared=False, share_token=None
+                )
+                return chat.share_token
+
+        share_token = await sync_to_async(_unshare, thread_sensitive=True)()
+        if share_token:
+            SharedSnapshotCache.invalidate(share_token)
+
+    @staticmethod
+    async def get_snapshot(token) -> dict | None:
+        """``{"etag", "body"}`` for a share token; a warm cache skips the database."""
+        entry = SharedSnapshotCache.get(token)
+        if entry is not None:
+            return entry or None
+
+        snapshot = (
+            await SharedChatSnapshot.objects.filter(token=token)
+            .only("etag", "body")
+            .afirst()
+        )
+        if snapshot is None:
+            SharedSnapshotCache.store_miss(token)
+            return None
+        body = bytes(snapshot.body)
+        SharedSnapshotCache.store(token, etag=snapshot.etag, body=body)
+        return {"etag": snapshot.etag, "body": body}
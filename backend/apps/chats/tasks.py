@@ -2,6 +2,7 @@ import asyncio
 import logging
 from collections.abc import Awaitable, Callable
 from dataclasses import dataclass
+from decimal import Decimal
 from typing import Any
 
 logger = logging.getLogger(__name__)
@@ -11,16 +12,18 @@ async def _stream_openrouter_response(
     *,
     request_kwargs: dict[str, Any],
     on_chunk: Callable[[str], Awaitable[None]] | None = None,
-) -> tuple[str, int]:
+) -> tuple[str, dict[str, Any]]:
     """
     Stream AI response from OpenRouter API.
 
     This function runs in an async context and properly handles streaming updates.
+    Returns the full content and the final ``usage`` block reported by the provider.
     """
     from apps.ai_integration.services import OpenRouterService
 
     response_content = ""
     total_tokens = 0
+    usage_block: dict[str, Any] = {}
     chunk_count = 0
 
     try:
@@ -54,6 +57,7 @@ async def _stream_openrouter_response(
 
             usage = chunk.get("usage")
             if usage:
+                usage_block = usage
                 total_tokens = usage.get("total_tokens", total_tokens)
                 logger.debug("Updated total_tokens: %d", total_tokens)
 
@@ -69,7 +73,7 @@ async def _stream_openrouter_response(
                 "Empty response content received after %d chunks", chunk_count
             )
 
-        return response_content, total_tokens
+        return response_content, usage_block
 
     except Exception as exc:
         logger.error("Error during streaming response: %s", exc)
@@ -79,21 +83,55 @@ async def _stream_openrouter_response(
 @dataclass(slots=True)
 class ConversationConfig:
     model: str
-    messages: list[dict[str, str]]
+    messages: list[dict[str, Any]]
     temperature: float
     max_tokens: int
 
 
+SUMMARY_CONTEXT_PREFIX = "Summary of the earlier conversation:\n"
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain a running summary of a conversation between a user and an AI "
+    "assistant. Merge the new messages into the existing summary. Keep facts, "
+    "decisions, names, code identifiers, open questions and user preferences; drop "
+    "pleasantries. Reply with the updated summary only."
+)
+
+
 def _build_conversation_config(
     *,
     chat,
     user_message,
     model: str,
 ):
+    from apps.ai_integration.services import OpenRouterService
     from apps.chats.services import MessageService
 
-    history = MessageService.get_conversation_context(chat, limit=20)
-    payload = history + [{"role": "user", "content": user_message.content}]
+    # Byte-stable prefix first so provider prompt caches can match it across turns:
+    # base system prompt, chat system prompt, summary, then append-only history.
+    prefix = [OpenRouterService.DEFAULT_SYSTEM_PROMPT]
+    if chat.system_prompt.strip():
+        prefix.append(chat.system_prompt.strip())
+    if chat.context_summary:
+        prefix.append(SUMMARY_CONTEXT_PREFIX + chat.context_summary)
+    system_message = {"role": "system", "content": "\n\n".join(prefix)}
+
+    # Everything after summarized_until is sent verbatim; the summarizer keeps that
+    # tail below window + batch messages.
+    history = MessageService.get_cached_context(chat, user_message=user_message)
+
+    if OpenRouterService.supports_cache_control(model):
+        # Breakpoints after the system prefix and after the history the next turn
+        # will resend; only the new user message is uncached.
+        system_message = _with_cache_control(system_message)
+        if history:
+            history[-1] = _with_cache_control(history[-1])
+
+    payload = (
+        [system_message]
+        + history
+        + [{"role": "user", "content": user_message.content}]
+    )
     return ConversationConfig(
         model=model,
         messages=payload,
@@ -102,21 +140,42 @@ def _build_conversation_config(
     )
 
 
+def _with_cache_control(message: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "role": message["role"],
+        "content": [
+            {
+                "type": "text",
+                "text": message["content"],
+                "cache_control": {"type": "ephemeral"},
+            }
+        ],
+    }
+
+
+def _usage_fields(usage: dict[str, Any]) -> dict[str, int]:
+    """Map an OpenAI-style ``usage`` block onto Message token columns."""
+    prompt_details = usage.get("prompt_tokens_details") or {}
+    return {
+        "prompt_tokens": usage.get("prompt_tokens") or 0,
+        "completion_tokens": usage.get("completion_tokens") or 0,
+        "total_tokens": usage.get("total_tokens") or 0,
+        "cached_tokens": prompt_details.get("cached_tokens") or 0,
+    }
+
+
 def _create_assistant_placeholder(
     *,
     chat,
     parent_message,
     model: str,
 ):
-    from apps.chats.models import Message
+    from apps.chats.services import MessageService
 
-    return Message.objects.create(
+    return MessageService.create_reply_placeholder(
         chat=chat,
-        role="assistant",
-        content="",
-        status="processing",
-        model_used=model,
         parent_message=parent_message,
+        model=model,
     )
 
 
@@ -124,44 +183,64 @@ def _finalize_assistant_success(
     assistant_message,
     *,
     content: str,
-    total_tokens: int,
-) -> None:
+    usage: dict[str, Any],
+    model: str,
+) -> Decimal:
+    """Persist the completed reply and return its estimated cost."""
+    from django.db import transaction
+    from django.db.models import F
     from django.utils import timezone
+    from apps.ai_integration.services import OpenRouterService
+    from apps.chats.models import Chat
+    from apps.chats.services import MessageService
 
+    token_fields = _usage_fields(usage)
+    for field, value in token_fields.items():
+        setattr(assistant_message, field, value)
     assistant_message.content = content
     assistant_message.status = "completed"
-    assistant_message.total_tokens = total_tokens
     assistant_message.completed_at = timezone.now()
-    assistant_message.save(
-        update_fields=[
-            "content",
-            "status",
-            "total_tokens",
-            "completed_at",
-            "updated_at",
-        ]
+    cost = OpenRouterService.calculate_cost(
+        model=model,
+        input_tokens=assistant_message.prompt_tokens,
+        output_tokens=assistant_message.completion_tokens,
     )
+    # Compact the streaming log into the message and fold its usage into the
+    # chat counters in one step; message_count was bumped when it was created.
+    with transaction.atomic():
+        assistant_message.save(
+            update_fields=[
+                "content",
+                "status",
+                *token_fields,
+                "completed_at",
+                "updated_at",
+            ]
+        )
+        assistant_message.chunks.all().delete()
+        Chat.objects.filter(id=assistant_message.chat_id).update(
+            total_tokens_used=F("total_tokens_used") + assistant_message.total_tokens,
+            estimated_cost=F("estimated_cost") + cost,
+            last_message_at=assistant_message.completed_at,
+        )
+    MessageService.append_to_context_cache(assistant_message)
+    return cost
 
 
 def _finalize_assistant_failure(assistant_message, error: str) -> None:
-    assistant_message.status = "failed"
-    assistant_message.error_message = error
-    assistant_message.save(update_fields=["status", "error_message", "updated_at"])
-
-
-def _update_chat_metrics(chat, *, total_tokens: int) -> None:
-    from django.utils import timezone
-    from apps.chats.models import Chat
+    from django.db import transaction
+    from apps.chats.services import MessageService
 
-    message_count = chat.messages.count()
-    Chat.objects.filter(id=chat.id).update(
-        message_count=message_count,
-        last_message_at=timezone.now(),
-        total_tokens_used=chat.total_tokens_used + total_tokens,
-    )
-    chat.refresh_from_db(
-        fields=["message_count", "last_message_at", "total_tokens_used"]
-    )
+    with transaction.atomic():
+        partial = MessageService.read_stream_log(assistant_message.id)
+        if partial:
+            assistant_message.content = partial
+        assistant_message.status = "failed"
+        assistant_message.error_message = error
+        assistant_message.save(
+            update_fields=["content", "status", "error_message", "updated_at"]
+        )
+        assistant_message.chunks.all().delete()
 
 
 def _maybe_generate_title(chat, *, assistant_preview: str) -> None:
@@ -178,16 +257,87 @@ def _fan_out_post_process(
     chat,
     assistant_message,
     model: str,
-    total_tokens: int,
+    cost: Decimal,
 ) -> None:
+    from django.conf import settings
     from apps.ai_integration.tasks import track_usage
 
-    # Execute directly instead of queueing
     try:
-        track_usage(str(chat.user_id), model, total_tokens)
+        track_usage(
+            str(chat.user_id),
+            model,
+            assistant_message.total_tokens,
+            chat_id=str(chat.id),
+            message_id=str(assistant_message.id),
+            input_tokens=assistant_message.prompt_tokens,
+            output_tokens=assistant_message.completion_tokens,
+            estimated_cost=cost,
+            was_cached=assistant_message.cached_tokens > 0,
+        )
     except Exception as e:
         logger.error("Error tracking usage: %s", e)
 
+    # Only chats long enough for messages to leave the window need a summary pass
+    summary_threshold = settings.CHAT_CONTEXT_WINDOW + settings.CHAT_SUMMARY_BATCH_SIZE
+    if chat.message_count > summary_threshold:
+        try:
+            update_conversation_summary(str(chat.id))
+        except Exception as e:
+            logger.error("Error updating conversation summary: %s", e)
+
+
+def update_conversation_summary(chat_id: str) -> bool:
+    """
+    Fold messages that slid out of the context window into the chat summary.
+
+    Runs on the cheap summary model and only once at least a batch of messages has
+    left the window, so most turns return without calling the API.
+    """
+    from django.conf import settings
+    from apps.ai_integration.services import OpenRouterService
+    from apps.chats.models import Chat
+    from apps.chats.services import MessageService
+
+    chat = Chat.objects.get(id=chat_id)
+    backlog = MessageService.get_summary_backlog(
+        chat, window=settings.CHAT_CONTEXT_WINDOW
+    )
+    if len(backlog) < settings.CHAT_SUMMARY_BATCH_SIZE:
+        return False
+
+    transcript = "\n\n".join(
+        f"{entry['role'].upper()}: {entry['content']}" for entry in backlog
+    )
+    prompt = (
+        f"Existing summary:\n{chat.context_summary or '(none)'}\n\n"
+        f"New messages:\n{transcript}"
+    )
+    response = asyncio.run(
+        OpenRouterService.create_completion(
+            model=settings.CHAT_SUMMARY_MODEL,
+            messages=[
+                {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+                {"role": "user", "content": prompt},
+            ],
+        )
+    )
+    choices = response.get("choices") or [{}]
+    summary = (choices[0].get("message", {}).get("content") or "").strip()
+    if not summary:
+        logger.warning("Summary model returned no content for chat %s", chat_id)
+        return False
+
+    # Guard against a concurrent pass having already advanced the summary
+    updated = Chat.objects.filter(
+        id=chat.id, summarized_until=chat.summarized_until
+    ).update(
+        context_summary=summary,
+        summarized_until=backlog[-1]["created_at"],
+    )
+    if updated:
+        logger.info("Summarized %d messages for chat %s", len(backlog), chat_id)
+    return bool(updated)
+
 
 def generate_ai_response(
     chat_id: str,
@@ -241,6 +391,7 @@ def generate_ai_response(
                 assistant_message.save(
                     update_fields=["content", "status", "error_message", "updated_at"]
                 )
+                assistant_message.chunks.all().delete()
             except Message.DoesNotExist:
                 logger.warning(
                     "Assistant placeholder %s missing; recreating",
@@ -265,10 +416,11 @@ def generate_ai_response(
         last_saved_length = 0
         last_save_time = 0
 
-        def _apply_stream_update(partial: str) -> None:
-            """Update message content in database. Django handles connection management."""
-            assistant_message.content = partial
-            assistant_message.save(update_fields=["content", "updated_at"])
+        def _apply_stream_update(partial: str, offset: int) -> None:
+            """Append the unsaved tail of ``partial`` to the message's chunk log."""
+            MessageService.append_stream_chunk(
+                assistant_message.id, offset=offset, content=partial[offset:]
+            )
 
         async def _handle_stream_update(partial: str) -> None:
             nonlocal last_saved_length, last_save_time
@@ -285,43 +437,47 @@ def generate_ai_response(
             )
 
             if should_save:
+                offset = last_saved_length
                 last_saved_length = len(partial)
                 last_save_time = current_time
                 try:
                     await sync_to_async(_apply_stream_update, thread_sensitive=True)(
-                        partial
+                        partial, offset
                     )
                 except Exception as e:
+                    # Retry the same span with the next flush
+                    last_saved_length = offset
                     logger.warning("Failed to save stream update, continuing: %s", e)
 
         # Run streaming in a new event loop (thread-safe)
-        response_content, total_tokens = asyncio.run(
+        response_content, usage = asyncio.run(
             _stream_openrouter_response(
                 request_kwargs=request_kwargs,
                 on_chunk=_handle_stream_update,
             )
         )
 
-        # Ensure final content is saved even if throttled
-        if response_content and len(response_content) > last_saved_length:
-            try:
-                _apply_stream_update(response_content)
-            except Exception as e:
-                logger.warning("Failed to save final stream content: %s", e)
-
         if not response_content.strip():
             error_msg = "AI returned empty response"
             logger.error(error_msg)
             _finalize_assistant_failure(assistant_message, error_msg)
             raise Exception(error_msg)
 
-        _finalize_assistant_success(
+        cost = _finalize_assistant_success(
             assistant_message,
             content=response_content,
-            total_tokens=total_tokens,
+            usage=usage,
+            model=resolved_model,
         )
+        total_tokens = assistant_message.total_tokens
+        if assistant_message.cached_tokens:
+            logger.info(
+                "Prompt cache hit for message %s: %d of %d prompt tokens cached",
+                assistant_message.id,
+                assistant_message.cached_tokens,
+                assistant_message.prompt_tokens,
+            )
 
-        _update_chat_metrics(chat, total_tokens=total_tokens)
         _maybe_generate_title(chat, assistant_preview=response_content[:100])
 
         CacheService.invalidate_user_cache(str(chat.user_id))
@@ -330,7 +486,7 @@ def generate_ai_response(
             chat=chat,
             assistant_message=assistant_message,
             model=resolved_model,
-            total_tokens=total_tokens,
+            cost=cost,
         )
 
         return {
@@ -383,3 +539,149 @@ def process_message_attachments(message_id: str):
         logger.warning(
             "Message %s no longer exists for attachment processing", message_id
         )
+
+
+def reconcile_chat_metrics(*, active_since=None, batch_size: int = 500) -> int:
+    """
+    Recompute chat counters from stored messages and repair any drift.
+
+    The request path only ever increments the counters, so this periodic pass is
+    what corrects them after crashes, deleted messages or pricing fixes. Returns
+    the number of chats that were updated.
+    """
+    from decimal import Decimal
+    from django.db import transaction
+    from django.db.models import Count, Max, Sum
+    from apps.ai_integration.services import OpenRouterService
+    from apps.chats.models import Chat, Message
+    from shared.cache import CacheService
+    from shared.utils import chunked
+
+    # Cold chats have no message rows; their counters are frozen in the archive
+    chats = Chat.objects.filter(cold_archived_at__isnull=True).order_by("id")
+    if active_since is not None:
+        chats = chats.filter(last_message_at__gte=active_since)
+    chat_ids = list(chats.values_list("id", flat=True))
+
+    repaired = 0
+    stale_users = set()
+    for batch in chunked(chat_ids, batch_size):
+        expected = {
+            chat_id: {
+                "message_count": 0,
+                "total_tokens_used": 0,
+                "estimated_cost": Decimal("0"),
+                "last_message_at": None,
+            }
+            for chat_id in batch
+        }
+        totals = (
+            Message.objects.filter(chat_id__in=batch)
+            .values("chat_id", "model_used")
+            .annotate(
+                count=Count("id"),
+                tokens=Sum("total_tokens"),
+                prompt=Sum("prompt_tokens"),
+                completion=Sum("completion_tokens"),
+                latest=Max("created_at"),
+            )
+        )
+        for row in totals:
+            metrics = expected[row["chat_id"]]
+            metrics["message_count"] += row["count"]
+            metrics["total_tokens_used"] += row["tokens"] or 0
+            if row["model_used"] and row["tokens"]:
+                metrics["estimated_cost"] += OpenRouterService.calculate_cost(
+                    model=row["model_used"],
+                    input_tokens=row["prompt"] or 0,
+                    output_tokens=row["completion"] or 0,
+                )
+            previous = metrics["last_message_at"]
+            if previous is None or row["latest"] > previous:
+                metrics["last_message_at"] = row["latest"]
+
+        current = Chat.objects.filter(id__in=batch).values(
+            "id",
+            "user_id",
+            "message_count",
+            "total_tokens_used",
+            "estimated_cost",
+            "last_message_at",
+        )
+        for row in current:
+            metrics = expected[row["id"]]
+            updates = {
+                field: metrics[field]
+                for field in ("message_count", "total_tokens_used", "estimated_cost")
+                if row[field] != metrics[field]
+            }
+            # last_message_at tracks completion time, so only repair it backwards
+            latest = metrics["last_message_at"]
+            recorded = row["last_message_at"]
+            if latest and (recorded is None or recorded < latest):
+                updates["last_message_at"] = latest
+            if updates:
+                Chat.objects.filter(id=row["id"]).update(**updates)
+                stale_users.add(str(row["user_id"]))
+                repaired += 1
+
+    # Cached list pages and their ETags only change with the generation
+    for user_id in stale_users:
+        transaction.on_commit(
+            lambda user_id=user_id: CacheService.bump_user_chats_generation(user_id)
+        )
+    logger.info("Reconciled metrics for %d of %d chats", repaired, len(chat_ids))
+    return repaired
+
+
+def fail_stalled_messages(*, older_than_minutes: int = 15) -> int:
+    """
+    Fail assistant messages stuck in ``processing`` whose worker thread died.
+
+    Whatever was streamed so far is kept as the message content. Returns the
+    number of messages failed.
+    """
+    from datetime import timedelta
+    from django.utils import timezone
+    from apps.chats.models import Message
+
+    cutoff = timezone.now() - timedelta(minutes=older_than_minutes)
+    # A reply that is still streaming keeps appending chunks
+    stalled = Message.objects.filter(
+        status="processing", updated_at__lt=cutoff
+    ).exclude(chunks__created_at__gte=cutoff)
+    failed = 0
+    for message in stalled.iterator():
+        _finalize_assistant_failure(message, "Generation timed out")
+        failed += 1
+    if failed:
+        logger.warning("Failed %d stalled assistant messages", failed)
+    return failed
+
+
+def archive_inactive_chats(
+    *, inactive_days: int | None = None, limit: int | None = None
+) -> int:
+    """
+    Move the messages of chats idle for ``inactive_days`` into cold storage.
+
+    Each chat is archived in its own transaction; the next access rehydrates it.
+    Returns the number of chats archived.
+    """
+    from datetime import timedelta
+    from django.conf import settings
+    from django.utils import timezone
+    from apps.chats.archive import archive_chat, inactive_chat_ids
+
+    days = inactive_days or settings.CHAT_ARCHIVE_AFTER_DAYS
+    cutoff = timezone.now() - timedelta(days=days)
+    archived = 0
+    for chat_id in inactive_chat_ids(inactive_since=cutoff, limit=limit):
+        try:
+            if archive_chat(chat_id) is not None:
+                archived += 1
+        except Exception as exc:
+            logger.error("Failed to archive chat %s: %s", chat_id, exc)
+    if archived:
+        logger.info("Archived %d inactive chats", archived)
+    return archived
@@ -0,0 +1,155 @@
+import gzip
+import zlib
+
+import brotli
+import pytest
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+
+from shared import middleware
+from shared.middleware import CompressionMiddleware, negotiate_encoding
+from shared.renderers import sse_event
+
+BODY = b'{"items": [' + b",".join([b'{"content": "connection pool"}'] * 100) + b"]}"
+EVENTS = [
+    sse_event({"type": "content_delta", "content": f"token {index} "})
+    for index in range(5)
+]
+
+
+class Decoder:
+    """Incremental decoder for one response body."""
+
+    def __init__(self, encoding: str) -> None:
+        if encoding == "br":
+            self._brotli = brotli.Decompressor()
+        else:
+            self._zlib = zlib.decompressobj(31)
+        self.encoding = encoding
+
+    def feed(self, chunk: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(chunk)
+        return self._zlib.decompress(chunk)
+
+
+def run(response, *, accept_encoding="gzip, deflate, br", **headers):
+    request = RequestFactory().get(
+        "/api/v1/chats/", HTTP_ACCEPT_ENCODING=accept_encoding, **headers
+    )
+    return CompressionMiddleware(lambda request: response)(request)
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("gzip, deflate, br", "br"),
+        ("gzip;q=1.0, br;q=0.5", "gzip"),
+        ("br;q=0, gzip", "gzip"),
+        ("*", "br"),
+        ("gzip;q=0, identity", None),
+        ("", None),
+    ],
+)
+def test_negotiate_encoding(accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding) == expected
+
+
+def test_negotiate_encoding_without_brotli(monkeypatch):
+    monkeypatch.setattr(middleware, "brotli", None)
+
+    assert negotiate_encoding("br, gzip;q=0.5") == "gzip"
+    assert negotiate_encoding("br") is None
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+def test_compresses_json_and_weakens_etag(encoding):
+    original = HttpResponse(BODY, content_type="application/json")
+    original["ETag"] = '"abc"'
+
+    response = run(original, accept_encoding=encoding)
+
+    assert response["Content-Encoding"] == encoding
+    assert response["Vary"] == "Accept-Encoding"
+    assert response["ETag"] == 'W/"abc"'
+    assert int(response["Content-Length"]) == len(response.content) < len(BODY)
+    assert Decoder(encoding).feed(response.content) == BODY
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+def test_sse_events_decode_as_they_arrive(encoding):
+    response = run(
+        StreamingHttpResponse(iter(EVENTS), content_type="text/event-stream"),
+        accept_encoding=encoding,
+        HTTP_X_STREAM_COMPRESSION="1",
+    )
+
+    assert response["Content-Encoding"] == encoding
+    chunks = list(response.streaming_content)
+    decoder = Decoder(encoding)
+    # One flushed block per event, then the end of the stream
+    assert [decoder.feed(chunk) for chunk in chunks] == [*EVENTS, b""]
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+def test_async_sse_events_decode_as_they_arrive(encoding):
+    async def events():
+        for event in EVENTS:
+            yield event
+
+    response = run(
+        StreamingHttpResponse(events(), content_type="text/event-stream"),
+        accept_encoding=encoding,
+        HTTP_X_STREAM_COMPRESSION="1",
+    )
+
+    async def collect():
+        return [chunk async for chunk in response.streaming_content]
+
+    decoder = Decoder(encoding)
+    assert [decoder.feed(chunk) for chunk in async_to_sync(collect)()] == [
+        *EVENTS,
+        b"",
+    ]
+
+
+def test_sse_is_not_compressed_without_opt_in():
+    response = run(
+        StreamingHttpResponse(iter(EVENTS), content_type="text/event-stream")
+    )
+
+    assert not response.has_header("Content-Encoding")
+    assert list(response.streaming_content) == EVENTS
+
+
+def test_already_encoded_response_passes_through():
+    body = gzip.compress(BODY)
+    original = HttpResponse(body, content_type="application/json")
+    original["Content-Encoding"] = "gzip"
+    original["ETag"] = '"abc"'
+
+    response = run(original)
+
+    assert response["Content-Encoding"] == "gzip"
+    assert response["ETag"] == '"abc"'
+    assert response.content == body
+
+
+def test_no_transform_response_passes_through():
+    original = HttpResponse(BODY, content_type="application/json")
+    original["Cache-Control"] = "private, no-transform"
+
+    response = run(original)
+
+    assert not response.has_header("Content-Encoding")
+    assert response.content == BODY
+
+
+def test_small_and_binary_responses_pass_through():
+    small = run(HttpResponse(b"{}", content_type="application/json"))
+    binary = run(HttpResponse(BODY, content_type="image/png"))
+
+    assert not small.has_header("Content-Encoding")
+    assert not binary.has_header("Content-Encoding")
+    assert binary.content == BODY
@@ -0,0 +1,93 @@
+import os
+
+import pytest
+from django.db import connection
+
+from apps.authentication.models import User
+from apps.chats.models import Chat, Message
+from apps.chats.search import search_chats
+from shared.fields import COMPRESSION_MARKER, CompressedTextField, decompress_text
+
+THRESHOLD = CompressedTextField.DEFAULT_THRESHOLD
+LOG_LINE = "2024-05-01T12:00:00Z INFO [db.pool] connection recycled\n"
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def log_text(size: int) -> str:
+    return (LOG_LINE * (size // len(LOG_LINE) + 1))[:size]
+
+
+def stored_content(message_id) -> str:
+    """The column as written, bypassing ``from_db_value``."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT content FROM chats_message WHERE id = %s", [message_id.hex]
+        )
+        return cursor.fetchone()[0]
+
+
+@pytest.fixture
+def chat():
+    user = User.objects.create_user(
+        email="writer@example.com", first_name="Ada", last_name="Lovelace"
+    )
+    return Chat.objects.create(user=user, title="Pool logs")
+
+
+def save(chat, content: str) -> Message:
+    return Message.objects.create(chat=chat, role="user", content=content)
+
+
+@pytest.mark.parametrize(
+    "content, compressed",
+    [
+        ("Why is the pool exhausted?", False),
+        (log_text(THRESHOLD - 1), False),
+        (log_text(THRESHOLD), True),
+        (log_text(1024 * 1024), True),
+        # Plain text that merely looks compressed must round-trip as is
+        (COMPRESSION_MARKER + "not base64 at all", True),
+        (COMPRESSION_MARKER + "eJwLycgsVgCi4pTEvHQFAC4RBbI=", True),
+    ],
+    ids=["short", "below-threshold", "at-threshold", "large", "marker", "marker-b64"],
+)
+def test_compressed_text_field_round_trip(chat, content, compressed):
+    message = save(chat, content)
+
+    assert Message.objects.get(id=message.id).content == content
+    assert (
+        Message.objects.filter(id=message.id).values_list("content", flat=True).get()
+        == content
+    )
+    assert Message.objects.filter(content=content).get().id == message.id
+    assert stored_content(message.id).startswith(COMPRESSION_MARKER) is compressed
+
+
+def test_compressed_text_field_keeps_incompressible_text_plain(chat):
+    content = os.urandom(THRESHOLD).hex()
+
+    message = save(chat, content)
+
+    assert stored_content(message.id) == content
+
+
+def test_compressed_value_carries_searchable_prefix(chat):
+    content = log_text(64 * 1024)
+
+    stored = stored_content(save(chat, content).id)
+
+    prefix = content[: CompressedTextField.DEFAULT_SEARCH_PREFIX]
+    assert stored.endswith("\n" + prefix)
+    assert len(stored) < len(content)
+    assert decompress_text(stored) == content
+
+
+def test_fallback_search_finds_compressed_messages(chat):
+    message = save(chat, "exhausted " + log_text(64 * 1024))
+    assert stored_content(message.id).startswith(COMPRESSION_MARKER)
+
+    page = search_chats(chat.user_id, "exhausted", page_size=10)
+
+    assert [hit.message_id for hit in page["items"]] == [message.id]
+    assert "<mark>exhausted</mark>" in page["items"][0].snippet
@@ -0,0 +1,26 @@
+import pytest
+from django.db import connection
+
+from apps.chats.query_plans import hot_queries, plan_uses_index
+
+HOT_QUERIES = hot_queries()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "queryset, index_name",
+    [(queryset, index_name) for _label, queryset, index_name in HOT_QUERIES],
+    ids=[label for label, _queryset, _index_name in HOT_QUERIES],
+)
+def test_hot_query_uses_its_index(queryset, index_name):
+    # SQLite only matches partial indexes against literals, and its planner
+    # says little about what production will do
+    if connection.vendor != "postgresql":
+        pytest.skip("query plans are only checked on PostgreSQL")
+    with connection.cursor() as cursor:
+        # Local to the test transaction; empty tables would otherwise seq scan
+        cursor.execute("SET LOCAL enable_seqscan = off")
+
+    plan = queryset.explain()
+
+    assert plan_uses_index(plan, index_name), plan
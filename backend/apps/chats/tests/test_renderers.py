@@ -0,0 +1,90 @@
+import json
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+
+import orjson
+import pytest
+from ninja.renderers import JSONRenderer
+
+from apps.chats.schemas import ChatResponse
+from shared.renderers import ORJSONParser, ORJSONRenderer, sse_event
+
+IST = timezone(timedelta(hours=3))
+
+
+def render(renderer, data) -> bytes:
+    return renderer.render(None, data, response_status=200)
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        uuid.UUID("8d3c5a52-3c4e-4bb5-9d2e-0e9f3b8f4a11"),
+        Decimal("0.012345"),
+        Decimal("0.000000"),
+        Decimal("1E+3"),
+        Decimal("-12.50"),
+        datetime(2024, 5, 1, 12, 30, 45, 123456, tzinfo=timezone.utc),
+        datetime(2024, 5, 1, 12, 30, 45, tzinfo=timezone.utc),
+        datetime(2024, 5, 1, 12, 30, 45, 500, tzinfo=timezone.utc),
+        datetime(2024, 5, 1, 12, 30, 45, 999999, tzinfo=IST),
+        datetime(2024, 5, 1, 12, 30, 45, 123456),
+        date(2024, 5, 1),
+        time(12, 30, 45, 123456),
+    ],
+    ids=repr,
+)
+def test_orjson_renderer_matches_ninja_encoder(value):
+    data = {"value": value, "items": [value], "nested": {"value": value}}
+
+    legacy = render(JSONRenderer(), data)
+    rendered = render(ORJSONRenderer(), data)
+
+    assert orjson.loads(rendered) == json.loads(legacy)
+
+
+def test_orjson_renderer_matches_ninja_encoder_for_schemas():
+    now = datetime(2024, 5, 1, 12, 30, 45, 123456, tzinfo=timezone.utc)
+    chat = ChatResponse(
+        id=uuid.uuid4(),
+        title="Connection pool tuning",
+        model_used="openai/gpt-4o-mini",
+        system_prompt="",
+        temperature=0.7,
+        max_tokens=2048,
+        message_count=2,
+        total_tokens_used=1090,
+        estimated_cost=Decimal("0.012345"),
+        is_archived=False,
+        is_pinned=False,
+        created_at=now,
+        updated_at=now,
+        last_message_at=now,
+    )
+
+    legacy = render(JSONRenderer(), chat)
+    rendered = render(ORJSONRenderer(), chat)
+
+    assert orjson.loads(rendered) == json.loads(legacy)
+    assert orjson.loads(rendered)["created_at"] == "2024-05-01T12:30:45.123Z"
+
+
+def test_sse_event_frame():
+    payload = {"type": "content_delta", "id": uuid.UUID(int=1)}
+
+    frame = sse_event(payload)
+
+    assert frame.startswith(b"data: ") and frame.endswith(b"\n\n")
+    assert orjson.loads(frame[len(b"data: ") : -2]) == {
+        "type": "content_delta",
+        "id": "00000000-0000-0000-0000-000000000001",
+    }
+
+
+def test_orjson_parser_reads_request_body(rf):
+    request = rf.post(
+        "/api/v1/chats/", data=b'{"content": "hi", "model": null}', content_type=""
+    )
+
+    assert ORJSONParser().parse_body(request) == {"content": "hi", "model": None}
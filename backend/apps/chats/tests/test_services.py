@@ -0,0 +1,88 @@
+import uuid
+from contextlib import contextmanager
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.authentication.models import User
+from apps.chats.models import Chat, Message, MessageAttachment
+from apps.chats.services import MessageService
+
+ATTACHMENT = {
+    "file_name": "trace.log",
+    "file_type": "document",
+    "file_size": 2048,
+    "file_url": "https://example.com/trace.log",
+    "mime_type": "text/plain",
+}
+
+TRANSACTION_CONTROL = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE")
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@contextmanager
+def assert_num_statements(expected: int):
+    """Like ``assertNumQueries``, but ignoring transaction control statements.
+
+    Whether BEGIN/COMMIT show up in the query log depends on the backend, and
+    they are not part of the budget being pinned.
+    """
+    with CaptureQueriesContext(connection) as context:
+        yield
+    statements = [
+        query["sql"]
+        for query in context.captured_queries
+        if not query["sql"].upper().startswith(TRANSACTION_CONTROL)
+    ]
+    assert len(statements) == expected, "\n\n".join(statements)
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(
+        email="sender@example.com", first_name="Ada", last_name="Lovelace"
+    )
+
+
+def send(user, chat_id, *, attachments=None):
+    return MessageService.create_exchange(
+        user=user,
+        chat_id=chat_id,
+        content="Why is the pool exhausted?",
+        model=None,
+        attachments=attachments,
+    )
+
+
+def test_create_exchange_query_budget(user):
+    chat_id = str(uuid.uuid4())
+
+    # Chat lookup, chat INSERT, message INSERT
+    with assert_num_statements(3):
+        send(user, chat_id)
+    # Chat lookup, message INSERT, counter UPDATE
+    with assert_num_statements(3):
+        chat, user_message, placeholder = send(user, chat_id)
+
+    chat.refresh_from_db()
+    assert chat.message_count == 4
+    assert chat.active_leaf_id == placeholder.id
+    assert placeholder.parent_message_id == user_message.id
+
+
+def test_create_exchange_query_budget_with_attachments(user):
+    chat_id = str(uuid.uuid4())
+
+    # Plus one attachment INSERT, however many files there are
+    with assert_num_statements(4):
+        send(user, chat_id, attachments=[ATTACHMENT, ATTACHMENT])
+    with assert_num_statements(4):
+        _chat, user_message, _placeholder = send(
+            user, chat_id, attachments=[ATTACHMENT]
+        )
+
+    assert Chat.objects.get(id=chat_id).message_count == 4
+    assert Message.objects.filter(chat_id=chat_id).count() == 4
+    assert MessageAttachment.objects.filter(message=user_message).count() == 1
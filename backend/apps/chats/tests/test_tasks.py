@@ -0,0 +1,36 @@
+import pytest
+
+from apps.authentication.models import User
+from apps.chats.models import Chat
+from apps.chats.tasks import reconcile_chat_metrics
+from shared.cache import CacheService
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(
+        email="owner@example.com", first_name="Grace", last_name="Hopper"
+    )
+
+
+def test_reconcile_chat_metrics_retires_cached_chat_lists(user):
+    drifted = Chat.objects.create(user=user, title="Drifted", message_count=7)
+    Chat.objects.create(user=user, title="Accurate")
+    generation = CacheService.get_user_chats_generation(str(user.id))
+
+    assert reconcile_chat_metrics() == 1
+
+    drifted.refresh_from_db()
+    assert drifted.message_count == 0
+    assert CacheService.get_user_chats_generation(str(user.id)) != generation
+
+
+def test_reconcile_chat_metrics_keeps_accurate_chat_lists_cached(user):
+    Chat.objects.create(user=user, title="Accurate")
+    generation = CacheService.get_user_chats_generation(str(user.id))
+
+    assert reconcile_chat_metrics() == 0
+
+    assert CacheService.get_user_chats_generation(str(user.id)) == generation
@@ -0,0 +1,82 @@
+import gzip
+
+import orjson
+import pytest
+from asgiref.sync import async_to_sync
+
+from apps.authentication.models import User
+from apps.authentication.services import JWTService
+from apps.chats.models import Chat, Message
+from apps.chats.services import MessageService, ShareService
+from apps.chats.tasks import process_message_attachments
+
+ATTACHMENT = {
+    "file_name": "trace.log",
+    "file_type": "document",
+    "file_size": 2048,
+    "file_url": "https://example.com/trace.log",
+    "mime_type": "text/plain",
+}
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def shared_url():
+    user = User.objects.create_user(
+        email="sharer@example.com", first_name="Ada", last_name="Lovelace"
+    )
+    chat = Chat.objects.create(user=user, title="Connection pool tuning")
+    snapshot = async_to_sync(ShareService.share_chat)(str(chat.id), user=user)
+    return f"/api/v1/chats/shared/{snapshot.token}"
+
+
+def test_shared_chat_sends_stored_gzip_body(client, shared_url):
+    response = client.get(shared_url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+
+    assert response["Content-Encoding"] == "gzip"
+    body = orjson.loads(gzip.decompress(response.content))
+    assert body["title"] == "Connection pool tuning"
+
+
+@pytest.mark.parametrize("accept_encoding", ["", "identity", "gzip;q=0, identity"])
+def test_shared_chat_inflates_for_clients_refusing_gzip(
+    client, shared_url, accept_encoding
+):
+    response = client.get(shared_url, HTTP_ACCEPT_ENCODING=accept_encoding)
+
+    assert not response.has_header("Content-Encoding")
+    assert orjson.loads(response.content)["title"] == "Connection pool tuning"
+
+
+def test_message_list_etag_changes_when_attachments_are_processed(client):
+    user = User.objects.create_user(
+        email="sender@example.com", first_name="Ada", last_name="Lovelace"
+    )
+    chat, user_message, placeholder = MessageService.create_exchange(
+        user=user,
+        chat_id=None,
+        content="What does this trace say?",
+        model=None,
+        attachments=[ATTACHMENT],
+    )
+    Message.objects.filter(id=placeholder.id).update(status="completed")
+    url = f"/api/v1/chats/{chat.id}/messages"
+    authorization = f"Bearer {JWTService.generate_tokens(user)['access']}"
+
+    first = client.get(url, HTTP_AUTHORIZATION=authorization)
+    assert first.status_code == 200
+    revalidated = client.get(
+        url, HTTP_AUTHORIZATION=authorization, HTTP_IF_NONE_MATCH=first["ETag"]
+    )
+    assert revalidated.status_code == 304
+
+    process_message_attachments(str(user_message.id))
+
+    refreshed = client.get(
+        url, HTTP_AUTHORIZATION=authorization, HTTP_IF_NONE_MATCH=first["ETag"]
+    )
+    assert refreshed.status_code == 200
+    assert refreshed["ETag"] != first["ETag"]
+    attachment = orjson.loads(refreshed.content)[0]["attachments"][0]
+    assert attachment["is_processed"] is True
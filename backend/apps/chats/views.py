@@ -1,37 +1,59 @@
+from dataclasses import asdict
 from typing import List
 
 from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.db.models import Prefetch
-from ninja import Router
+from django.db.models import OuterRef, Prefetch, Subquery
+from ninja import File, Query, Router
+from ninja.files import UploadedFile
 from ninja.errors import HttpError
-from ninja.pagination import PageNumberPagination, paginate
 
 from apps.authentication.views import auth_bearer_instance
+from shared.cache import CacheService
+from shared.middleware import negotiate_encoding
+from shared.pagination import (
+    KeysetPagination,
+    decode_cursor,
+    encode_cursor,
+    keyset_filter,
+)
 from shared.rate_limiting import apply_rate_limit
-from shared.exceptions import RateLimitExceededError
+from shared.renderers import dumps, sse_event
+from shared.exceptions import ChatImportError, RateLimitExceededError
 
-from .models import Chat, Message
+from .models import Chat, Message, MessageAttachment
 from .schemas import (
     ChatCreateRequest,
+    ChatImportResponse,
+    ChatListPage,
     ChatListResponse,
     ChatResponse,
+    ChatSearchQuery,
+    ChatShareResponse,
     MessageCreateRequest,
     MessageEditRequest,
     MessageRegenerateRequest,
     MessageResponse,
     MessageAttachmentSchema,
+    SearchPage,
 )
+from . import export, search
+from .importer import ChatImporter
 from .pipeline import chat_pipeline
-from .services import MessageService
+from .serializers import render_chat_page, render_messages
+from .services import ChatService, MessageService, ShareService
 
 chat_router = Router(tags=["Chats"])
 
 # Streaming endpoint moved here due to Django Ninja routing issues
-import json
+import gzip
+import hashlib
+import uuid
 import logging
 import time
-from django.http import StreamingHttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
 
 logger = logging.getLogger(__name__)
 
@@ -66,10 +88,12 @@ async def serialize_message(message: Message) -> MessageResponse:
         prompt_tokens=message.prompt_tokens,
         completion_tokens=message.completion_tokens,
         total_tokens=message.total_tokens,
+        cached_tokens=message.cached_tokens,
         status=message.status,
         error_message=message.error_message,
         parent_message=message.parent_message_id,
         thread_id=message.thread_id,
+        depth=message.depth,
         user_rating=message.user_rating,
         is_regenerated=message.is_regenerated,
         regeneration_count=message.regeneration_count,
@@ -80,15 +104,140 @@ async def serialize_message(message: Message) -> MessageResponse:
     )
 
 
-@chat_router.get("/", response=List[ChatListResponse], auth=auth_bearer_instance)
-@paginate(PageNumberPagination, page_size=20)
-async def list_chats(request):
-    user = request.auth
-    chats = Chat.objects.filter(user=user).select_related("user").order_by("-updated_at")
-    return [ChatListResponse.from_orm(chat) for chat in await chat_list_sync(chats)]
+def _etag(*parts) -> str:
+    """Strong ETag over the state a response is derived from."""
+    digest = hashlib.blake2b(
+        "|".join(map(str, parts)).encode(), digest_size=16
+    ).hexdigest()
+    return quote_etag(digest)
+
+
+def _weak(etag: str) -> str:
+    return etag.removeprefix("W/")
+
+
+def _not_modified(request, etag: str) -> HttpResponse | None:
+    # Weak comparison: CompressionMiddleware hands compressed responses out
+    # with the tag weakened, and browsers send it back that way
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and _weak(etag) in map(_weak, parse_etags(if_none_match)):
+        return HttpResponse(status=304, headers=_revalidation_headers(etag))
+    return None
+
+
+def _revalidation_headers(etag: str) -> dict[str, str]:
+    # Per-user data: let the browser keep it, but revalidate on every use
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+CHAT_LIST_PAGINATION = KeysetPagination(ordering=("-updated_at", "-id"), page_size=20)
+
+
+@chat_router.get("/", response=ChatListPage, auth=auth_bearer_instance)
+async def list_chats(request, page: KeysetPagination.Input = Query(...)):
+    """
+    Chats ordered by most recent activity; follow ``next_cursor`` for more.
+
+    Rendered pages are cached per user under a generation number that chat and
+    message writes bump, so a warm page costs two cache reads and no queries.
+    """
+    user_id = str(request.auth.id)
+    page_key = {"cursor": page.cursor or "", "page_size": page.page_size or 0}
+    generation = CacheService.get_user_chats_generation(user_id)
+    etag = _etag("chats", user_id, generation, *page_key.values())
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    body = CacheService.get_cached_user_chats(
+        user_id, generation=generation, **page_key
+    )
+    if body is None:
+        chats = Chat.objects.filter(user_id=user_id).only(
+            *ChatListResponse.Meta.fields, "updated_at"
+        )
+        result = await CHAT_LIST_PAGINATION.apaginate_queryset(chats, page)
+        body = render_chat_page(result["items"], result["next_cursor"]).decode()
+        CacheService.cache_user_chats(
+            user_id, body, generation=generation, **page_key
+        )
+    return HttpResponse(
+        body, content_type="application/json", headers=_revalidation_headers(etag)
+    )
+
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 50
+
+
+@chat_router.get("/search", response=SearchPage, auth=auth_bearer_instance)
+async def search_chats(
+    request,
+    filters: ChatSearchQuery = Query(...),
+    page: KeysetPagination.Input = Query(...),
+):
+    """
+    Ranked matches for ``search`` in the user's chat titles and messages.
+
+    Each hit carries an HTML snippet with matches wrapped in ``<mark>``; follow
+    ``next_cursor`` for more.
+    """
+    query = (filters.search or "").strip()
+    if not query:
+        raise HttpError(400, "Search query is required")
+    page_size = min(page.page_size or SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE)
+    return await sync_to_async(search.search_chats, thread_sensitive=True)(
+        request.auth.id,
+        query,
+        archived=filters.archived,
+        cursor=page.cursor,
+        page_size=page_size,
+    )
+
+
+def _export_response(user_id, *, chat_id: str | None, filename: str):
+    response = StreamingHttpResponse(
+        export.export_chats(user_id, chat_id=chat_id),
+        content_type=export.EXPORT_CONTENT_TYPE,
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response["Cache-Control"] = "no-store"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@chat_router.get("/export", auth=auth_bearer_instance)
+@apply_rate_limit(namespace="export_chats", limit=5, window=3600)
+async def export_all_chats(request):
+    """Stream every chat and message of the user as NDJSON."""
+    return _export_response(
+        request.auth.id,
+        chat_id=None,
+        filename=f"chats-{timezone.now():%Y%m%d}.ndjson",
+    )
+
 
-async def chat_list_sync(chats):
-    return [chat async for chat in chats]
+@chat_router.get("/{chat_id}/export", auth=auth_bearer_instance)
+@apply_rate_limit(namespace="export_chats", limit=5, window=3600)
+async def export_chat(request, chat_id: str):
+    """Stream one chat and all of its messages (every branch) as NDJSON."""
+    if not await Chat.objects.filter(id=chat_id, user=request.auth).aexists():
+        raise HttpError(404, "Chat not found")
+    return _export_response(
+        request.auth.id, chat_id=chat_id, filename=f"chat-{chat_id}.ndjson"
+    )
+
+
+@chat_router.post("/import", response=ChatImportResponse, auth=auth_bearer_instance)
+@apply_rate_limit(namespace="import_chats", limit=5, window=3600)
+async def import_chats(request, file: UploadedFile = File(...)):
+    """Import an NDJSON chat export (the ``/export`` format) into new chats."""
+    importer = ChatImporter(request.auth)
+    try:
+        result = await sync_to_async(importer.run, thread_sensitive=True)(file)
+    except ChatImportError as exc:
+        raise HttpError(400, str(exc))
+    return asdict(result)
 
 
 @chat_router.post("/", response=ChatResponse, auth=auth_bearer_instance)
@@ -124,34 +273,191 @@ async def create_chat(request, data: ChatCreateRequest):
         raise HttpError(500, "Failed to create chat")
 
 
+@chat_router.post(
+    "/{chat_id}/share", response=ChatShareResponse, auth=auth_bearer_instance
+)
+async def share_chat(request, chat_id: str):
+    """Publish a snapshot of the active branch at ``/chats/shared/{share_token}``."""
+    try:
+        snapshot = await ShareService.share_chat(chat_id, user=request.auth)
+    except Chat.DoesNotExist:
+        raise HttpError(404, "Chat not found")
+    return ChatShareResponse(
+        share_token=snapshot.token,
+        shared_at=snapshot.created_at,
+        message_count=snapshot.message_count,
+    )
+
+
+@chat_router.delete(
+    "/{chat_id}/share", response={204: None}, auth=auth_bearer_instance
+)
+async def unshare_chat(request, chat_id: str):
+    try:
+        await ShareService.unshare_chat(chat_id, user=request.auth)
+    except Chat.DoesNotExist:
+        raise HttpError(404, "Chat not found")
+    return 204, None
+
+
+@chat_router.get("/shared/{token}", auth=None)
+async def get_shared_chat(request, token: uuid.UUID):
+    """
+    Public, read-only snapshot of a shared chat.
+
+    The stored gzip body is sent as is to clients that accept gzip and inflated
+    for the rest. Warm snapshots are answered from the cache without touching
+    the database, and may be cached publicly for ``SHARED_CHAT_MAX_AGE``.
+    """
+    snapshot = await ShareService.get_snapshot(token)
+    if snapshot is None:
+        raise HttpError(404, "Shared chat not found")
+
+    # Weak: the gzip and identity encodings share the tag
+    etag = f"W/{quote_etag(snapshot['etag'])}"
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.SHARED_CHAT_MAX_AGE}",
+        "Vary": "Accept-Encoding",
+    }
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and etag in parse_etags(if_none_match):
+        return HttpResponse(status=304, headers=headers)
+
+    body = snapshot["body"]
+    # ``gzip;q=0`` is a refusal, and clients preferring brotli get the inflated
+    # body re-encoded by CompressionMiddleware
+    if negotiate_encoding(request.headers.get("Accept-Encoding", "")) == "gzip":
+        headers["Content-Encoding"] = "gzip"
+    else:
+        body = gzip.decompress(body)
+    return HttpResponse(body, content_type="application/json", headers=headers)
+
+
+def _load_messages(queryset) -> list[Message]:
+    messages = list(queryset.prefetch_related(Prefetch("attachments")))
+    MessageService.hydrate_streaming_content(messages)
+    return messages
+
+
+async def _serialize_messages(queryset) -> HttpResponse:
+    """Render a message list in one pass, bypassing per-message schema validation."""
+    body = await sync_to_async(
+        lambda: render_messages(_load_messages(queryset)), thread_sensitive=True
+    )()
+    return HttpResponse(body, content_type="application/json")
+
+
+MESSAGE_CURSOR_ORDERING = ("created_at", "id")
+
+
 @chat_router.get("/{chat_id}/messages", response=List[MessageResponse], auth=auth_bearer_instance)
-async def get_chat_messages(request, chat_id: str):
+async def get_chat_messages(
+    request,
+    chat_id: str,
+    branch: str = "active",
+    limit: int = settings.CHAT_MESSAGE_PAGE_SIZE,
+    before: str | None = None,
+    after: str | None = None,
+):
+    """
+    A window of messages from the active branch (or every branch with ``branch=all``).
+
+    Without cursors this is the latest ``limit`` messages. ``before`` pages back
+    through older history and ``after`` fetches newer messages; cursors come from
+    the ``X-Before-Cursor`` / ``X-After-Cursor`` headers, and ``X-Has-More`` tells
+    whether the requested direction has further pages. Items are oldest first.
+
+    Responses carry an ETag derived from the chat row, its active leaf and its
+    newest attachment write, so a matching ``If-None-Match`` is answered with
+    304 after that single lookup.
+    """
     user = request.auth
+    # Attachment processing finishes in the background without touching the
+    # chat or the leaf, so the newest attachment write is part of the tag too
+    chats = Chat.objects.select_related("active_leaf").annotate(
+        attachments_updated_at=Subquery(
+            MessageAttachment.objects.filter(message__chat_id=OuterRef("id"))
+            .order_by("-updated_at")
+            .values("updated_at")[:1]
+        )
+    )
     try:
-        await Chat.objects.select_related("user").aget(id=chat_id, user=user)
+        chat = await chats.aget(id=chat_id, user=user)
     except Chat.DoesNotExist:
         # Chat doesn't exist yet (instant chat flow) - return empty messages
         return []
+    if chat.cold_archived_at is not None:
+        await ChatService.rehydrate(chat_id, user=user)
+        chat = await chats.aget(id=chat_id)
 
-    try:
-        queryset = (
-            Message.objects.filter(chat_id=chat_id)
-            .order_by("created_at")
-            .select_related("parent_message")
-            .prefetch_related(Prefetch("attachments"))
+    limit = max(1, min(limit, settings.CHAT_MESSAGE_MAX_PAGE_SIZE))
+    if after:
+        ordering, cursor = MESSAGE_CURSOR_ORDERING, after
+    else:
+        ordering, cursor = ("-created_at", "-id"), before
+    position = decode_cursor(cursor, len(ordering)) if cursor else None
+
+    # Every write that changes a visible message moves one of these: new
+    # messages bump message_count, edits and branch switches move the leaf,
+    # finalizing a reply saves the leaf and processing an attachment saves the
+    # attachment. A streaming leaf changes without any of
+    # them, so it is never validated.
+    leaf = chat.active_leaf
+    etag = None
+    if leaf is None or leaf.status != "processing":
+        etag = _etag(
+            "messages",
+            chat.id,
+            chat.message_count,
+            chat.last_message_at,
+            leaf and leaf.id,
+            leaf and leaf.status,
+            leaf and leaf.updated_at,
+            chat.attachments_updated_at,
+            branch,
+            limit,
+            before,
+            after,
         )
+        not_modified = _not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+    def _render_window() -> tuple[bytes, dict[str, str]]:
+        if branch == "all" or chat.active_leaf is None:
+            queryset = Message.objects.filter(chat_id=chat_id)
+        else:
+            queryset = MessageService.branch_queryset(chat.active_leaf)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(keyset_filter(ordering, position))
+
+        messages = _load_messages(queryset[: limit + 1])
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+        if not after:
+            messages.reverse()
+
+        headers = {"X-Has-More": "true" if has_more else "false"}
+        if messages:
+            if after or has_more:
+                headers["X-Before-Cursor"] = encode_cursor(
+                    messages[0], MESSAGE_CURSOR_ORDERING
+                )
+            headers["X-After-Cursor"] = encode_cursor(
+                messages[-1], MESSAGE_CURSOR_ORDERING
+            )
+        return render_messages(messages), headers
 
-        def _fetch_messages() -> list[Message]:
-            return list(queryset)
-
-        messages = await sync_to_async(_fetch_messages, thread_sensitive=True)()
-        serialized: list[MessageResponse] = []
-        for message in messages:
-            serialized.append(await serialize_message(message))
-        return serialized
+    try:
+        body, headers = await sync_to_async(_render_window, thread_sensitive=True)()
     except Exception as e:
         logger.error(f"Error fetching messages for chat {chat_id}: {e}")
         raise HttpError(500, "Failed to fetch messages")
+    if etag is not None:
+        headers.update(_revalidation_headers(etag))
+    return HttpResponse(body, content_type="application/json", headers=headers)
 
 
 @chat_router.post("/{chat_id}/messages", auth=auth_bearer_instance)
@@ -160,55 +466,26 @@ async def send_message(request, chat_id: str, data: MessageCreateRequest):
     user = request.auth
 
     try:
-        # Try to get existing chat, create if doesn't exist (instant chat support)
-        try:
-            chat = await Chat.objects.select_related("user").aget(id=chat_id, user=user)
-        except Chat.DoesNotExist:
-            # Auto-create chat for instant chat flow
-            from django.utils import timezone
-
-            # Generate title from message content (first 50 chars)
-            title = data.content[:50] + ("..." if len(data.content) > 50 else "")
-
-            preferred_model = (
-                data.model
-                or getattr(user, "preferred_model", None)
-                or "gpt-4o-mini"
-            )
-
-            chat = await Chat.objects.acreate(
-                id=chat_id,  # Use the provided chat_id from frontend
-                user=user,
-                title=title,
-                model_used=preferred_model,
-                created_at=timezone.now(),
-            )
-
         if not await MessageService.check_user_message_limit(user):
             raise HttpError(402, "Monthly message limit reached")
 
         try:
+            # Creates the chat on first message (instant chat support)
             outcome = await chat_pipeline.send_user_message(
-                chat=chat,
+                user=user,
+                chat_id=chat_id,
                 content=data.content,
                 model=data.model,
                 attachments=data.attachments,
             )
         except RateLimitExceededError:
+            MessageService.release_user_message(user)
             raise HttpError(429, "Rate limit exceeded")
+        except Exception:
+            MessageService.release_user_message(user)
+            raise
 
-        user_payload = await serialize_message(outcome.message)
-
-        def _schema_to_dict(schema_obj):
-            if hasattr(schema_obj, "model_dump"):
-                return schema_obj.model_dump()
-            if hasattr(schema_obj, "dict"):
-                return schema_obj.dict()
-            if hasattr(schema_obj, "model_dump_json"):
-                return json.loads(schema_obj.model_dump_json())
-            return json.loads(schema_obj.json())
-
-        user_payload_data = _schema_to_dict(user_payload)
+        user_payload_data = (await serialize_message(outcome.message)).model_dump()
 
         # Check if client wants streaming response
         accept_header = request.headers.get("Accept", "")
@@ -223,7 +500,7 @@ async def send_message(request, chat_id: str, data: MessageCreateRequest):
                 assistant_payload_data = None
                 if outcome.assistant_message is not None:
                     assistant_payload = await serialize_message(outcome.assistant_message)
-                    assistant_payload_data = _schema_to_dict(assistant_payload)
+                    assistant_payload_data = assistant_payload.model_dump()
 
                 return stream_ai_response(
                     assistant_message_id=str(outcome.assistant_message.id)
@@ -236,18 +513,20 @@ async def send_message(request, chat_id: str, data: MessageCreateRequest):
             except Exception as e:
                 logger.error(f"❌ STREAMING ERROR: {e}")
                 # Fallback to normal response
-                from django.http import JsonResponse
-                response = JsonResponse(user_payload_data)
+                response = HttpResponse(
+                    dumps(user_payload_data), content_type="application/json"
+                )
                 response["Access-Control-Allow-Origin"] = "http://localhost:3000"
                 response["Access-Control-Allow-Credentials"] = "true"
                 return response
 
         # Add CORS headers for normal JSON response too
-        from django.http import JsonResponse
-        response = JsonResponse(user_payload_data)
+        response = HttpResponse(dumps(user_payload_data), content_type="application/json")
         response["Access-Control-Allow-Origin"] = "http://localhost:3000"
         response["Access-Control-Allow-Credentials"] = "true"
         return response
+    except HttpError:
+        raise
     except Exception as e:
         logger.error(f"Error sending message to chat {chat_id}: {e}")
         raise HttpError(500, "Failed to send message")
@@ -276,21 +555,21 @@ def stream_ai_response(
                 "assistant_message": assistant_message_payload,
                 "queued_ai": queued_ai,
             }
-            yield f"data: {json.dumps(initial_payload, default=str)}\n\n"
+            yield sse_event(initial_payload)
         except GeneratorExit:
             # Client disconnected - this is normal, don't log as error
             logger.debug("Client disconnected from stream during initial payload")
             return
 
         if not assistant_message_id:
-            yield f"data: {json.dumps({'type': 'error', 'error': 'assistant-message-missing'})}\n\n"
+            yield sse_event({"type": "error", "error": "assistant-message-missing"})
             return
 
         if not queued_ai:
             try:
                 skipped_message = Message.objects.get(id=assistant_message_id)
             except Message.DoesNotExist:
-                yield f"data: {json.dumps({'type': 'error', 'error': 'assistant-message-missing'})}\n\n"
+                yield sse_event({"type": "error", "error": "assistant-message-missing"})
                 return
             if skipped_message.status == "processing":
                 skipped_message.status = "failed"
@@ -309,20 +588,29 @@ def stream_ai_response(
                 "error_message": skipped_message.error_message,
                 "queued_ai": False,
             }
-            yield f"data: {json.dumps(completion, default=str)}\n\n"
+            yield sse_event(completion)
             return
 
         try:
             while (time.monotonic() - start_time) < max_wait_time:
                 try:
-                    message = Message.objects.select_related("chat").get(
-                        id=assistant_message_id
-                    )
+                    message = Message.objects.only(
+                        "id", "status", "error_message"
+                    ).get(id=assistant_message_id)
                 except Message.DoesNotExist:
                     time.sleep(check_interval)
                     continue
 
-                current_content = message.content or ""
+                # In-flight text lives in the append-only chunk log; only the new
+                # chunks are read. Finished messages carry the compacted content.
+                if message.status in {"completed", "failed"}:
+                    current_content = Message.objects.values_list(
+                        "content", flat=True
+                    ).get(id=assistant_message_id)
+                else:
+                    current_content = last_content + MessageService.read_stream_log(
+                        assistant_message_id, offset=len(last_content)
+                    )
                 if len(current_content) > len(last_content):
                     delta = current_content[len(last_content) :]
                     payload = {
@@ -332,7 +620,7 @@ def stream_ai_response(
                         "status": message.status,
                         "message_id": str(message.id),
                     }
-                    yield f"data: {json.dumps(payload, default=str)}\n\n"
+                    yield sse_event(payload)
                     last_content = current_content
 
                 if message.status in {"completed", "failed"}:
@@ -343,7 +631,7 @@ def stream_ai_response(
                         "message_id": str(message.id),
                         "error_message": message.error_message,
                     }
-                    yield f"data: {json.dumps(completion, default=str)}\n\n"
+                    yield sse_event(completion)
                     break
 
                 last_status = message.status
@@ -355,7 +643,7 @@ def stream_ai_response(
                     "message_id": assistant_message_id,
                     "last_status": last_status,
                 }
-                yield f"data: {json.dumps(timeout_payload, default=str)}\n\n"
+                yield sse_event(timeout_payload)
         except GeneratorExit:
             # Client disconnected - this is normal
             logger.debug(f"Client disconnected from stream for message {assistant_message_id}")
@@ -373,6 +661,20 @@ def stream_ai_response(
     return response
 
 
+async def _get_chat_message(queryset, *, chat_id: str, message_id: str, user):
+    """Load a message of the user's chat, rehydrating the chat from cold storage."""
+    lookup = {"id": message_id, "chat_id": chat_id, "chat__user": user}
+    try:
+        return await queryset.aget(**lookup)
+    except Message.DoesNotExist:
+        if not await ChatService.rehydrate(chat_id, user=user):
+            raise HttpError(404, "Message not found")
+    try:
+        return await queryset.aget(**lookup)
+    except Message.DoesNotExist:
+        raise HttpError(404, "Message not found")
+
+
 @chat_router.post(
     "/{chat_id}/messages/{message_id}/regenerate",
     response=MessageResponse,
@@ -385,26 +687,28 @@ async def regenerate_message(
     data: MessageRegenerateRequest | None = None,
 ):
     user = request.auth
-    try:
-        message = await Message.objects.select_related("chat").aget(
-            id=message_id, chat_id=chat_id, chat__user=user
-        )
-    except Message.DoesNotExist:
-        raise HttpError(404, "Message not found")
+    message = await _get_chat_message(
+        Message.objects.select_related("chat", "parent_message"),
+        chat_id=chat_id,
+        message_id=message_id,
+        user=user,
+    )
 
     if message.role != "assistant":
         raise HttpError(400, "Only assistant messages can be regenerated")
+    if message.parent_message is None:
+        raise HttpError(400, "Cannot regenerate without original user message")
 
-    message = await chat_pipeline.mark_assistant_regeneration(message)
+    regenerated = await chat_pipeline.regenerate_assistant_message(message)
 
     model = data.model if data and data.model else (message.model_used or message.chat.model_used)
     chat_pipeline.enqueue_regeneration(
-        message_id=str(message.id),
+        message_id=str(regenerated.id),
         model=model,
-        assistant_message_id=str(message.id),
+        assistant_message_id=str(regenerated.id),
     )
 
-    return await serialize_message(message)
+    return await serialize_message(regenerated)
 
 
 @chat_router.put(
@@ -415,22 +719,63 @@ async def regenerate_message(
 async def edit_message(request, chat_id: str, message_id: str, data: MessageEditRequest):
     user = request.auth
 
-    try:
-        message = await Message.objects.select_related("chat").aget(
-            id=message_id, chat_id=chat_id, chat__user=user
-        )
-    except Message.DoesNotExist:
-        raise HttpError(404, "Message not found")
+    message = await _get_chat_message(
+        Message.objects.select_related("chat", "parent_message"),
+        chat_id=chat_id,
+        message_id=message_id,
+        user=user,
+    )
 
     if message.role != "user":
         raise HttpError(400, "Only user messages can be edited")
 
-    message = await chat_pipeline.mark_user_message_edit(message, data.content)
+    edited = await chat_pipeline.edit_user_message(message, data.content)
 
     chat_pipeline.enqueue_ai_response(
-        chat_id=str(message.chat_id),
-        user_message_id=str(message.id),
+        chat_id=str(edited.chat_id),
+        user_message_id=str(edited.id),
         model=message.chat.model_used,
     )
 
-    return await serialize_message(message)
+    return await serialize_message(edited)
+
+
+@chat_router.get(
+    "/{chat_id}/messages/{message_id}/siblings",
+    response=List[MessageResponse],
+    auth=auth_bearer_instance,
+)
+async def list_message_siblings(request, chat_id: str, message_id: str):
+    """Alternative versions of a message (edits and regenerations), oldest first."""
+    user = request.auth
+    message = await _get_chat_message(
+        Message.objects, chat_id=chat_id, message_id=message_id, user=user
+    )
+
+    queryset = Message.objects.filter(chat_id=chat_id, depth=message.depth)
+    if message.parent_message_id:
+        queryset = queryset.filter(parent_message_id=message.parent_message_id)
+    else:
+        queryset = queryset.filter(parent_message__isnull=True)
+    return await _serialize_messages(queryset.order_by("created_at"))
+
+
+@chat_router.post(
+    "/{chat_id}/messages/{message_id}/activate",
+    response=List[MessageResponse],
+    auth=auth_bearer_instance,
+)
+async def activate_branch(request, chat_id: str, message_id: str):
+    """Switch the chat to the branch through ``message_id`` and return it."""
+    user = request.auth
+    message = await _get_chat_message(
+        Message.objects.select_related("chat", "chat__active_leaf"),
+        chat_id=chat_id,
+        message_id=message_id,
+        user=user,
+    )
+
+    leaf = await ChatService.activate_branch(message.chat, message)
+    return await _serialize_messages(
+        MessageService.branch_queryset(leaf).order_by("depth")
+    )
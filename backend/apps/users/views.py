@@ -3,6 +3,7 @@ from ninja.errors import HttpError
 
 from apps.authentication.models import User
 from apps.authentication.views import auth_bearer_instance
+from shared.cache import MessageQuota
 from .schemas import (
     UserPreferenceSchema,
     UserPreferenceUpdateRequest,
@@ -62,7 +63,7 @@ async def user_summary(request):
 
     def _get_stats():
         total_chats = Chat.objects.filter(user=user).count()
-        total_messages = user.monthly_message_count
+        total_messages = MessageQuota.usage(user)
         return {
             "total_chats": total_chats,
             "total_messages": total_messages,
@@ -6,7 +6,7 @@ from urllib.parse import urlparse
 
 import dj_database_url
 import environ
-
+from corsheaders.defaults import default_headers
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
@@ -61,6 +61,7 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "shared.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -180,12 +181,50 @@ if CHANNEL_REDIS_PARSED.scheme == "rediss":
 CORS_ALLOW_ALL_ORIGINS = env.bool("CORS_ALLOW_ALL_ORIGINS", default=False)
 CORS_ALLOWED_ORIGINS = env.list("CORS_ALLOWED_ORIGINS", default=[SITE_URL])
 CORS_ALLOW_CREDENTIALS = True
+CORS_EXPOSE_HEADERS = ["X-Before-Cursor", "X-After-Cursor", "X-Has-More"]
+CORS_ALLOW_HEADERS = (*default_headers, "x-stream-compression")
 
 
 OPENROUTER_API_KEY = env("OPENROUTER_API_KEY", default="")
 OPENAI_API_KEY = env("OPENAI_API_KEY", default="")
 
 
+# Conversation context assembly: the most recent CHAT_CONTEXT_WINDOW messages are
+# sent verbatim, older ones are folded into Chat.context_summary in batches.
+CHAT_CONTEXT_WINDOW = env.int("CHAT_CONTEXT_WINDOW", default=12)
+CHAT_SUMMARY_BATCH_SIZE = env.int("CHAT_SUMMARY_BATCH_SIZE", default=8)
+CHAT_SUMMARY_MODEL = env("CHAT_SUMMARY_MODEL", default="openai/gpt-4o-mini")
+
+# Message history is served in windows; older pages load on scroll via cursors
+CHAT_MESSAGE_PAGE_SIZE = env.int("CHAT_MESSAGE_PAGE_SIZE", default=50)
+CHAT_MESSAGE_MAX_PAGE_SIZE = 200
+
+# Chats idle this long have their messages moved to cold storage by the
+# archive_inactive_chats job; they are rehydrated on the next access
+CHAT_ARCHIVE_AFTER_DAYS = env.int("CHAT_ARCHIVE_AFTER_DAYS", default=30)
+
+# Browsers and CDNs may keep a public share snapshot this long, so unsharing can
+# take up to this long to reach clients that already fetched the link
+SHARED_CHAT_MAX_AGE = env.int("SHARED_CHAT_MAX_AGE", default=60 * 60 * 24)
+
+# JSON/NDJSON responses are compressed with brotli (if installed) or gzip; SSE
+# streams only when the client sends X-Stream-Compression: 1. Token-bearing auth
+# responses are left alone to keep secrets out of compression side channels.
+RESPONSE_COMPRESSION_ENABLED = env.bool("RESPONSE_COMPRESSION_ENABLED", default=True)
+RESPONSE_COMPRESSION_MIN_SIZE = env.int("RESPONSE_COMPRESSION_MIN_SIZE", default=860)
+RESPONSE_COMPRESSION_EXCLUDE_PATHS = r"^/api/v1/auth/"
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Usage records are buffered in-process and bulk-written by a background thread
+USAGE_BUFFER_ENABLED = env.bool("USAGE_BUFFER_ENABLED", default=True)
+USAGE_FLUSH_INTERVAL_MS = env.int("USAGE_FLUSH_INTERVAL_MS", default=500)
+USAGE_FLUSH_BATCH_SIZE = env.int("USAGE_FLUSH_BATCH_SIZE", default=100)
+
+# Enforce User.monthly_message_limit on send; messages are counted either way
+MESSAGE_QUOTA_ENABLED = env.bool("MESSAGE_QUOTA_ENABLED", default=True)
+
+
 # Google OAuth Settings
 GOOGLE_CLIENT_ID = env("GOOGLE_CLIENT_ID", default="")
 GOOGLE_CLIENT_SECRET = env("GOOGLE_CLIENT_SECRET", default="")
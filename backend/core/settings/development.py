@@ -15,6 +15,8 @@ CORS_ALLOW_ALL_ORIGINS = False
 
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
+MESSAGE_QUOTA_ENABLED = False
+
 INSTALLED_APPS += ["django_extensions"]  # type: ignore[name-defined]
 
 SHELL_PLUS = "ipython"
@@ -1,4 +1,10 @@
-from .base import *  # noqa
+import os
+
+# Tests run on DATABASE_URL when it is set (PostgreSQL-only checks such as
+# the query plan test need it) and on in-memory SQLite otherwise
+os.environ.setdefault("DATABASE_URL", "sqlite://:memory:")
+
+from .base import *  # noqa: E402
 
 DEBUG = False
 
@@ -6,14 +12,14 @@ PASSWORD_HASHERS = [
     "django.contrib.auth.hashers.MD5PasswordHasher",
 ]
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": ":memory:",
-    }
-}
-
 CELERY_TASK_ALWAYS_EAGER = True
 CELERY_TASK_EAGER_PROPAGATES = True
+USAGE_BUFFER_ENABLED = False
 
 EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+
+# Redis-free runs; the Redis-only context cache turns itself off on locmem
+CACHES = {
+    alias: {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    for alias in ("default", "sessions", "rate_limiting")
+}
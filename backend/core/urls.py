@@ -4,19 +4,30 @@ from django.urls import path
 
 from ninja import NinjaAPI
 
+from apps.ai_integration.views import usage_router
 from apps.authentication.views import auth_router
 from apps.chats.views import chat_router
 from apps.users.views import users_router
+from shared.exceptions import RateLimitExceededError
+from shared.renderers import ORJSONParser, ORJSONRenderer
 
 api = NinjaAPI(
     version="1.0.0",
     title="ChatGPT Clone API",
     description="Backend API for ChatGPT Clone",
+    renderer=ORJSONRenderer(),
+    parser=ORJSONParser(),
 )
 
 api.add_router("/auth", auth_router)
 api.add_router("/chats", chat_router)
 api.add_router("/users", users_router)
+api.add_router("/usage", usage_router)
+
+
+@api.exception_handler(RateLimitExceededError)
+def rate_limit_exceeded(request, exc):
+    return api.create_response(request, {"detail": "Rate limit exceeded"}, status=429)
 
 
 def health_view(request):
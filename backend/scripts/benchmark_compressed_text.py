@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""Measure storage savings and CPU cost of compressed message bodies.
+
+Generates log-like text of several sizes and times ``compress_text`` and
+``decompress_text`` at each zlib level (no database access):
+
+    python scripts/benchmark_compressed_text.py --sizes 4096 65536 1048576
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+import django
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings.development")
+django.setup()
+
+from shared.fields import compress_text, decompress_text  # noqa: E402
+
+LEVELS = "DEBUG INFO INFO INFO WARNING ERROR".split()
+LOGGERS = ["api.request", "worker.tasks", "db.pool", "cache.redis", "auth.jwt"]
+
+
+def build_log(size: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    lines = []
+    length = 0
+    while length < size:
+        line = (
+            f"2024-05-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:"
+            f"{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}.{rng.randint(0, 999):03d}Z "
+            f"{rng.choice(LEVELS):<7} [{rng.choice(LOGGERS)}] "
+            f"request_id={rng.getrandbits(64):016x} "
+            f"latency_ms={rng.randint(1, 2000)} status={rng.choice([200, 200, 201, 404, 500])}"
+        )
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)[:size]
+
+
+def timed(func, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4096, 65536, 1048576])
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 6, 9])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{args.repeat} runs per case")
+    for size in args.sizes:
+        text = build_log(size)
+        print(f"{size} chars")
+        for level in args.levels:
+            stored = compress_text(text, level=level)
+            assert decompress_text(stored) == text
+            compress = timed(lambda: compress_text(text, level=level), args.repeat)
+            decompress = timed(lambda: decompress_text(stored), args.repeat)
+            print(
+                f"  level {level}   stored {len(stored) / len(text):6.1%}"
+                f"   compress {statistics.median(compress):8.2f} ms"
+                f"   decompress {statistics.median(decompress):8.2f} ms"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+"""Compare Ninja's stdlib JSON renderer/parser with the orjson ones.
+
+Times the per-request encoding work for typical API payloads: a validated chat
+detail response, a page of validated messages, an SSE ``content_delta`` event
+and a send-message request body (no database access):
+
+    python scripts/benchmark_json_renderer.py --messages 50 --repeat 200
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from decimal import Decimal
+
+import django
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings.development")
+django.setup()
+
+from django.test import RequestFactory  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from ninja.parser import Parser  # noqa: E402
+from ninja.renderers import JSONRenderer  # noqa: E402
+
+from shared.renderers import ORJSONParser, ORJSONRenderer, sse_event  # noqa: E402
+
+CONTENT = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 12
+
+
+def message(index: int) -> dict:
+    now = timezone.now()
+    return {
+        "id": uuid.uuid4(),
+        "role": "user" if index % 2 == 0 else "assistant",
+        "content": CONTENT,
+        "model_used": "openai/gpt-4o-mini",
+        "prompt_tokens": 850,
+        "completion_tokens": 240,
+        "total_tokens": 1090,
+        "status": "completed",
+        "parent_message": uuid.uuid4(),
+        "thread_id": uuid.uuid4(),
+        "depth": index,
+        "created_at": now,
+        "updated_at": now,
+        "completed_at": now,
+        "attachments": None,
+    }
+
+
+def chat() -> dict:
+    now = timezone.now()
+    return {
+        "id": uuid.uuid4(),
+        "title": "Connection pool tuning",
+        "model_used": "openai/gpt-4o-mini",
+        "system_prompt": "",
+        "temperature": 0.7,
+        "max_tokens": 2048,
+        "message_count": 24,
+        "total_tokens_used": 18000,
+        "estimated_cost": Decimal("0.012345"),
+        "is_archived": False,
+        "is_pinned": False,
+        "created_at": now,
+        "updated_at": now,
+        "last_message_at": now,
+    }
+
+
+def legacy_sse_event(payload: dict) -> bytes:
+    return f"data: {json.dumps(payload, default=str)}\n\n".encode()
+
+
+def timed(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    return statistics.median(samples)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    chat_detail = chat()
+    message_page = {"items": [message(i) for i in range(args.messages)]}
+    delta = {
+        "type": "content_delta",
+        "content": CONTENT[:40],
+        "total_content": CONTENT,
+        "status": "processing",
+        "message_id": str(uuid.uuid4()),
+    }
+    request = RequestFactory().post(
+        "/api/v1/chats/x/messages",
+        data=json.dumps({"content": CONTENT, "attachments": [], "model": None}),
+        content_type="application/json",
+    )
+
+    def render(renderer, data):
+        return lambda: renderer.render(None, data, response_status=200)
+
+    stdlib, fast = JSONRenderer(), ORJSONRenderer()
+    cases = [
+        ("chat detail", render(stdlib, chat_detail), render(fast, chat_detail)),
+        (
+            f"{args.messages} messages",
+            render(stdlib, message_page),
+            render(fast, message_page),
+        ),
+        ("SSE event", lambda: legacy_sse_event(delta), lambda: sse_event(delta)),
+        (
+            "request body",
+            lambda: Parser().parse_body(request),
+            lambda: ORJSONParser().parse_body(request),
+        ),
+    ]
+
+    print(f"median of {args.repeat} runs, microseconds per call")
+    for name, baseline, candidate in cases:
+        before = timed(baseline, args.repeat)
+        after = timed(candidate, args.repeat)
+        print(
+            f"  {name:<14} stdlib {before:9.1f}   orjson {after:9.1f}"
+            f"   {before / after:5.1f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
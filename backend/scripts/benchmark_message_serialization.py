@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+"""Compare per-message schema serialization with the bulk message renderer.
+
+Builds an in-memory chat (no database access) and times both code paths:
+
+    python scripts/benchmark_message_serialization.py --messages 1000 --repeat 20
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+
+import django
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings.development")
+django.setup()
+
+from django.utils import timezone  # noqa: E402
+from ninja.renderers import JSONRenderer  # noqa: E402
+
+from apps.chats.models import Message, MessageAttachment  # noqa: E402
+from apps.chats.serializers import render_messages  # noqa: E402
+from apps.chats.views import serialize_message  # noqa: E402
+
+
+def build_messages(count: int, attachment_every: int) -> list[Message]:
+    thread_id = uuid.uuid4()
+    now = timezone.now()
+    messages = []
+    parent = None
+    for index in range(count):
+        role = "user" if index % 2 == 0 else "assistant"
+        message = Message(
+            id=uuid.uuid4(),
+            role=role,
+            content=("Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 8),
+            model_used="" if role == "user" else "openai/gpt-4o-mini",
+            prompt_tokens=0 if role == "user" else 850,
+            completion_tokens=0 if role == "user" else 240,
+            total_tokens=0 if role == "user" else 1090,
+            status="completed",
+            parent_message_id=parent.id if parent else None,
+            thread_id=thread_id,
+            depth=index,
+            created_at=now,
+            updated_at=now,
+            completed_at=now,
+        )
+        attachments = []
+        if attachment_every and index % attachment_every == 0:
+            attachments.append(
+                MessageAttachment(
+                    message=message,
+                    file_name=f"file-{index}.png",
+                    file_type="image",
+                    file_size=2048,
+                    file_url=f"https://example.com/file-{index}.png",
+                    mime_type="image/png",
+                )
+            )
+        message._prefetched_objects_cache = {"attachments": attachments}
+        messages.append(message)
+        parent = message
+    return messages
+
+
+async def per_message(messages: list[Message]) -> bytes:
+    payload = [await serialize_message(message) for message in messages]
+    return JSONRenderer().render(None, payload, response_status=200).encode()
+
+
+def bulk(messages: list[Message]) -> bytes:
+    return render_messages(messages)
+
+
+def timed(func, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--attachment-every",
+        type=int,
+        default=10,
+        help="Attach a file to every Nth message (0 disables attachments).",
+    )
+    args = parser.parse_args()
+
+    messages = build_messages(args.messages, args.attachment_every)
+    results = {
+        "per-message schema": timed(
+            lambda: asyncio.run(per_message(messages)), args.repeat
+        ),
+        "bulk renderer": timed(lambda: bulk(messages), args.repeat),
+    }
+
+    print(f"{args.messages} messages, {args.repeat} runs")
+    for name, samples in results.items():
+        print(
+            f"  {name:<20} median {statistics.median(samples):8.2f} ms"
+            f"   min {min(samples):8.2f} ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+"""Measure egress saved by CompressionMiddleware on typical chat payloads.
+
+Runs the middleware over a rendered message history, a chat list page and a
+simulated SSE reply (one ``content_delta`` event per poll, as the stream view
+sends them), for each encoding available (no database access):
+
+    python scripts/benchmark_response_compression.py --messages 200
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+
+import django
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings.development")
+django.setup()
+
+from django.http import HttpResponse, StreamingHttpResponse  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from apps.chats.models import Chat, Message  # noqa: E402
+from apps.chats.serializers import render_chat_page, render_messages  # noqa: E402
+from shared import middleware  # noqa: E402
+
+REPLY = (
+    "Here is how to configure the connection pool. First, set the maximum "
+    "size to match your worker count, then enable health checks so broken "
+    "connections are recycled:\n\n```python\nDATABASES['default']['CONN_MAX_AGE'] "
+    "= 60\nDATABASES['default']['CONN_HEALTH_CHECKS'] = True\n```\n\n"
+)
+
+WORDS = REPLY.split()
+
+
+def prose(rng: random.Random, words: int) -> str:
+    """Reply-like text; shuffled words so messages do not repeat each other."""
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def build_messages(count: int) -> list[Message]:
+    rng = random.Random(0)
+    now = timezone.now()
+    thread_id = uuid.uuid4()
+    messages = []
+    for index in range(count):
+        role = "user" if index % 2 == 0 else "assistant"
+        message = Message(
+            id=uuid.uuid4(),
+            role=role,
+            content=prose(rng, 15) if role == "user" else prose(rng, 250),
+            model_used="" if role == "user" else "openai/gpt-4o-mini",
+            total_tokens=0 if role == "user" else 1090,
+            status="completed",
+            thread_id=thread_id,
+            depth=index,
+            created_at=now,
+            updated_at=now,
+            completed_at=now,
+        )
+        message._prefetched_objects_cache = {"attachments": []}
+        messages.append(message)
+    return messages
+
+
+def build_chats(count: int) -> list[Chat]:
+    now = timezone.now()
+    return [
+        Chat(
+            id=uuid.uuid4(),
+            title=f"Connection pool tuning #{index}",
+            model_used="openai/gpt-4o-mini",
+            message_count=12,
+            created_at=now,
+            updated_at=now,
+            last_message_at=now,
+        )
+        for index in range(count)
+    ]
+
+
+def sse_events(reply: str, step: int) -> list[str]:
+    message_id = str(uuid.uuid4())
+    events = []
+    for end in range(step, len(reply) + step, step):
+        payload = {
+            "type": "content_delta",
+            "content": reply[end - step : end],
+            "total_content": reply[:end],
+            "status": "processing",
+            "message_id": message_id,
+        }
+        events.append(f"data: {json.dumps(payload)}\n\n")
+    return events
+
+
+def measure(make_response, encoding: str) -> tuple[int, int, float]:
+    request = RequestFactory().get(
+        "/api/v1/chats/", HTTP_ACCEPT_ENCODING=encoding, HTTP_X_STREAM_COMPRESSION="1"
+    )
+    compression = middleware.CompressionMiddleware(lambda request: make_response())
+    started = time.perf_counter()
+    response = compression(request)
+    if response.streaming:
+        chunks = list(response.streaming_content)
+        body = b"".join(chunks)
+    else:
+        body = response.content
+    elapsed = (time.perf_counter() - started) * 1000
+    return len(body), len(chunks) if response.streaming else 1, elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument(
+        "--delta-chars",
+        type=int,
+        default=40,
+        help="Characters of reply text per SSE event.",
+    )
+    args = parser.parse_args()
+
+    history = render_messages(build_messages(args.messages))
+    chat_page = render_chat_page(build_chats(args.chats), None)
+    events = sse_events(prose(random.Random(1), 250), args.delta_chars)
+    cases = {
+        f"history ({args.messages} messages)": lambda: HttpResponse(
+            history, content_type="application/json"
+        ),
+        f"chat list ({args.chats} chats)": lambda: HttpResponse(
+            chat_page, content_type="application/json"
+        ),
+        f"SSE reply ({len(events)} events)": lambda: StreamingHttpResponse(
+            iter(events), content_type="text/event-stream"
+        ),
+    }
+    encodings = ["identity", "gzip"]
+    if middleware.brotli is not None:
+        encodings.append("br")
+
+    for name, make_response in cases.items():
+        raw_size = measure(make_response, "identity")[0]
+        print(f"{name}: {raw_size} bytes")
+        for encoding in encodings[1:]:
+            size, chunks, elapsed = measure(make_response, encoding)
+            print(
+                f"  {encoding:<5} {size:>9} bytes  {size / raw_size:6.1%}"
+                f"   {chunks:>4} chunks  {elapsed:7.2f} ms"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
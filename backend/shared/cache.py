@@ -1,8 +1,16 @@
+import base64
 import hashlib
 import json
+import logging
+import threading
+import time
+from collections import OrderedDict
 from typing import Optional, Tuple
 
 from django.core.cache import caches
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
 
 
 class CacheService:
@@ -21,15 +29,46 @@ class CacheService:
         return key_data
 
     @staticmethod
-    def cache_user_chats(user_id: str, chats_data: list, timeout: int = 300) -> None:
+    def _user_chats_generation_key(user_id: str) -> str:
+        return CacheService.generate_cache_key("user_chats_generation", user_id)
+
+    @staticmethod
+    def _fresh_generation() -> int:
+        # Clock-based so a lost counter can never come back at an old value
+        return time.time_ns() // 1000
+
+    @staticmethod
+    def get_user_chats_generation(user_id: str) -> int:
+        cache = CacheService.get_cache()
+        key = CacheService._user_chats_generation_key(user_id)
+        generation = cache.get(key)
+        if generation is None:
+            cache.add(key, CacheService._fresh_generation(), None)
+            generation = cache.get(key)
+        return generation
+
+    @staticmethod
+    def bump_user_chats_generation(user_id: str) -> None:
+        """Retire every cached chat list page of ``user_id`` with one INCR."""
         cache = CacheService.get_cache()
-        key = CacheService.generate_cache_key("user_chats", user_id)
+        key = CacheService._user_chats_generation_key(user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, CacheService._fresh_generation(), None)
+
+    @staticmethod
+    def cache_user_chats(
+        user_id: str, chats_data, timeout: int = 300, *, generation: int, **page
+    ) -> None:
+        cache = CacheService.get_cache()
+        key = CacheService.generate_cache_key("user_chats", user_id, generation, **page)
         cache.set(key, chats_data, timeout)
 
     @staticmethod
-    def get_cached_user_chats(user_id: str) -> Optional[list]:
+    def get_cached_user_chats(user_id: str, *, generation: int, **page):
         cache = CacheService.get_cache()
-        key = CacheService.generate_cache_key("user_chats", user_id)
+        key = CacheService.generate_cache_key("user_chats", user_id, generation, **page)
         return cache.get(key)
 
     @staticmethod
@@ -43,10 +82,272 @@ class CacheService:
     @staticmethod
     def invalidate_user_cache(user_id: str) -> None:
         cache = CacheService.get_cache()
-        cache.delete(CacheService.generate_cache_key("user_chats", user_id))
+        CacheService.bump_user_chats_generation(user_id)
         cache.delete(CacheService.generate_cache_key("user_profile", user_id))
 
 
+class SharedSnapshotCache:
+    """Compressed shared-chat snapshots in the default cache, keyed by token.
+
+    The default cache serializes to JSON, so bodies are stored base64-encoded.
+    Unknown tokens are cached briefly as misses so a dead link that keeps being
+    requested does not reach the database either.
+    """
+
+    TIMEOUT = 60 * 60 * 24
+    MISS_TIMEOUT = 60
+
+    @staticmethod
+    def _key(token) -> str:
+        return CacheService.generate_cache_key("shared_snapshot", token)
+
+    @classmethod
+    def get(cls, token) -> Optional[dict]:
+        """``{"etag", "body"}``, ``{}`` for a cached miss, or None when cold."""
+        entry = CacheService.get_cache().get(cls._key(token))
+        if entry and entry.get("body") is not None:
+            entry["body"] = base64.b64decode(entry["body"])
+        return entry
+
+    @classmethod
+    def store(cls, token, *, etag: str, body: bytes) -> None:
+        CacheService.get_cache().set(
+            cls._key(token),
+            {"etag": etag, "body": base64.b64encode(body).decode()},
+            cls.TIMEOUT,
+        )
+
+    @classmethod
+    def store_miss(cls, token) -> None:
+        CacheService.get_cache().set(cls._key(token), {}, cls.MISS_TIMEOUT)
+
+    @classmethod
+    def invalidate(cls, token) -> None:
+        CacheService.get_cache().delete(cls._key(token))
+
+
+class ConversationContextCache:
+    """Recent context window per chat, kept as a Redis list of JSON entries.
+
+    Writers append with RPUSHX so a cold list is never partially rebuilt, and
+    readers only trust the list when its tail is the message being answered.
+    """
+
+    TIMEOUT = 60 * 60 * 6
+
+    @staticmethod
+    def _key(chat_id) -> str:
+        return CacheService.generate_cache_key("chat_context", chat_id)
+
+    @staticmethod
+    def _connection():
+        try:
+            from django_redis import get_redis_connection
+
+            return get_redis_connection("default")
+        except (ImportError, NotImplementedError):
+            return None
+
+    @staticmethod
+    def entry_for(message) -> dict:
+        return {
+            "id": str(message.id),
+            "role": message.role,
+            "content": message.content,
+            "created_at": message.created_at.timestamp(),
+        }
+
+    @classmethod
+    def get(cls, chat_id) -> Optional[list]:
+        connection = cls._connection()
+        if connection is None:
+            return None
+        try:
+            raw_entries = connection.lrange(cls._key(chat_id), 0, -1)
+        except Exception as exc:
+            logger.warning("Context cache read failed for chat %s: %s", chat_id, exc)
+            return None
+        return [json.loads(item) for item in raw_entries] or None
+
+    @classmethod
+    def store(cls, chat_id, entries: list) -> None:
+        connection = cls._connection()
+        if connection is None:
+            return
+        key = cls._key(chat_id)
+        try:
+            pipeline = connection.pipeline()
+            pipeline.delete(key)
+            if entries:
+                pipeline.rpush(key, *[json.dumps(entry) for entry in entries])
+                pipeline.expire(key, cls.TIMEOUT)
+            pipeline.execute()
+        except Exception as exc:
+            logger.warning("Context cache write failed for chat %s: %s", chat_id, exc)
+
+    @classmethod
+    def append(cls, chat_id, entry: dict, *, max_entries: int) -> None:
+        connection = cls._connection()
+        if connection is None:
+            return
+        key = cls._key(chat_id)
+        try:
+            pipeline = connection.pipeline()
+            pipeline.rpushx(key, json.dumps(entry))
+            pipeline.ltrim(key, -max_entries, -1)
+            pipeline.expire(key, cls.TIMEOUT)
+            pipeline.execute()
+        except Exception as exc:
+            logger.warning("Context cache append failed for chat %s: %s", chat_id, exc)
+            cls.invalidate(chat_id)
+
+    @classmethod
+    def invalidate(cls, chat_id) -> None:
+        connection = cls._connection()
+        if connection is None:
+            return
+        try:
+            connection.delete(cls._key(chat_id))
+        except Exception as exc:
+            logger.warning(
+                "Context cache invalidation failed for chat %s: %s", chat_id, exc
+            )
+
+
+class MessageQuota:
+    """Monthly message counters per user and billing month in the default cache.
+
+    A miss is seeded from the user row that is already loaded, after which sends
+    are counted with atomic INCR/DECR and never read the database. The buffered
+    usage writer copies the counters back to ``User.monthly_message_count``.
+    """
+
+    TIMEOUT = 60 * 60 * 24 * 40
+
+    @staticmethod
+    def current_period(now=None) -> str:
+        return (now or timezone.now()).strftime("%Y%m")
+
+    @staticmethod
+    def _key(user_id, period: str) -> str:
+        return CacheService.generate_cache_key("message_quota", user_id, period)
+
+    @staticmethod
+    def _stored_count(user, period: str) -> int:
+        # Counters from an earlier month are stale and count as zero
+        return user.monthly_message_count if user.quota_period == period else 0
+
+    @classmethod
+    def consume(cls, user, *, limit: int | None = None) -> bool:
+        """Count one message for ``user``; refuse and count nothing past ``limit``."""
+        cache = CacheService.get_cache()
+        period = cls.current_period()
+        key = cls._key(user.id, period)
+        seed = cls._stored_count(user, period)
+        cache.add(key, seed, cls.TIMEOUT)
+        try:
+            used = cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr()
+            used = seed + 1
+            cache.set(key, used, cls.TIMEOUT)
+
+        if limit is not None and used > limit:
+            cache.decr(key)
+            return False
+        return True
+
+    @classmethod
+    def release(cls, user) -> None:
+        """Give back a message consumed for a send that did not go through."""
+        try:
+            CacheService.get_cache().decr(cls._key(user.id, cls.current_period()))
+        except ValueError:
+            pass
+
+    @classmethod
+    def usage(cls, user) -> int:
+        period = cls.current_period()
+        count = CacheService.get_cache().get(cls._key(user.id, period))
+        return cls._stored_count(user, period) if count is None else count
+
+    @classmethod
+    def counts_for(cls, user_ids, period: str) -> dict[str, int]:
+        """Cached counters for ``user_ids`` in ``period``, skipping cold users."""
+        keys = {cls._key(user_id, period): user_id for user_id in user_ids}
+        found = CacheService.get_cache().get_many(list(keys))
+        return {keys[key]: count for key, count in found.items()}
+
+
+class AuthUserCache:
+    """User rows for request authentication, as plain field dicts.
+
+    Reads go through a small per-process LRU first, then the default cache.
+    ``invalidate`` can only clear the LRU of the process it runs in, so local
+    entries expire after ``LOCAL_TIMEOUT`` seconds. That bounds how long other
+    workers keep serving a changed row; shared entries live ``TIMEOUT``.
+    """
+
+    TIMEOUT = 60
+    LOCAL_TIMEOUT = 5
+    LOCAL_MAX_ENTRIES = 1024
+
+    _local: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _key(user_id) -> str:
+        return CacheService.generate_cache_key("auth_user", user_id)
+
+    @classmethod
+    def _remember(cls, user_id: str, row: dict) -> None:
+        with cls._lock:
+            cls._local[user_id] = (time.monotonic() + cls.LOCAL_TIMEOUT, row)
+            cls._local.move_to_end(user_id)
+            while len(cls._local) > cls.LOCAL_MAX_ENTRIES:
+                cls._local.popitem(last=False)
+
+    @classmethod
+    def get(cls, user_id) -> Optional[dict]:
+        user_id = str(user_id)
+        with cls._lock:
+            entry = cls._local.get(user_id)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    cls._local.move_to_end(user_id)
+                    return entry[1]
+                del cls._local[user_id]
+        try:
+            row = CacheService.get_cache().get(cls._key(user_id))
+        except Exception as exc:
+            logger.warning("Auth user cache read failed for %s: %s", user_id, exc)
+            return None
+        if row is not None:
+            cls._remember(user_id, row)
+        return row
+
+    @classmethod
+    def store(cls, user_id, row: dict) -> None:
+        user_id = str(user_id)
+        cls._remember(user_id, row)
+        try:
+            CacheService.get_cache().set(cls._key(user_id), row, cls.TIMEOUT)
+        except Exception as exc:
+            logger.warning("Auth user cache write failed for %s: %s", user_id, exc)
+
+    @classmethod
+    def invalidate(cls, user_id) -> None:
+        user_id = str(user_id)
+        with cls._lock:
+            cls._local.pop(user_id, None)
+        try:
+            CacheService.get_cache().delete(cls._key(user_id))
+        except Exception as exc:
+            logger.warning(
+                "Auth user cache invalidation failed for %s: %s", user_id, exc
+            )
+
+
 class RateLimiter:
     @staticmethod
     def check_rate_limit(key: str, limit: int, window: int) -> Tuple[bool, int]:
@@ -0,0 +1,57 @@
+from django.db import NotSupportedError
+from django.db.migrations.operations import AddIndex, RunSQL
+
+
+class AddIndexConcurrently(AddIndex):
+    """``AddIndex`` that uses CREATE INDEX CONCURRENTLY on PostgreSQL.
+
+    Other backends (SQLite in tests) get a plain CREATE INDEX. Migrations using
+    this operation must set ``atomic = False``.
+    """
+
+    def describe(self):
+        return "Concurrently create index %s on field(s) %s of model %s" % (
+            self.index.name,
+            ", ".join(self.index.fields),
+            self.model_name,
+        )
+
+    @staticmethod
+    def _index_kwargs(schema_editor) -> dict:
+        if schema_editor.connection.vendor != "postgresql":
+            return {}
+        if schema_editor.connection.in_atomic_block:
+            raise NotSupportedError(
+                "AddIndexConcurrently cannot run inside a transaction; "
+                "set atomic = False on the migration."
+            )
+        return {"concurrently": True}
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(
+                model, self.index, **self._index_kwargs(schema_editor)
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(
+                model, self.index, **self._index_kwargs(schema_editor)
+            )
+
+
+class RunSQLOnPostgres(RunSQL):
+    """``RunSQL`` for PostgreSQL-only schema objects (tsvector columns, triggers).
+
+    Other backends skip it, so the same migrations still run on SQLite.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
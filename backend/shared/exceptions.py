@@ -4,3 +4,7 @@ class RateLimitExceededError(Exception):
 
 class ModelNotConfiguredError(Exception):
     """Raised when an expected AI model configuration is missing."""
+
+
+class ChatImportError(Exception):
+    """Raised when a chat history import contains an invalid record."""
@@ -0,0 +1,99 @@
+import base64
+import binascii
+import zlib
+
+from django.db import models
+
+# Marks a stored value as compressed. U+0001 never starts real message text,
+# and a value that happens to start with it is compressed anyway so that it
+# round-trips.
+COMPRESSION_MARKER = "\x01zlib:"
+# Separates the base64 payload (which never contains it) from the plain-text
+# search prefix that follows
+SEARCH_TEXT_SEPARATOR = "\n"
+
+
+def compress_text(value: str, *, level: int = 6, search_prefix: int = 0) -> str:
+    """``value`` compressed, followed by its first ``search_prefix`` characters.
+
+    The plain prefix keeps compressed values visible to pattern lookups and
+    the database-side full-text index.
+    """
+    packed = zlib.compress(value.encode(), level)
+    stored = COMPRESSION_MARKER + base64.b64encode(packed).decode("ascii")
+    if search_prefix:
+        stored += SEARCH_TEXT_SEPARATOR + value[:search_prefix]
+    return stored
+
+
+def decompress_text(value: str) -> str:
+    if not value.startswith(COMPRESSION_MARKER):
+        return value
+    payload = value[len(COMPRESSION_MARKER) :].partition(SEARCH_TEXT_SEPARATOR)[0]
+    try:
+        packed = base64.b64decode(payload, validate=True)
+        return zlib.decompress(packed).decode()
+    except (binascii.Error, zlib.error, UnicodeDecodeError):
+        # Plain text written before the column was compressed
+        return value
+
+
+class CompressedTextField(models.TextField):
+    """``TextField`` that compresses values of ``threshold`` characters or more.
+
+    Large values are zlib-compressed and base64-encoded behind
+    ``COMPRESSION_MARKER`` in the same text column, so no schema change is
+    needed and short values are stored as is. The first ``search_prefix``
+    characters of a compressed value are kept in plain text after it, which is
+    what pattern lookups (``icontains``...) and database-side text functions
+    such as the search trigger see of it. Values are decompressed when loaded,
+    and that includes ``values()``/``values_list()``. Exact lookups compress
+    their argument the same way and still match.
+    """
+
+    DEFAULT_THRESHOLD = 8192
+    DEFAULT_LEVEL = 6
+    DEFAULT_SEARCH_PREFIX = 4096
+
+    def __init__(
+        self,
+        *args,
+        threshold: int = DEFAULT_THRESHOLD,
+        level: int = DEFAULT_LEVEL,
+        search_prefix: int = DEFAULT_SEARCH_PREFIX,
+        **kwargs
+    ):
+        self.threshold = threshold
+        self.level = level
+        self.search_prefix = search_prefix
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.threshold != self.DEFAULT_THRESHOLD:
+            kwargs["threshold"] = self.threshold
+        if self.level != self.DEFAULT_LEVEL:
+            kwargs["level"] = self.level
+        if self.search_prefix != self.DEFAULT_SEARCH_PREFIX:
+            kwargs["search_prefix"] = self.search_prefix
+        return name, path, args, kwargs
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return decompress_text(value)
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if value is None:
+            return value
+        if value.startswith(COMPRESSION_MARKER):
+            return self._compress(value)
+        if len(value) < self.threshold:
+            return value
+        packed = self._compress(value)
+        # Incompressible input (already compressed data, random tokens) stays plain
+        return packed if len(packed) < len(value) else value
+
+    def _compress(self, value: str) -> str:
+        return compress_text(value, level=self.level, search_prefix=self.search_prefix)
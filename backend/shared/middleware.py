@@ -1,13 +1,20 @@
 import re
 import logging
-from typing import Dict
+import zlib
+from typing import Dict, Optional
 
 from django.conf import settings
 from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
 from django.utils.deprecation import MiddlewareMixin
 
 from .rate_limiting import RateLimiter
 
+try:
+    import brotli
+except ImportError:  # Optional; responses fall back to gzip
+    brotli = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -77,3 +84,137 @@ def rate_limit(limit: int, window: int, key_func=None):
         return wrapper
 
     return decorator
+
+
+STREAM_COMPRESSION_HEADER = "X-Stream-Compression"
+COMPRESSIBLE_CONTENT_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """The preferred encoding the client accepts, ``"br"``, ``"gzip"`` or None."""
+    available = ("br", "gzip") if brotli is not None else ("gzip",)
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        weight = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                weight = float(match.group(1))
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+    best, best_weight = None, 0.0
+    # Ties go to the earlier entry in ``available``, i.e. brotli
+    for coding in available:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+class StreamCompressor:
+    """Incremental gzip/brotli encoder.
+
+    ``compress(data, flush=True)`` returns everything needed to decode ``data``
+    on the client right away, which is what keeps server-sent events live.
+    """
+
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=settings.BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(settings.GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, *, flush: bool = False) -> bytes:
+        if self.encoding == "br":
+            output = self._brotli.process(data)
+            return output + self._brotli.flush() if flush else output
+        output = self._zlib.compress(data)
+        return output + self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else output
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress JSON and text responses with brotli or gzip.
+
+    Unlike ``GZipMiddleware`` this never buffers a stream. NDJSON exports are
+    compressed as they are produced. Server-sent events are compressed only when
+    the request opts in with ``X-Stream-Compression: 1``; each event is then
+    flushed as its own decodable block, trading a few bytes per event for zero
+    added latency. Responses that already carry a ``Content-Encoding`` (shared
+    chat snapshots), mark ``no-transform``, or match
+    ``RESPONSE_COMPRESSION_EXCLUDE_PATHS`` are passed through untouched.
+    """
+
+    def process_response(self, request, response):
+        if not settings.RESPONSE_COMPRESSION_ENABLED:
+            return response
+        content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+        if not content_type.startswith(COMPRESSIBLE_CONTENT_TYPES):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if response.has_header("Content-Encoding"):
+            return response
+        if "no-transform" in response.get("Cache-Control", ""):
+            return response
+        if re.match(settings.RESPONSE_COMPRESSION_EXCLUDE_PATHS, request.path):
+            return response
+
+        encoding = negotiate_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            per_event = content_type == "text/event-stream"
+            if per_event and request.headers.get(STREAM_COMPRESSION_HEADER) != "1":
+                return response
+            compressor = StreamCompressor(encoding)
+            if getattr(response, "is_async", False):
+                response.streaming_content = self._compress_async(
+                    response.streaming_content, compressor, per_event
+                )
+            else:
+                response.streaming_content = self._compress(
+                    response.streaming_content, compressor, per_event
+                )
+            del response["Content-Length"]
+        else:
+            if len(response.content) < settings.RESPONSE_COMPRESSION_MIN_SIZE:
+                return response
+            compressor = StreamCompressor(encoding)
+            compressed = compressor.compress(response.content) + compressor.finish()
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+
+        # The encoded body is no longer byte-for-byte what a strong ETag names
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = encoding
+        return response
+
+    @staticmethod
+    def _compress(chunks, compressor: StreamCompressor, flush: bool):
+        for chunk in chunks:
+            if chunk:
+                output = compressor.compress(chunk, flush=flush)
+                if output:
+                    yield output
+        yield compressor.finish()
+
+    @staticmethod
+    async def _compress_async(chunks, compressor: StreamCompressor, flush: bool):
+        async for chunk in chunks:
+            if chunk:
+                output = compressor.compress(chunk, flush=flush)
+                if output:
+                    yield output
+        yield compressor.finish()
@@ -1,6 +1,125 @@
-from ninja.pagination import PageNumberPagination
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+from uuid import UUID
+
+from django.db.models import Q, QuerySet
+from ninja import Field, Schema
+from ninja.errors import HttpError
+from ninja.pagination import AsyncPaginationBase, PageNumberPagination
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def encode_cursor(item: Any, ordering: Sequence[str]) -> str:
+    """Opaque token for ``item``'s position in ``ordering``."""
+    position = [_encode_value(getattr(item, field.lstrip("-"))) for field in ordering]
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, length: int) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError):
+        raise HttpError(400, "Invalid cursor")
+    if not isinstance(position, list) or len(position) != length:
+        raise HttpError(400, "Invalid cursor")
+    return position
+
+
+def keyset_filter(ordering: Sequence[str], position: list) -> Q:
+    """Rows strictly after ``position`` when sorted by ``ordering``."""
+    condition = Q()
+    for index, field in enumerate(ordering):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        ties = {
+            previous.lstrip("-"): value
+            for previous, value in zip(ordering[:index], position)
+        }
+        condition |= Q(**ties, **{f"{name}__{lookup}": position[index]})
+    return condition
 
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 20
     max_page_size = 100
+
+
+class KeysetPagination(AsyncPaginationBase):
+    """Cursor pagination over a unique ordering such as ``("-updated_at", "-id")``.
+
+    Each page continues from the last row of the previous one with a WHERE on the
+    ordering columns instead of an OFFSET, and no COUNT is issued. Clients get an
+    opaque ``next_cursor`` to send back as ``cursor``.
+    """
+
+    class Input(Schema):
+        cursor: Optional[str] = None
+        page_size: Optional[int] = Field(None, ge=1)
+
+    class Output(Schema):
+        items: List[Any]
+        next_cursor: Optional[str] = None
+
+    def __init__(
+        self,
+        *,
+        ordering: Sequence[str] = ("-updated_at", "-id"),
+        page_size: int = 20,
+        max_page_size: int = 100,
+        **kwargs: Any,
+    ) -> None:
+        self.ordering = tuple(ordering)
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+        super().__init__(**kwargs)
+
+    def _get_page_size(self, requested_page_size: Optional[int]) -> int:
+        if requested_page_size is None:
+            return self.page_size
+        return min(requested_page_size, self.max_page_size)
+
+    def _page_queryset(self, queryset: QuerySet, pagination: Input) -> QuerySet:
+        queryset = queryset.order_by(*self.ordering)
+        if pagination.cursor:
+            position = decode_cursor(pagination.cursor, len(self.ordering))
+            queryset = queryset.filter(keyset_filter(self.ordering, position))
+        # One extra row tells whether another page exists without counting
+        return queryset[: self._get_page_size(pagination.page_size) + 1]
+
+    def _build_page(self, rows: list, pagination: Input) -> dict:
+        page_size = self._get_page_size(pagination.page_size)
+        items = rows[:page_size]
+        next_cursor = None
+        if len(rows) > page_size:
+            next_cursor = encode_cursor(items[-1], self.ordering)
+        return {self.items_attribute: items, "next_cursor": next_cursor}
+
+    def paginate_queryset(
+        self,
+        queryset: QuerySet,
+        pagination: Input,
+        **params: Any,
+    ) -> Any:
+        rows = list(self._page_queryset(queryset, pagination))
+        return self._build_page(rows, pagination)
+
+    async def apaginate_queryset(
+        self,
+        queryset: QuerySet,
+        pagination: Input,
+        **params: Any,
+    ) -> Any:
+        rows = [row async for row in self._page_queryset(queryset, pagination)]
+        return self._build_page(rows, pagination)
@@ -0,0 +1,59 @@
+"""orjson encoding for API responses, request bodies and server-sent events.
+
+orjson serializes UUIDs, dataclasses and enums natively; ``json_default``
+covers the rest the way ``NinjaJSONEncoder`` does: datetimes with
+milliseconds and UTC as ``Z`` (orjson alone would send microseconds),
+Decimals as strings, pydantic models, URLs and lazy translation strings.
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from ninja.parser import Parser
+from ninja.renderers import BaseRenderer
+from ninja.responses import NinjaJSONEncoder
+
+DUMPS_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+_fallback_encoder = NinjaJSONEncoder()
+
+
+def json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        # DjangoJSONEncoder's format (milliseconds, UTC as Z), built from
+        # orjson's own output because isoformat() is several times slower
+        text = orjson.dumps(value, option=orjson.OPT_UTC_Z)[1:-1].decode()
+        if value.microsecond:
+            text = text[:23] + text[26:]
+        return text
+    if isinstance(value, Decimal):
+        return str(value)
+    # Raises TypeError for anything it cannot encode either
+    return _fallback_encoder.default(value)
+
+
+def dumps(data: Any, *, option: int = 0) -> bytes:
+    return orjson.dumps(data, default=json_default, option=DUMPS_OPTIONS | option)
+
+
+def loads(data) -> Any:
+    return orjson.loads(data)
+
+
+def sse_event(payload: Any) -> bytes:
+    """One ``data:`` frame of a server-sent event stream."""
+    return b"data: " + dumps(payload) + b"\n\n"
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = "application/json"
+
+    def render(self, request, data: Any, *, response_status: int) -> bytes:
+        return dumps(data)
+
+
+class ORJSONParser(Parser):
+    def parse_body(self, request):
+        return loads(request.body)
@@ -404,6 +404,7 @@ export const useChatStream = (
             credentials: "include",
             headers: {
               Accept: "text/event-stream",
+              "X-Stream-Compression": "1",
               "Content-Type": "application/json",
             },
             body: JSON.stringify({
@@ -235,6 +235,7 @@ export const useInstantChat = () => {
             credentials: "include",
             headers: {
               Accept: "text/event-stream",
+              "X-Stream-Compression": "1",
               "Content-Type": "application/json",
             },
             body: JSON.stringify({